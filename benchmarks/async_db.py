@@ -0,0 +1,155 @@
+"""
+Compare the async note listing (AsyncSession on the event loop) with the
+old sync path (Session on the threadpool) under many concurrent clients.
+
+    python -m benchmarks.async_db --url postgresql://localhost/engineerhub_bench --concurrency 1000 --requests 20000
+    python -m benchmarks.async_db --url sqlite:///bench_async.db --concurrency 200 --requests 5000
+
+A uvicorn worker is started from create_app(): the real app plus
+/bench/sync-notes, the pre-async version of GET /api/notes. Both paths are
+then driven with the same number of open connections. Each path runs
+twice and only the second run is reported, so pools are warm.
+
+The target database is recreated, so never point this at real data.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Optional
+
+
+def create_app():
+    """uvicorn --factory entry point; imported in the server process, where DATABASE_URL is set"""
+    from fastapi import APIRouter, Depends
+    from sqlalchemy.orm import Session
+    from controllers.notes import query_notes_with_like_status, serialize_note
+    from database import get_db
+    from dependencies.get_current_user import Principal, get_current_principal
+    from dependencies.get_storage import get_storage
+    from dependencies.pagination import PageParams, get_page_params, paginate
+    from main import app
+    from models.note import NoteModel
+    from storage.base import BlobStorage
+
+    sync_router = APIRouter()
+
+    @sync_router.get("/bench/sync-notes")
+    def sync_notes(
+        page: PageParams = Depends(get_page_params),
+        db: Session = Depends(get_db),
+        storage: Optional[BlobStorage] = Depends(get_storage),
+        current_user: Principal = Depends(get_current_principal)
+    ):
+        query = query_notes_with_like_status(db, current_user.id)
+        return paginate(query, page, NoteModel.created_at, NoteModel.id, transform=lambda row: serialize_note(*row, storage=storage))
+
+    app.include_router(sync_router)
+    return app
+
+
+def setup(url, notes):
+    # Signs the benchmark token with the same secret as the server
+    os.environ.setdefault("JWT_SECRET", "benchmark-secret-benchmark-secret")
+    from sqlalchemy import create_engine, insert
+    from models.base import Base
+    from models.classes import ClassModel  # noqa: F401  (registers the remaining mappers)
+    from models.note import NoteModel
+    from models.user import UserModel, UserRole
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        user = conn.execute(insert(UserModel).values(
+            name="bench", email="bench@example.com", password="x", role=UserRole.STUDENT
+        )).inserted_primary_key[0]
+        conn.execute(insert(NoteModel), [{
+            "title": f"Note {i}", "file_name": f"n{i}.pdf", "file_key": f"notes/{user}/n{i}.pdf", "file_type": "pdf",
+            "course_code": f"ENG{random.randint(100, 499)}", "year": 2025, "doctor_name": "Dr Bench",
+            "uploader_id": user, "likes_count": 0, "dislikes_count": 0
+        } for i in range(notes)])
+    engine.dispose()
+
+    token = UserModel(id=user, name="bench", email="bench@example.com", role=UserRole.STUDENT).generate_token()
+    return token
+
+
+async def drive(base_url, path, token, concurrency, total):
+    import httpx
+
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120,
+                                 headers={"Authorization": f"Bearer {token}"}) as client:
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path, params={"limit": 20})
+                    response.raise_for_status()
+                except Exception:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return elapsed, latencies, errors
+
+
+def report(label, total, elapsed, latencies, errors):
+    if not latencies:
+        print(f"{label:<8} all {total} requests failed")
+        return
+    pct = lambda p: latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000
+    print(f"{label:<8} {len(latencies) / elapsed:8.1f} req/s  p50 {pct(0.50):7.1f}ms  p99 {pct(0.99):7.1f}ms  "
+          f"max {latencies[-1] * 1000:7.1f}ms  errors {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench_async.db")
+    parser.add_argument("--notes", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    token = setup(args.url, args.notes)
+    env = dict(os.environ, DATABASE_URL=args.url, STORAGE_BACKEND="local", LOCAL_STORAGE_PATH="bench_storage")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.async_db:create_app", "--factory", "--port", str(args.port),
+         "--log-level", "warning", "--backlog", str(max(2048, args.concurrency * 2))],
+        env=env
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        import httpx
+        for _ in range(100):
+            try:
+                httpx.get(base_url + "/", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.2)
+
+        print(f"{args.concurrency} concurrent connections, {args.requests} requests per path")
+        for label, path in (("sync", "/bench/sync-notes"), ("async", "/api/notes")):
+            asyncio.run(drive(base_url, path, token, args.concurrency, args.requests))
+            report(label, args.requests, *asyncio.run(drive(base_url, path, token, args.concurrency, args.requests)))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Time the bearer-token check on the auth path: a full jwt.decode per request
+against decode_token, which verifies each token once and then serves it
+from the token cache.
+
+    python -m benchmarks.jwt_decode --tokens 50 --requests 200000
+
+--tokens simulates that many concurrent sessions, each replaying its own
+token. No database is touched.
+"""
+import argparse
+import os
+import random
+import time
+
+# The auth dependency imports the app's engine and secret at import time
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-benchmark-secret")
+
+import jwt
+from datetime import datetime, timedelta, timezone
+from fastapi.security import HTTPAuthorizationCredentials
+from config.environment import secret
+from dependencies.get_current_user import decode_token, token_cache
+
+
+def make_tokens(count):
+    now = datetime.now(timezone.utc)
+    return [HTTPAuthorizationCredentials(scheme="Bearer", credentials=jwt.encode({
+        "exp": now + timedelta(days=1), "iat": now, "sub": str(i),
+        "name": f"bench{i}", "email": f"bench{i}@example.com", "role": "student", "major": None,
+    }, secret, algorithm="HS256")) for i in range(count)]
+
+
+def run(label, decode, stream):
+    start = time.perf_counter()
+    for token in stream:
+        decode(token)
+    elapsed = time.perf_counter() - start
+    per_call = elapsed / len(stream) * 1e6
+    print(f"{label:<14} {len(stream)} decodes in {elapsed:.3f}s  {per_call:.2f}us/request")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200000)
+    args = parser.parse_args()
+
+    tokens = make_tokens(args.tokens)
+    stream = [random.choice(tokens) for _ in range(args.requests)]
+
+    uncached = run("jwt.decode", lambda token: jwt.decode(token.credentials, secret, algorithms=["HS256"]), stream)
+    token_cache.clear()
+    cached = run("decode_token", decode_token, stream)
+
+    print(f"saving {uncached - cached:.2f}us/request ({uncached / cached:.1f}x)")
+    print(f"token cache: {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
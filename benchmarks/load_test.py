@@ -0,0 +1,258 @@
+"""
+Replay a mixed workload against every router and report per-route
+throughput, latency percentiles and database queries.
+
+    python -m benchmarks.load_test --url postgresql://localhost/engineerhub_bench --users 50000 --notes 500000 --likes 5000000 --workers 4
+    python -m benchmarks.load_test --url sqlite:///bench_load.db --reuse --duration 60 --concurrency 50
+
+The dataset comes from benchmarks.synthetic_data, unless --reuse is given
+and it is already loaded with the same --users/--notes/--classes. A
+uvicorn server runs the real app with DB_QUERY_STATS on, so the query
+count and DB time of each request come back in its X-DB-Queries and
+X-DB-Time headers. Rate limits are raised so the login scenario measures
+bcrypt, not the throttle.
+
+Each client picks a scenario from MIX by weight. Note ids follow the same
+Zipf skew as the reactions, so hot notes stay hot. A request counts as an
+error when its status is not 2xx and not one of the scenario's expected
+statuses, e.g. 409 for a repeated enrollment.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+# Signs the benchmark tokens with the same secret as the server
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-benchmark-secret")
+
+
+class Actors:
+    """Ids and tokens the scenarios draw from, rebuilt from the synthetic data layout"""
+
+    def __init__(self, url, users, notes, classes, zipf_s, sample, rng):
+        from sqlalchemy import create_engine, func, select
+        from benchmarks.synthetic_data import assign_roles, zipf_sampler
+        from models.classes import ClassModel
+        from models.graduate_project import GraduateProjectModel
+        from models.post import PostModel
+        from models.user import UserModel, UserRole
+
+        roles = assign_roles(users)
+        engine = create_engine(url)
+        with engine.connect() as conn:
+            self.classes_by_doctor = defaultdict(list)
+            for class_id, doctor_id in conn.execute(select(ClassModel.id, ClassModel.doctor_id)):
+                self.classes_by_doctor[doctor_id].append(class_id)
+            self.posts = conn.scalar(select(func.max(PostModel.id))) or 1
+            self.projects = conn.scalar(select(func.max(GraduateProjectModel.id))) or 1
+        engine.dispose()
+
+        def tokens(role, ids):
+            return [(user_id, UserModel(id=user_id, name=f"user{user_id}", email=f"user{user_id}@synthetic.uob.edu.bh",
+                                        role=role).generate_token()) for user_id in ids]
+
+        self.students = tokens(UserRole.STUDENT, rng.sample(roles[UserRole.STUDENT], min(sample, len(roles[UserRole.STUDENT]))))
+        self.doctors = tokens(UserRole.DOCTOR, list(self.classes_by_doctor))
+        self.student_ids = roles[UserRole.STUDENT]
+        self.users = users
+        self.classes = classes
+        self.note = zipf_sampler(rng, list(range(1, notes + 1)), zipf_s)
+
+
+def scenarios(rng):
+    from benchmarks.synthetic_data import SYNTHETIC_PASSWORD, TOPICS
+
+    def student(actors):
+        return rng.choice(actors.students)
+
+    def as_student(path, **kwargs):
+        return lambda actors: (student(actors), "GET", path, kwargs)
+
+    def note_page(actors):
+        return student(actors), "GET", "/api/notes", {"params": {"limit": 20}}
+
+    def note_search(actors):
+        return student(actors), "GET", "/api/notes", {"params": {"limit": 20, "search": rng.choice(TOPICS)}}
+
+    def note(actors):
+        return student(actors), "GET", f"/api/notes/{actors.note(1)[0]}", {}
+
+    def like(actors):
+        return student(actors), "POST", f"/api/notes/{actors.note(1)[0]}/like", {"data": {"is_like": rng.choice((1, 1, 1, -1))}}
+
+    def upload_session(actors):
+        return student(actors), "POST", "/api/notes/upload-sessions", {
+            "json": {"file_name": f"load_{rng.randrange(10**9)}.pdf", "file_size": rng.randint(10**5, 10**7)}
+        }
+
+    def one_class(actors):
+        return student(actors), "GET", f"/api/classes/{rng.randint(1, actors.classes)}", {}
+
+    def class_announcements(actors):
+        return student(actors), "GET", f"/api/classes/{rng.randint(1, actors.classes)}/announcements", {"params": {"limit": 20}}
+
+    def enroll(actors):
+        doctor_id, token = rng.choice(actors.doctors)
+        body = {"class_id": rng.choice(actors.classes_by_doctor[doctor_id]), "student_id": 20_000_000 + rng.choice(actors.student_ids)}
+        return (doctor_id, token), "POST", "/api/students-classes", {"json": body}
+
+    def one_user(actors):
+        return student(actors), "GET", f"/api/users/{rng.randint(1, actors.users)}", {}
+
+    def one_project(actors):
+        return student(actors), "GET", f"/api/projects/{rng.randint(1, actors.projects)}", {}
+
+    def one_post(actors):
+        return student(actors), "GET", f"/api/posts/{rng.randint(1, actors.posts)}", {}
+
+    def login(actors):
+        user_id, _ = student(actors)
+        return None, "POST", "/api/auth/login", {"json": {"name": f"user{user_id}", "password": SYNTHETIC_PASSWORD}}
+
+    # (label, weight, build, expected non-2xx statuses)
+    return [
+        ("GET /api/notes", 25, note_page, ()),
+        ("GET /api/notes?search", 5, note_search, ()),
+        ("GET /api/notes/{note_id}", 10, note, ()),
+        ("POST /api/notes/{note_id}/like", 8, like, (409,)),
+        ("GET /api/notes/existing-file-keys", 2, as_student("/api/notes/existing-file-keys"), ()),
+        ("POST /api/notes/upload-sessions", 1, upload_session, ()),
+        ("GET /api/classes", 4, as_student("/api/classes", params={"limit": 20}), ()),
+        ("GET /api/classes/{class_id}", 4, one_class, ()),
+        ("GET /api/student-classes", 5, as_student("/api/student-classes"), ()),
+        ("GET /api/classes/{class_id}/announcements", 4, class_announcements, ()),
+        ("GET /api/my-announcements", 8, as_student("/api/my-announcements", params={"limit": 20}), ()),
+        ("POST /api/students-classes", 1, enroll, (409,)),
+        ("GET /api/users", 2, as_student("/api/users", params={"limit": 20}), ()),
+        ("GET /api/users/{user_id}", 3, one_user, ()),
+        ("GET /api/projects", 3, as_student("/api/projects", params={"limit": 20}), ()),
+        ("GET /api/projects/{project_id}", 2, one_project, ()),
+        ("GET /api/posts", 3, as_student("/api/posts", params={"limit": 20}), ()),
+        ("GET /api/posts/{post_id}", 2, one_post, ()),
+        ("POST /api/auth/login", 1, login, ()),
+    ]
+
+
+class RouteStats:
+    def __init__(self):
+        self.latencies = []
+        self.queries = 0
+        self.db_ms = 0.0
+        self.statuses = defaultdict(int)
+        self.errors = 0
+
+
+async def drive(base_url, actors, mix, concurrency, duration, rng):
+    import httpx
+
+    stats = defaultdict(RouteStats)
+    labels, weights = [entry[0] for entry in mix], [entry[1] for entry in mix]
+    by_label = {entry[0]: entry for entry in mix}
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def worker():
+            while time.perf_counter() < deadline:
+                label = rng.choices(labels, weights)[0]
+                _, _, build, expected = by_label[label]
+                actor, method, path, kwargs = build(actors)
+                headers = {"Authorization": f"Bearer {actor[1]}"} if actor else {}
+                route = stats[label]
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, headers=headers, **kwargs)
+                except httpx.HTTPError:
+                    route.errors += 1
+                    continue
+                route.latencies.append(time.perf_counter() - start)
+                route.statuses[response.status_code] += 1
+                if response.status_code >= 300 and response.status_code not in expected:
+                    route.errors += 1
+                route.queries += int(response.headers.get("x-db-queries", 0))
+                route.db_ms += float(response.headers.get("x-db-time", "0ms")[:-2] or 0)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return stats
+
+
+def report(stats, duration):
+    pct = lambda latencies, p: latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000
+    print(f"{'route':<44} {'count':>7} {'req/s':>8} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'queries':>8} {'db ms':>7} {'errors':>6}")
+    total = 0
+    for label, route in sorted(stats.items()):
+        if not route.latencies:
+            print(f"{label:<44} all {route.errors} requests failed")
+            continue
+        route.latencies.sort()
+        count = len(route.latencies)
+        total += count
+        print(f"{label:<44} {count:>7} {count / duration:>8.1f} {pct(route.latencies, 0.50):>8.1f} "
+              f"{pct(route.latencies, 0.95):>8.1f} {pct(route.latencies, 0.99):>8.1f} {route.queries / count:>8.1f} "
+              f"{route.db_ms / count:>7.1f} {route.errors:>6}")
+        unexpected = {status: n for status, n in route.statuses.items() if status >= 300}
+        if unexpected:
+            print(f"{'':<44} statuses {dict(sorted(unexpected.items()))}")
+    print(f"{'total':<44} {total:>7} {total / duration:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench_load.db")
+    parser.add_argument("--reuse", action="store_true", help="Keep the data already in --url")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--notes", type=int, default=100_000)
+    parser.add_argument("--likes", type=int, default=1_000_000)
+    parser.add_argument("--classes", type=int, default=500)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--actors", type=int, default=1000, help="Distinct students sending requests")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds measured, after as long a warm-up")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if not args.reuse:
+        from sqlalchemy import create_engine
+        from benchmarks.synthetic_data import generate
+        generate(create_engine(args.url), args.users, args.notes, args.likes, args.classes, zipf_s=args.zipf, seed=args.seed)
+
+    rng = random.Random(args.seed)
+    actors = Actors(args.url, args.users, args.notes, args.classes, args.zipf, args.actors, rng)
+    mix = scenarios(rng)
+
+    env = dict(
+        os.environ, DATABASE_URL=args.url, STORAGE_BACKEND="local", LOCAL_STORAGE_PATH="bench_storage",
+        DB_QUERY_STATS="true", DB_N_PLUS_ONE_THRESHOLD=str(10**9),
+        RATE_LIMIT_IP_PER_MINUTE=str(10**9), RATE_LIMIT_IP_BURST=str(10**9),
+        RATE_LIMIT_USER_PER_MINUTE=str(10**9), RATE_LIMIT_USER_BURST=str(10**9)
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--workers", str(args.workers),
+         "--log-level", "warning", "--backlog", str(max(2048, args.concurrency * 2))],
+        env=env
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        import httpx
+        for _ in range(100):
+            try:
+                httpx.get(base_url + "/", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.2)
+
+        print(f"\n{args.concurrency} concurrent clients, {args.workers} worker(s), {args.duration:.0f}s warm-up + {args.duration:.0f}s measured")
+        asyncio.run(drive(base_url, actors, mix, args.concurrency, args.duration, rng))
+        report(asyncio.run(drive(base_url, actors, mix, args.concurrency, args.duration, rng)), args.duration)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
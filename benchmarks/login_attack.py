@@ -0,0 +1,72 @@
+"""
+Replay a credential-stuffing run against /api/auth/login and report how
+much CPU the app burns, with and without the login rate limiter.
+
+    python -m benchmarks.login_attack --url sqlite:///bench_login.db --attempts 500
+    python -m benchmarks.login_attack --url sqlite:///bench_login.db --attempts 500 --no-limit
+
+Every attempt targets a real account with a wrong password from one client,
+which is the case that used to cost a full bcrypt verify each time. CPU is
+counted for the app process plus the bcrypt workers.
+
+The target database is recreated, so never point this at real data.
+"""
+import argparse
+import os
+import resource
+import time
+
+
+def cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench_login.db")
+    parser.add_argument("--attempts", type=int, default=500)
+    parser.add_argument("--no-limit", action="store_true", help="disable the rate limiter for comparison")
+    args = parser.parse_args()
+
+    # The app reads its engine and secret from the environment at import time
+    os.environ["DATABASE_URL"] = args.url
+    os.environ.setdefault("JWT_SECRET", "benchmark-secret-benchmark-secret")
+
+    from fastapi.testclient import TestClient
+    import controllers.auth as auth
+    from database import SessionLocal, engine
+    from main import app
+    from models.base import Base
+    from models.user import UserModel, UserRole
+    from utils.rate_limit import TokenBucketLimiter
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        victim = UserModel(name="victim", email="victim@example.com", role=UserRole.STUDENT)
+        victim.set_password("correct horse battery staple")
+        db.add(victim)
+        db.commit()
+
+    if args.no_limit:
+        auth.ip_limiter = auth.user_limiter = TokenBucketLimiter(rate=1e9, burst=10 ** 9)
+
+    statuses = {}
+    with TestClient(app) as client:
+        cpu_start, start = cpu_seconds(), time.perf_counter()
+        for attempt in range(args.attempts):
+            response = client.post("/api/auth/login", json={"name": "victim", "password": f"guess{attempt}"})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        elapsed = time.perf_counter() - start
+    # Leaving the client runs the lifespan shutdown, which reaps the bcrypt workers
+    cpu = cpu_seconds() - cpu_start
+
+    print(f"mode: {'no rate limit' if args.no_limit else 'rate limited'}")
+    print(f"{args.attempts} attempts in {elapsed:.2f}s, responses {dict(sorted(statuses.items()))}")
+    print(f"cpu {cpu:.2f}s total, {cpu / args.attempts * 1000:.2f}ms per attempt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Measure password verification throughput (the CPU-bound part of a login)
+for different bcrypt pool sizes.
+
+    python -m benchmarks.login_throughput --workers 1 2 4 8 --logins 200
+    python -m benchmarks.login_throughput --rounds 12 --workers 2 4
+
+The first line is the old behaviour, bcrypt run inline on the request
+threadpool. Every later line pushes the same number of concurrent logins
+through a PasswordHasher with that many processes. Without --rounds the cost
+is calibrated to --target-ms like the app does at startup.
+"""
+import argparse
+import asyncio
+import time
+from utils.password_hashing import PasswordHasher, calibrate_rounds, make_context
+
+
+async def threadpool_logins(context, hashed, logins):
+    await asyncio.gather(*(asyncio.to_thread(context.verify, "password", hashed) for _ in range(logins)))
+
+
+async def pooled_logins(hasher, hashed, logins):
+    results = await asyncio.gather(*(hasher.verify("password", hashed) for _ in range(logins)))
+    assert all(verified for verified, _ in results)
+
+
+def report(label, logins, elapsed):
+    print(f"{label:<22} {logins} logins in {elapsed:6.2f}s  {logins / elapsed:7.1f} logins/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--rounds", type=int, help="fixed bcrypt cost instead of calibrating")
+    parser.add_argument("--target-ms", type=int, default=250)
+    args = parser.parse_args()
+
+    rounds = args.rounds or calibrate_rounds(args.target_ms, 4)
+    context = make_context(rounds)
+    hashed = context.hash("password")
+    print(f"bcrypt cost {rounds}")
+
+    start = time.perf_counter()
+    asyncio.run(threadpool_logins(context, hashed, args.logins))
+    report("threadpool (inline)", args.logins, time.perf_counter() - start)
+
+    for workers in args.workers:
+        hasher = PasswordHasher(workers=workers, max_queue=args.logins, target_ms=args.target_ms, min_rounds=4, rounds=rounds)
+        hasher.start()
+        # Warm the processes so spawn time isn't counted
+        asyncio.run(pooled_logins(hasher, hashed, workers))
+        start = time.perf_counter()
+        asyncio.run(pooled_logins(hasher, hashed, args.logins))
+        report(f"process pool x{workers}", args.logins, time.perf_counter() - start)
+        hasher.stop()
+
+
+if __name__ == "__main__":
+    main()
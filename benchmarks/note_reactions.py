@@ -0,0 +1,110 @@
+"""
+Hammer one note with concurrent like/dislike clicks and check that the
+denormalized counters still match COUNT(*) over note_likes.
+
+    python -m benchmarks.note_reactions --url postgresql://localhost/engineerhub_bench --threads 32 --clicks 5000
+    python -m benchmarks.note_reactions --url postgresql://localhost/engineerhub_bench --threads 32 --clicks 5000 --write-behind
+
+Compare the two runs to see how much time clicks spend queued on the
+`notes` row lock with and without the write-behind counter buffer.
+
+The target database is recreated, so never point this at real data.
+"""
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.classes import ClassModel  # noqa: F401  (registers the remaining mappers)
+from models.note import NoteModel, NoteLikeModel
+from models.note_reactions import ReactionConflict, ReactionCounterBuffer, apply_reaction_counts, toggle_reaction
+from models.user import UserModel, UserRole
+
+
+def setup(engine, users):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(UserModel), [{
+            "name": f"bench{i}", "email": f"bench{i}@example.com", "password": "x", "role": UserRole.STUDENT
+        } for i in range(users)])
+        user_ids = conn.scalars(select(UserModel.id)).all()
+        note_id = conn.execute(insert(NoteModel).values(
+            title="Hot note", file_name="hot.pdf", file_key="notes/hot.pdf", file_type="pdf",
+            course_code="ENG101", year=2025, doctor_name="Dr Bench", uploader_id=user_ids[0],
+            likes_count=0, dislikes_count=0
+        )).inserted_primary_key[0]
+    return note_id, user_ids
+
+
+def click(SessionLocal, note_id, user_id, buffer=None):
+    with SessionLocal() as db:
+        start = time.perf_counter()
+        try:
+            _, likes_delta, dislikes_delta = toggle_reaction(db, note_id, user_id, random.choice([1, -1]))
+        except ReactionConflict:
+            db.rollback()
+            return None
+        if buffer:
+            db.commit()
+            buffer.add(db, note_id, likes_delta, dislikes_delta)
+        else:
+            apply_reaction_counts(db, note_id, likes_delta, dislikes_delta)
+            db.commit()
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench_reactions.db")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--clicks", type=int, default=2000)
+    parser.add_argument("--write-behind", action="store_true", help="buffer counter deltas instead of updating notes per click")
+    parser.add_argument("--flush-interval-ms", type=int, default=500)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url, pool_size=args.threads, max_overflow=0, connect_args=(
+        {"timeout": 30, "check_same_thread": False} if args.url.startswith("sqlite") else {}
+    ))
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+    note_id, user_ids = setup(engine, args.users)
+
+    buffer = None
+    if args.write_behind:
+        buffer = ReactionCounterBuffer(SessionLocal, interval=args.flush_interval_ms / 1000, max_pending=1000)
+        buffer.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        latencies = list(pool.map(lambda _: click(SessionLocal, note_id, random.choice(user_ids), buffer), range(args.clicks)))
+    elapsed = time.perf_counter() - start
+
+    if buffer:
+        buffer.stop()
+
+    done = sorted(latency for latency in latencies if latency is not None)
+    with SessionLocal() as db:
+        likes_count, dislikes_count = db.execute(
+            select(NoteModel.likes_count, NoteModel.dislikes_count).where(NoteModel.id == note_id)
+        ).one()
+        counted = dict(db.execute(
+            select(NoteLikeModel.is_like, func.count()).where(NoteLikeModel.note_id == note_id).group_by(NoteLikeModel.is_like)
+        ).all())
+
+    print(f"mode: {'write-behind' if buffer else 'per-click counter update'}, {args.threads} threads")
+    print(f"{len(done)} clicks in {elapsed:.2f}s ({len(done) / elapsed:.0f}/s), {args.clicks - len(done)} conflicts")
+    print(f"latency p50 {done[len(done) // 2] * 1000:.1f}ms  p99 {done[int(len(done) * 0.99)] * 1000:.1f}ms")
+    print(f"likes    counter={likes_count:<6} rows={counted.get(1, 0)}")
+    print(f"dislikes counter={dislikes_count:<6} rows={counted.get(-1, 0)}")
+
+    if (likes_count, dislikes_count) != (counted.get(1, 0), counted.get(-1, 0)):
+        raise SystemExit("FAIL: counters drifted from note_likes")
+    print("OK: counters match note_likes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Compare the old ILIKE search against the indexed full-text path.
+
+    python -m benchmarks.note_search --url sqlite:///bench_search.db --notes 1000000
+    python -m benchmarks.note_search --url postgresql://localhost/engineerhub_bench
+
+The target database is recreated, so never point this at real data.
+"""
+import argparse
+import random
+import time
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+from models.base import Base
+from models.classes import ClassModel  # noqa: F401  (registers the remaining mappers)
+from models.note import NoteModel
+from models.note_search import apply_note_search
+from models.user import UserModel, UserRole
+
+WORDS = (
+    "thermodynamics entropy circuits signals fluid mechanics statics dynamics calculus "
+    "linear algebra differential equations materials structures control systems digital "
+    "logic embedded microprocessors heat transfer power electronics machine design "
+    "surveying concrete steel soil hydraulics networks probability numerical methods"
+).split()
+DOCTORS = [f"Dr {name}" for name in ("Smith", "Haddad", "Nguyen", "Garcia", "Khan", "Ali", "Chen", "Ivanova")]
+TERMS = ["thermodynamics", "heat transfer", "Haddad", "microprocessors", "entropy circuits", "zzzz"]
+
+
+def phrase(n):
+    return " ".join(random.choices(WORDS, k=n))
+
+
+def load(engine, notes, batch_size=10_000):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        uploader_id = conn.execute(insert(UserModel).values(
+            name="bench", email="bench@example.com", password="x", role=UserRole.STUDENT
+        )).inserted_primary_key[0]
+        for start in range(0, notes, batch_size):
+            conn.execute(insert(NoteModel), [{
+                "title": phrase(4).title(),
+                "file_name": f"note_{i}.pdf",
+                "file_key": f"notes/{uploader_id}/note_{i}.pdf",
+                "file_type": "pdf",
+                "course_code": f"ENG{random.randint(100, 499)}",
+                "year": random.randint(2015, 2025),
+                "doctor_name": random.choice(DOCTORS),
+                "description": phrase(random.randint(10, 40)),
+                "uploader_id": uploader_id,
+            } for i in range(start, min(start + batch_size, notes))])
+            print(f"  loaded {min(start + batch_size, notes):,} notes", end="\r")
+    print()
+
+
+def ilike_query(session, term, limit):
+    return session.query(NoteModel).filter(
+        (NoteModel.title.ilike(f"%{term}%")) |
+        (NoteModel.description.ilike(f"%{term}%")) |
+        (NoteModel.doctor_name.ilike(f"%{term}%"))
+    ).order_by(NoteModel.created_at.desc(), NoteModel.id.desc()).limit(limit)
+
+
+def fts_query(session, term, limit):
+    query, rank = apply_note_search(session.query(NoteModel), term, session.get_bind().dialect.name)
+    order = [rank.desc()] if rank is not None else []
+    return query.order_by(*order, NoteModel.id.desc()).limit(limit)
+
+
+def timed(build, session, term, limit, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = build(session, term, limit).all()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench_search.db")
+    parser.add_argument("--notes", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-load", action="store_true", help="reuse the data from a previous run")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    if not args.skip_load:
+        print(f"Loading {args.notes:,} notes into {engine.url.render_as_string(hide_password=True)}...")
+        load(engine, args.notes)
+
+    with Session(engine) as session:
+        total = session.scalar(select(func.count(NoteModel.id)))
+        print(f"\n{total:,} notes, best of {args.repeat}, limit {args.limit}\n")
+        print(f"{'term':<20}{'ILIKE ms':>12}{'rows':>7}{'FTS ms':>12}{'rows':>7}{'speedup':>10}")
+        for term in TERMS:
+            ilike_ms, ilike_rows = timed(ilike_query, session, term, args.limit, args.repeat)
+            fts_ms, fts_rows = timed(fts_query, session, term, args.limit, args.repeat)
+            print(f"{term:<20}{ilike_ms:>12.2f}{ilike_rows:>7}{fts_ms:>12.2f}{fts_rows:>7}{ilike_ms / fts_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
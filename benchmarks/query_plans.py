@@ -0,0 +1,153 @@
+"""
+Show the query plan and timing of each controller query before and after
+migration 0005 (hot-path indexes).
+
+    python -m benchmarks.query_plans --url sqlite:///bench_plans.db
+    python -m benchmarks.query_plans --url postgresql://localhost/engineerhub_bench --notes 500000
+
+The schema is built from the models, then the 0005 indexes are dropped to
+recreate the "before" state. The unique (note_id, user_id) index from 0004
+stays, since the like toggle depends on it. On Postgres the plans come
+from EXPLAIN ANALYZE, elsewhere from EXPLAIN QUERY PLAN.
+
+The target database is recreated, so never point this at real data.
+"""
+import argparse
+import importlib
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert, select, text
+from models.announcement import AnnouncementModel
+from models.base import Base
+from models.classes import ClassModel
+from models.graduate_project import GraduateProjectModel
+from models.note import NoteModel, NoteLikeModel
+from models.post import PostModel
+from models.student_class import StudentClassModel
+from models.upload_session import UploadSessionModel  # noqa: F401
+from models.user import UserModel, UserRole
+from migrations.ops import drop_index
+
+hot_path = importlib.import_module("migrations.versions.0005_hot_path_indexes")
+
+
+def load(engine, args):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    now = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(UserModel), [{
+            "name": f"user{i}", "email": f"user{i}@example.com", "password": "x",
+            "role": UserRole.DOCTOR if i % 20 == 0 else UserRole.STUDENT
+        } for i in range(args.users)])
+        users = conn.scalars(select(UserModel.id)).all()
+        doctors = users[::20]
+        conn.execute(insert(NoteModel), [{
+            "title": f"Note {i}", "file_name": f"n{i}.pdf", "file_key": f"notes/{i}.pdf", "file_type": "pdf",
+            "course_code": f"ENG{i % 400}", "year": 2025, "doctor_name": "Dr Bench", "uploader_id": random.choice(users),
+            "likes_count": 0, "dislikes_count": 0, "created_at": now + timedelta(seconds=i)
+        } for i in range(args.notes)])
+        pairs = {(random.randint(1, args.notes), random.choice(users)) for _ in range(args.likes)}
+        conn.execute(insert(NoteLikeModel), [{"note_id": n, "user_id": u, "is_like": 1} for n, u in pairs])
+        conn.execute(insert(ClassModel), [{"name": f"Class {i}", "doctor_id": random.choice(doctors)} for i in range(args.classes)])
+        conn.execute(insert(StudentClassModel), [{
+            "student_id": random.choice(users), "class_id": random.randint(1, args.classes)
+        } for _ in range(args.classes * 40)])
+        conn.execute(insert(AnnouncementModel), [{
+            "title": f"Announcement {i}", "content": "x", "class_id": random.randint(1, args.classes),
+            "event_date": now + timedelta(hours=i)
+        } for i in range(args.classes * 40)])
+        conn.execute(insert(PostModel), [{
+            "title": f"Post {i}", "description": "x", "institute_id": random.choice(users)
+        } for i in range(args.notes // 10)])
+        conn.execute(insert(GraduateProjectModel), [{
+            "title": f"Project {i}", "summary": "x", "major": "ENG", "graduation_year": 2025,
+            "contact_email": "p@example.com", "user_id": random.choice(users)
+        } for i in range(args.users)])
+    return users
+
+
+def controller_queries(user, doctor):
+    """The WHERE/ORDER BY shapes the controllers run, one per route"""
+    my_classes = select(StudentClassModel.class_id).where(StudentClassModel.student_id == user)
+    return {
+        "GET /notes": select(NoteModel, NoteLikeModel.is_like).outerjoin(
+            NoteLikeModel, (NoteLikeModel.note_id == NoteModel.id) & (NoteLikeModel.user_id == user)
+        ).order_by(NoteModel.created_at.desc(), NoteModel.id.desc()).limit(51),
+        "GET /notes/existing-file-keys": select(NoteModel.file_key).where(NoteModel.uploader_id == user),
+        "POST /notes/{id}/like": select(NoteLikeModel.is_like).where(NoteLikeModel.note_id == 1, NoteLikeModel.user_id == user),
+        "GET /classes/{id}/announcements": select(AnnouncementModel).where(AnnouncementModel.class_id == 1).order_by(
+            AnnouncementModel.event_date.desc(), AnnouncementModel.id.desc()).limit(51),
+        "GET /my-announcements": select(AnnouncementModel).where(AnnouncementModel.class_id.in_(my_classes)).order_by(
+            AnnouncementModel.event_date.desc(), AnnouncementModel.id.desc()).limit(51),
+        "POST /students-classes": select(StudentClassModel.id).where(
+            StudentClassModel.student_id == user, StudentClassModel.class_id == 1),
+        "doctor's classes (user delete)": select(ClassModel.id).where(ClassModel.doctor_id == doctor),
+        "institute's posts (user delete)": select(PostModel.id).where(PostModel.institute_id == user),
+        "user's projects (user delete)": select(GraduateProjectModel.id).where(GraduateProjectModel.user_id == user),
+    }
+
+
+def explain(conn, statement):
+    sql = str(statement.compile(conn, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "postgresql":
+        return [row[0] for row in conn.execute(text(f"EXPLAIN ANALYZE {sql}"))]
+    return [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def timed(conn, statement, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(statement).all()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(engine, queries, repeat):
+    results = {}
+    with engine.connect() as conn:
+        for label, statement in queries.items():
+            results[label] = (explain(conn, statement), timed(conn, statement, repeat))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench_plans.db")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--notes", type=int, default=100_000)
+    parser.add_argument("--likes", type=int, default=200_000)
+    parser.add_argument("--classes", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    users = load(engine, args)
+    queries = controller_queries(user=users[1], doctor=users[0])
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name, _, _ in hot_path.HOT_PATH_INDEXES:
+            drop_index(conn, name)
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE"))
+    before = run(engine, queries, args.repeat)
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        hot_path.upgrade(conn)
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE"))
+    after = run(engine, queries, args.repeat)
+
+    for label in queries:
+        (plan_before, ms_before), (plan_after, ms_after) = before[label], after[label]
+        print(f"\n== {label}: {ms_before:.2f}ms -> {ms_after:.2f}ms")
+        print("  before:")
+        for line in plan_before:
+            print(f"    {line}")
+        print("  after:")
+        for line in plan_after:
+            print(f"    {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Time the per-row cost of turning note rows into the JSON body of GET
+/notes: the old path (NoteSchema.from_orm(note).dict(), patched, then
+validated again by FastAPI's response model) against serialize_notes,
+which builds each NoteSchema once from the row's loaded state.
+
+    python -m benchmarks.serialization --rows 50 --pages 2000
+
+Rows are queried from an in-memory SQLite database, so they are loaded the
+way a real request loads them. Both paths finish with the route's own
+response field (validate, then dump), exactly as the installed FastAPI
+runs it, and must produce the same bytes.
+"""
+import argparse
+import os
+import time
+import warnings
+
+# The notes controller imports the app's engine and settings at import time
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "benchmark-secret-benchmark-secret")
+
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from controllers.notes import router, query_notes_with_like_status, note_extras, serialize_notes
+from models import announcement, classes, graduate_project, post, student_class, upload_session  # noqa: F401  (relationships resolve by name)
+from models.base import Base
+from models.note import NoteModel
+from models.user import UserModel, UserRole
+from serializers.note_serializer import NoteSchema
+
+
+def load_rows(count):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    now = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(UserModel), [{"name": "bench", "email": "bench@example.com", "password": "x", "role": UserRole.STUDENT}])
+        conn.execute(insert(NoteModel), [{
+            "title": f"Note {i}", "file_name": f"n{i}.pdf", "file_key": f"notes/1/{i}.pdf", "file_type": "pdf",
+            "file_size": 1_000_000 + i, "course_code": f"ENG{i % 400}", "course_name": "Circuits", "year": 2025,
+            "doctor_name": "Dr Bench", "description": "Lecture notes on circuits and signals.", "uploader_id": 1,
+            "likes_count": i % 7, "dislikes_count": i % 3, "created_at": now + timedelta(seconds=i), "updated_at": now
+        } for i in range(count)])
+    db = Session(engine)
+    return query_notes_with_like_status(db, 1).order_by(NoteModel.id).all()
+
+
+def legacy_serialize_notes(rows):
+    """What GET /notes did before: one dict per row, validated again by the response model"""
+    items = []
+    for note, user_like_status in rows:
+        note_dict = NoteSchema.from_orm(note).dict()
+        note_dict.update(note_extras(note, user_like_status))
+        items.append(note_dict)
+    return items
+
+
+def render(route, value) -> bytes:
+    """The response body, the way the installed FastAPI produces it"""
+    if hasattr(route.response_field, "serialize_json"):
+        # Newer releases dump response models straight to JSON bytes
+        return route.response_field.serialize_json(value)
+    # Older ones dump to Python objects, then the route's response class renders them
+    response_class = getattr(route.response_class, "value", route.response_class)  # Unwrap DefaultPlaceholder
+    return response_class(route.response_field.serialize(value)).body
+
+
+def run(label, serialize, rows, route, pages):
+    build = respond = 0.0
+    for _ in range(pages):
+        start = time.perf_counter()
+        page = {"items": serialize(rows), "next_cursor": None}
+        built = time.perf_counter()
+        value, errors = route.response_field.validate(page, {}, loc=("response",))
+        assert not errors, errors
+        body = render(route, value)
+        respond += time.perf_counter() - built
+        build += built - start
+    per_row = lambda seconds: seconds / (pages * len(rows)) * 1e6
+    print(f"{label:<16} build {per_row(build):6.2f}us/row  response model {per_row(respond):6.2f}us/row  "
+          f"total {per_row(build + respond):6.2f}us/row")
+    return body, per_row(build + respond)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50, help="Notes per page")
+    parser.add_argument("--pages", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = load_rows(args.rows)
+    route = next(route for route in router.routes if route.path == "/notes" and "GET" in route.methods)
+    # from_orm() and dict() warn on every call under Pydantic v2
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    before, legacy = run("from_orm + dict", legacy_serialize_notes, rows, route, args.pages)
+    after, fast = run("serialize_notes", lambda rows: serialize_notes(rows), rows, route, args.pages)
+    assert before == after, "both paths must produce the same body"
+    print(f"saving {legacy - fast:.2f}us/row ({legacy / fast:.1f}x), {(legacy - fast) * args.rows / 1000:.2f}ms per {args.rows}-note page")
+
+
+if __name__ == "__main__":
+    main()
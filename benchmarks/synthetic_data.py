@@ -0,0 +1,229 @@
+"""
+Fill a database with a large, skewed synthetic dataset.
+
+    python -m benchmarks.synthetic_data --url postgresql://localhost/engineerhub_bench --users 50000 --notes 500000 --likes 5000000
+    python -m benchmarks.synthetic_data --url sqlite:///bench_load.db --users 5000 --notes 50000 --likes 300000
+
+The data is deliberately uneven, like real usage:
+- note popularity is Zipfian, so a few notes collect most of the reactions
+- a few students upload most of the notes
+- a few "hot" classes have most of the enrollments and announcements
+
+Rows go in with COPY on Postgres and multi-row INSERTs elsewhere, never
+through the ORM. Every user's password is SYNTHETIC_PASSWORD. The schema
+is rebuilt through the migrations (like seed.py), so never point this at
+real data.
+"""
+import argparse
+import csv
+import io
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+from config.environment import get_settings
+from migrations.runner import migrate, schema_migrations
+from models.announcement import AnnouncementModel
+from models.base import Base
+from models.classes import ClassModel
+from models.graduate_project import GraduateProjectModel
+from models.note import NoteModel, NoteLikeModel
+from models.post import PostModel
+from models.student_class import StudentClassModel
+from models.table_version import TableVersionModel  # noqa: F401  (recreated with the rest, so ETags start over)
+from models.upload_session import UploadSessionModel  # noqa: F401
+from models.user import UserModel, UserRole
+from utils.password_hashing import make_context
+
+SYNTHETIC_PASSWORD = "synthetic-password"
+
+# Share of users in each role; the rest are students
+ROLE_SHARES = ((UserRole.DOCTOR, 0.02), (UserRole.GRADUATE, 0.08), (UserRole.INSTITUTION, 0.01))
+
+MAJORS = ["Electrical Engineering", "Mechanical Engineering", "Civil Engineering", "Chemical Engineering",
+          "Computer Engineering", "Architecture", "Industrial Engineering"]
+TOPICS = ["circuits", "thermodynamics", "statics", "signals", "control systems", "fluid mechanics",
+          "digital logic", "materials", "heat transfer", "structures", "power systems", "embedded systems"]
+
+BATCH_SIZE = 10_000
+
+
+def zipf_cum_weights(n: int, s: float) -> list[float]:
+    """Cumulative weights for random.choices(): rank k is drawn proportionally to 1/k^s"""
+    return list(itertools.accumulate(1 / rank ** s for rank in range(1, n + 1)))
+
+
+def zipf_sampler(rng: random.Random, ids: list[int], s: float):
+    """draw(k) -> k ids, Zipf-skewed, with popularity shuffled so it doesn't follow id order"""
+    ranked = ids[:]
+    rng.shuffle(ranked)
+    cum_weights = zipf_cum_weights(len(ranked), s)
+    return lambda k: rng.choices(ranked, cum_weights=cum_weights, k=k)
+
+
+def assign_roles(users: int) -> dict[UserRole, list[int]]:
+    """User ids per role. Roles go by id range, so benchmarks can rebuild this without a query"""
+    roles = {}
+    first_id = 1
+    for role, share in ROLE_SHARES:
+        count = max(1, int(users * share))
+        roles[role] = list(range(first_id, first_id + count))
+        first_id += count
+    roles[UserRole.STUDENT] = list(range(first_id, users + 1))
+    return roles
+
+
+def bulk_load(conn, table, rows) -> int:
+    """Load `rows` (dicts with the same keys) in batches: COPY on Postgres, multi-row INSERT elsewhere"""
+    count = 0
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, BATCH_SIZE)):
+        if conn.dialect.name == "postgresql":
+            columns = list(batch[0])
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in batch:
+                writer.writerow([value.name if isinstance(value, UserRole) else value for value in row.values()])
+            buffer.seek(0)
+            cursor = conn.connection.cursor()
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        else:
+            conn.execute(table.insert(), batch)
+        count += len(batch)
+    return count
+
+
+def reset_sequences(conn, tables) -> None:
+    """Rows were loaded with explicit ids; move each Postgres sequence past them"""
+    if conn.dialect.name != "postgresql":
+        return
+    for table in tables:
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), coalesce(max(id), 1)) FROM {table.name}"
+        ))
+
+
+def generate(engine, users: int, notes: int, likes: int, classes: int,
+             enrollments_per_student: int = 5, announcements_per_class: int = 10,
+             zipf_s: float = 1.1, seed: int = 42, log=print) -> dict:
+    """Recreate the schema and load the dataset. Returns the row counts per table."""
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    password = make_context(get_settings().PASSWORD_HASH_MIN_ROUNDS).hash(SYNTHETIC_PASSWORD)
+
+    Base.metadata.drop_all(bind=engine)
+    schema_migrations.drop(bind=engine, checkfirst=True)
+    migrate(engine, log=lambda message: None)
+
+    roles = assign_roles(users)
+    role_of = {user_id: role for role, ids in roles.items() for user_id in ids}
+    students, doctors = roles[UserRole.STUDENT], roles[UserRole.DOCTOR]
+    uploaders = students + roles[UserRole.GRADUATE]
+
+    counts = {}
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous = OFF")
+
+        def load(model, rows):
+            counts[model.__tablename__] = bulk_load(conn, model.__table__, rows)
+            log(f"✓ {counts[model.__tablename__]:>10,} {model.__tablename__} ({time.perf_counter() - started:.1f}s)")
+
+        load(UserModel, ({
+            "id": user_id, "name": f"user{user_id}", "email": f"user{user_id}@synthetic.uob.edu.bh",
+            "password": password, "role": role_of[user_id], "major": rng.choice(MAJORS),
+            "uni_id": 20_000_000 + user_id, "created_at": now, "updated_at": now
+        } for user_id in range(1, users + 1)))
+
+        class_ids = list(range(1, classes + 1))
+        load(ClassModel, ({
+            "id": class_id, "name": f"{rng.choice(TOPICS).title()} {100 + class_id % 400}",
+            "doctor_id": rng.choice(doctors), "created_at": now, "updated_at": now
+        } for class_id in class_ids))
+
+        # Hot classes: enrollments and announcements both follow class popularity
+        hot_class = zipf_sampler(rng, class_ids, zipf_s)
+        enrollments = {(student, class_id) for student in students
+                       for class_id in hot_class(rng.randint(1, 2 * enrollments_per_student - 1))}
+        load(StudentClassModel, ({
+            "id": row_id, "student_id": student, "class_id": class_id, "created_at": now, "updated_at": now
+        } for row_id, (student, class_id) in enumerate(sorted(enrollments), 1)))
+        load(AnnouncementModel, ({
+            "id": row_id, "title": f"Announcement {row_id}", "content": f"Details about {rng.choice(TOPICS)}.",
+            "class_id": class_id, "event_date": now + timedelta(hours=rng.randint(-2000, 2000)),
+            "created_at": now, "updated_at": now
+        } for row_id, class_id in enumerate(hot_class(classes * announcements_per_class), 1)))
+
+        # Reactions are drawn first so each note's counters match its rows
+        note_ids = list(range(1, notes + 1))
+        popular_note = zipf_sampler(rng, note_ids, zipf_s)
+        reactions = {}
+        while len(reactions) < min(likes, notes * users // 2):
+            for note_id in popular_note(min(BATCH_SIZE, likes - len(reactions))):
+                reactions[note_id, rng.randint(1, users)] = 1 if rng.random() < 0.85 else -1
+        likes_count, dislikes_count = [0] * (notes + 1), [0] * (notes + 1)
+        for (note_id, _), is_like in reactions.items():
+            if is_like == 1:
+                likes_count[note_id] += 1
+            else:
+                dislikes_count[note_id] += 1
+
+        prolific_uploader = zipf_sampler(rng, uploaders, zipf_s)
+        oldest = now - timedelta(days=730)
+        load(NoteModel, ({
+            "id": note_id, "title": f"{rng.choice(TOPICS).title()} notes {note_id}", "file_name": f"notes_{note_id}.pdf",
+            "file_key": f"synthetic/{note_id}.pdf", "file_type": "pdf", "file_size": rng.randint(50_000, 20_000_000),
+            "course_code": f"ENG{100 + note_id % 400}", "course_name": rng.choice(TOPICS).title(),
+            "year": rng.randint(2015, now.year), "doctor_name": f"Dr. user{rng.choice(doctors)}",
+            "description": f"Lecture notes on {rng.choice(TOPICS)} and {rng.choice(TOPICS)}.",
+            "uploader_id": uploader, "likes_count": likes_count[note_id], "dislikes_count": dislikes_count[note_id],
+            # Ids follow upload time, like a real table
+            "created_at": oldest + timedelta(seconds=note_id * 730 * 86400 // notes), "updated_at": now
+        } for note_id, uploader in zip(note_ids, prolific_uploader(notes))))
+        load(NoteLikeModel, ({
+            "id": row_id, "note_id": note_id, "user_id": user_id, "is_like": is_like, "created_at": now, "updated_at": now
+        } for row_id, ((note_id, user_id), is_like) in enumerate(reactions.items(), 1)))
+
+        load(PostModel, ({
+            "id": row_id, "title": f"Opening {row_id}", "description": f"Internship in {rng.choice(TOPICS)}.",
+            "institute_id": rng.choice(roles[UserRole.INSTITUTION]), "created_at": now, "updated_at": now
+        } for row_id in range(1, max(1, users // 20) + 1)))
+        load(GraduateProjectModel, ({
+            "id": row_id, "title": f"{rng.choice(TOPICS).title()} capstone", "summary": "A graduation project.",
+            "major": rng.choice(MAJORS), "graduation_year": rng.randint(2015, now.year),
+            "contact_email": f"user{user_id}@synthetic.uob.edu.bh", "user_id": user_id,
+            "created_at": now, "updated_at": now
+        } for row_id, user_id in enumerate(roles[UserRole.GRADUATE], 1)))
+
+        reset_sequences(conn, [model.__table__ for model in (
+            UserModel, ClassModel, StudentClassModel, AnnouncementModel, NoteModel, NoteLikeModel, PostModel, GraduateProjectModel
+        )])
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench_load.db")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--notes", type=int, default=100_000)
+    parser.add_argument("--likes", type=int, default=1_000_000)
+    parser.add_argument("--classes", type=int, default=500)
+    parser.add_argument("--enrollments-per-student", type=int, default=5)
+    parser.add_argument("--announcements-per-class", type=int, default=10)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent; higher is more skewed")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    generate(engine, args.users, args.notes, args.likes, args.classes, args.enrollments_per_student,
+             args.announcements_per_class, args.zipf, args.seed)
+    print("\n🎉 Synthetic data loaded")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,11 +14,100 @@ class Settings(BaseSettings):
     DATABASE_URL: str = os.getenv('DATABASE_URL', '')
     JWT_SECRET: str = os.getenv('JWT_SECRET', '')
     
+    # Database connection pool (see database.py)
+    DB_POOL_SIZE: int = int(os.getenv('DB_POOL_SIZE', '10'))
+    DB_MAX_OVERFLOW: int = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+    DB_POOL_TIMEOUT: int = int(os.getenv('DB_POOL_TIMEOUT', '30'))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = int(os.getenv('DB_POOL_RECYCLE', '1800'))  # seconds, -1 to never recycle
+    DB_POOL_PRE_PING: bool = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    DB_POOL_MIN_CONNECTIONS: int = int(os.getenv('DB_POOL_MIN_CONNECTIONS', '2'))  # opened at startup
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '30000'))  # Postgres only, 0 disables
+    
+    # Read replicas for GET traffic (comma-separated URLs, empty for none)
+    DATABASE_REPLICA_URLS: str = os.getenv('DATABASE_REPLICA_URLS', '')
+    REPLICA_BALANCING: str = os.getenv('REPLICA_BALANCING', 'round_robin')  # or least_connections
+    REPLICA_STICKY_SECONDS: int = int(os.getenv('REPLICA_STICKY_SECONDS', '5'))  # reads stay on the primary after a write
+    REPLICA_MAX_LAG_SECONDS: int = int(os.getenv('REPLICA_MAX_LAG_SECONDS', '10'))
+    REPLICA_HEALTH_INTERVAL_SECONDS: int = int(os.getenv('REPLICA_HEALTH_INTERVAL_SECONDS', '5'))
+    
     # Azure Blob Storage
     AZURE_STORAGE_ACCOUNT_NAME: str = os.getenv('AZURE_STORAGE_ACCOUNT_NAME', 'engineerhubstorage')
     AZURE_STORAGE_ACCOUNT_KEY: str = os.getenv('AZURE_STORAGE_ACCOUNT_KEY', '')
     AZURE_STORAGE_CONTAINER_NAME: str = os.getenv('AZURE_STORAGE_CONTAINER_NAME', 'notes')
     AZURE_STORAGE_SAS_TOKEN: str = os.getenv('AZURE_STORAGE_SAS_TOKEN', '')
+    # Azurite: AZURE_STORAGE_CONNECTION_STRING=UseDevelopmentStorage=true
+    AZURE_STORAGE_CONNECTION_STRING: str = os.getenv('AZURE_STORAGE_CONNECTION_STRING', '')
+    AZURE_STORAGE_ENDPOINT: str = os.getenv('AZURE_STORAGE_ENDPOINT', '')
+    AZURE_STORAGE_POOL_SIZE: int = int(os.getenv('AZURE_STORAGE_POOL_SIZE', '32'))
+    AZURE_STORAGE_CONNECT_TIMEOUT: int = int(os.getenv('AZURE_STORAGE_CONNECT_TIMEOUT', '5'))  # seconds
+    AZURE_STORAGE_READ_TIMEOUT: int = int(os.getenv('AZURE_STORAGE_READ_TIMEOUT', '30'))  # seconds
+    
+    # Blob storage backend: "azure", or "local" to keep files on disk (offline dev and benchmarks)
+    STORAGE_BACKEND: str = os.getenv('STORAGE_BACKEND', 'azure')
+    LOCAL_STORAGE_PATH: str = os.getenv('LOCAL_STORAGE_PATH', 'local_storage')
+    
+    # Short-lived SAS URLs for direct downloads/uploads, cached per worker
+    SIGNED_URL_TTL_SECONDS: int = int(os.getenv('SIGNED_URL_TTL_SECONDS', '900'))
+    SIGNED_URL_CACHE_SIZE: int = int(os.getenv('SIGNED_URL_CACHE_SIZE', '10000'))
+    
+    # Note uploads streamed through the API (POST /notes/upload and upload sessions)
+    MAX_UPLOAD_SIZE_MB: int = int(os.getenv('MAX_UPLOAD_SIZE_MB', '200'))
+    UPLOAD_BLOCK_SIZE_MB: int = int(os.getenv('UPLOAD_BLOCK_SIZE_MB', '4'))
+    UPLOAD_CONCURRENCY: int = int(os.getenv('UPLOAD_CONCURRENCY', '4'))  # Blocks in flight per upload
+    
+    # Per-request SQL counters: X-DB-Queries / X-DB-Time headers and N+1 warnings (see utils/query_stats.py)
+    DB_QUERY_STATS: bool = os.getenv('DB_QUERY_STATS', 'false').lower() == 'true'
+    DB_N_PLUS_ONE_THRESHOLD: int = int(os.getenv('DB_N_PLUS_ONE_THRESHOLD', '5'))  # Identical statements per request
+    
+    # Prometheus metrics at /metrics (see utils/metrics.py). With several uvicorn
+    # workers, point METRICS_DIR at a directory they share and clear it on deploy
+    METRICS_ENABLED: bool = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_DIR: str = os.getenv('METRICS_DIR', '')
+    METRICS_FLUSH_SECONDS: int = int(os.getenv('METRICS_FLUSH_SECONDS', '5'))
+    
+    # Opt-in request profiling (see utils/profiling.py): requests signed with
+    # PROFILER_SECRET, or a sampled fraction, are written to PROFILER_DIR
+    PROFILER_SECRET: str = os.getenv('PROFILER_SECRET', '')
+    PROFILER_SAMPLE_RATE: float = float(os.getenv('PROFILER_SAMPLE_RATE', '0'))  # 0.001 profiles 1 request in 1000
+    PROFILER_DIR: str = os.getenv('PROFILER_DIR', 'profiles')
+    PROFILER_MAX_FILES: int = int(os.getenv('PROFILER_MAX_FILES', '200'))
+    PROFILER_INTERVAL_MS: int = int(os.getenv('PROFILER_INTERVAL_MS', '5'))
+    
+    # Conditional GETs (see dependencies/conditional_get.py): how long browsers and
+    # proxies may reuse public responses (projects, classes) before revalidating
+    PUBLIC_CACHE_MAX_AGE_SECONDS: int = int(os.getenv('PUBLIC_CACHE_MAX_AGE_SECONDS', '0'))
+    
+    # Encoded responses of the public GET routes (see utils/response_cache.py), checked
+    # against the table versions on every hit. Set RESPONSE_CACHE_REDIS_URL to share them across workers
+    RESPONSE_CACHE_ENABLED: bool = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))  # Per worker
+    RESPONSE_CACHE_MAX_ENTRY_BYTES: int = int(os.getenv('RESPONSE_CACHE_MAX_ENTRY_BYTES', str(1024 * 1024)))
+    RESPONSE_CACHE_STALE_SECONDS: int = int(os.getenv('RESPONSE_CACHE_STALE_SECONDS', '10'))  # 0 never serves stale pages
+    RESPONSE_CACHE_REDIS_URL: str = os.getenv('RESPONSE_CACHE_REDIS_URL', '')
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '3600'))  # Redis entries only
+    
+    # Authenticated principals cached per worker (see dependencies/get_current_user.py)
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv('PRINCIPAL_CACHE_SIZE', '10000'))
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv('PRINCIPAL_CACHE_TTL_SECONDS', '60'))
+    TOKEN_CACHE_SIZE: int = int(os.getenv('TOKEN_CACHE_SIZE', '10000'))  # Verified JWTs memoized until they expire
+    
+    # Password hashing runs in its own process pool (see utils/password_hashing.py)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    PASSWORD_HASH_QUEUE: int = int(os.getenv('PASSWORD_HASH_QUEUE', '32'))  # Waiting logins before answering 503
+    PASSWORD_HASH_TARGET_MS: int = int(os.getenv('PASSWORD_HASH_TARGET_MS', '250'))  # bcrypt cost is calibrated to this
+    PASSWORD_HASH_MIN_ROUNDS: int = int(os.getenv('PASSWORD_HASH_MIN_ROUNDS', '12'))  # Calibration only ever raises the cost from here
+    
+    # Login/register throttling: token buckets per client IP and per username
+    RATE_LIMIT_IP_PER_MINUTE: int = int(os.getenv('RATE_LIMIT_IP_PER_MINUTE', '30'))
+    RATE_LIMIT_IP_BURST: int = int(os.getenv('RATE_LIMIT_IP_BURST', '10'))
+    RATE_LIMIT_USER_PER_MINUTE: int = int(os.getenv('RATE_LIMIT_USER_PER_MINUTE', '6'))
+    RATE_LIMIT_USER_BURST: int = int(os.getenv('RATE_LIMIT_USER_BURST', '5'))
+    RATE_LIMIT_REDIS_URL: str = os.getenv('RATE_LIMIT_REDIS_URL', '')  # Share buckets across workers
+    
+    # Note reactions: buffer counter deltas per worker and flush them in batches
+    REACTION_WRITE_BEHIND: bool = os.getenv('REACTION_WRITE_BEHIND', 'false').lower() == 'true'
+    REACTION_FLUSH_INTERVAL_MS: int = int(os.getenv('REACTION_FLUSH_INTERVAL_MS', '500'))
+    REACTION_FLUSH_MAX_PENDING: int = int(os.getenv('REACTION_FLUSH_MAX_PENDING', '1000'))
     
     
     model_config = ConfigDict(
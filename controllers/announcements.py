@@ -1,19 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.announcement import AnnouncementModel
 from models.classes import ClassModel
-from models.user import UserModel, UserRole
+from models.student_class import StudentClassModel
+from models.user import UserRole
 from serializers.announcement_serializer import (AnnouncementSchema, CreateAnnouncementSchema, UpdateAnnouncementSchema)
-from database import get_db
-from dependencies.get_current_user import get_current_user
+from serializers.page import Page
+from database import get_async_db, get_db
+from dependencies.get_read_db import get_read_db
+from dependencies.get_current_user import get_current_principal, Principal
+from dependencies.pagination import PageParams, get_page_params, paginate, paginate_async
+from dependencies.conditional_get import async_conditional_get, conditional_get
 
 router = APIRouter()
 
 # GET ALL ANNOUNCEMENTS FOR A CLASS ================================================
-@router.get("/classes/{class_id}/announcements", response_model=list[AnnouncementSchema])
+@router.get("/classes/{class_id}/announcements", response_model=Page[AnnouncementSchema],
+            dependencies=[Depends(conditional_get("announcements", "classes", public=True))])
 def get_class_announcements(
     class_id: int,
-    db: Session = Depends(get_db)
+    page: PageParams = Depends(get_page_params),
+    db: Session = Depends(get_read_db)
 ):
     cls = db.query(ClassModel).filter(ClassModel.id == class_id).first()
     if not cls:
@@ -21,32 +30,36 @@ def get_class_announcements(
     
     announcements = db.query(AnnouncementModel).filter(
         AnnouncementModel.class_id == class_id
-    ).order_by(AnnouncementModel.event_date.desc()).all()
+    )
     
-    return announcements
+    return paginate(announcements, page, AnnouncementModel.event_date, AnnouncementModel.id)
 
 # GET ANNOUNCEMENTS FOR ALL STUDENT'S CLASSES ========================================
-@router.get("/my-announcements", response_model=list[AnnouncementSchema])
-def get_my_announcements(
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+@router.get("/my-announcements", response_model=Page[AnnouncementSchema],
+            dependencies=[Depends(async_conditional_get("announcements", "students_classes", db_dependency=get_async_db))])
+async def get_my_announcements(
+    page: PageParams = Depends(get_page_params),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     # Get all class IDs the student is enrolled in
-    class_ids = [enrollment.class_id for enrollment in current_user.enrollments]
+    class_ids = select(StudentClassModel.class_id).where(
+        StudentClassModel.student_id == current_user.id
+    )
     
     # Get all announcements for those classes
-    announcements = db.query(AnnouncementModel).filter(
+    announcements = select(AnnouncementModel).where(
         AnnouncementModel.class_id.in_(class_ids)
-    ).order_by(AnnouncementModel.event_date.desc()).all()
+    )
     
-    return announcements
+    return await paginate_async(db, announcements, page, AnnouncementModel.event_date, AnnouncementModel.id)
 
 # CREATE ANNOUNCEMENT (DOCTOR ONLY) ================================================
 @router.post("/announcements", response_model=AnnouncementSchema)
 def create_announcement(
     data: CreateAnnouncementSchema,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     if current_user.role != UserRole.DOCTOR:
         raise HTTPException(status_code=403, detail="Only doctors can create announcements")
@@ -78,7 +91,7 @@ def update_announcement(
     announcement_id: int,
     data: UpdateAnnouncementSchema,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     if current_user.role != UserRole.DOCTOR:
         raise HTTPException(status_code=403, detail="Only doctors can update announcements")
@@ -113,7 +126,7 @@ def update_announcement(
 def delete_announcement(
     announcement_id: int,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     if current_user.role != UserRole.DOCTOR:
         raise HTTPException(status_code=403, detail="Only doctors can delete announcements")
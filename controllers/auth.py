@@ -1,11 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.user import UserModel, UserRole
 from serializers.user import UserSchema, UserRegistrationSchema, UserLoginSchema, UserTokenSchema
-from database import get_db
+from database import get_async_db
+from utils.password_hashing import PasswordHasher, PasswordHasherBusy
+from utils.rate_limit import make_limiter, retry_after_header
+from config.environment import get_settings
 
 router = APIRouter()
 
+settings = get_settings()
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_QUEUE,
+    target_ms=settings.PASSWORD_HASH_TARGET_MS,
+    min_rounds=settings.PASSWORD_HASH_MIN_ROUNDS
+)
+
+ip_limiter = make_limiter(settings.RATE_LIMIT_IP_PER_MINUTE, settings.RATE_LIMIT_IP_BURST, settings.RATE_LIMIT_REDIS_URL, "ratelimit:ip:")
+user_limiter = make_limiter(settings.RATE_LIMIT_USER_PER_MINUTE, settings.RATE_LIMIT_USER_BURST, settings.RATE_LIMIT_REDIS_URL, "ratelimit:user:")
+
 ROLE_REQUIRED_FIELDS = {
     "doctor": ["department", "phone_num", "office_num"],
     "student": ["uni_id", "phone_num", "major"],
@@ -21,33 +37,73 @@ def validate_user_by_role(role: str, user):
         raise HTTPException(status_code=400,detail=f"Missing required fields for role '{role}': {', '.join(missing_fields)}")
 
 
+async def enforce_rate_limit(request: Request, name: str = None):
+    # Runs before any database or bcrypt work so throttled attempts stay cheap
+    wait = await ip_limiter.acquire_async(request.client.host if request.client else "unknown")
+    if name:
+        wait = max(wait, await user_limiter.acquire_async(name.lower()))
+    if wait:
+        raise HTTPException(status_code=429, detail="Too many attempts, slow down", headers=retry_after_header(wait))
+
+
+async def run_password_hasher(operation):
+    try:
+        return await operation
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Too many sign-ins right now, try again shortly", headers={"Retry-After": "1"})
+
+
+async def find_existing_user(db: AsyncSession, name: str, email: str):
+    result = await db.execute(select(UserModel).where( (UserModel.name == name) | (UserModel.email == email) ).limit(1))
+    return result.scalars().first()
+
+
+async def find_user_by_name(db: AsyncSession, name: str):
+    result = await db.execute(select(UserModel).where(UserModel.name == name))
+    return result.scalars().first()
+
+
+async def save_user(db: AsyncSession, user: UserModel) -> None:
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+
+
 @router.post("/auth/register", response_model=UserTokenSchema)
-def create_user(user: UserRegistrationSchema, db: Session = Depends(get_db)):
-    existing_user = db.query(UserModel).filter( (UserModel.name == user.name) | (UserModel.email == user.email) ).first()
+async def create_user(user: UserRegistrationSchema, request: Request, db: AsyncSession = Depends(get_async_db)):
+    await enforce_rate_limit(request)
+    existing_user = await find_existing_user(db, user.name, user.email)
     if existing_user:
         raise HTTPException(status_code=409, detail="name or email already exists")
     
     validate_user_by_role(user.role, user)
 
     new_user = UserModel(name=user.name, email=user.email, role=UserRole(user.role), major=user.major, uni_id=user.uni_id, department=user.department, phone_num=user.phone_num, office_num=user.office_num, license=user.license)
-    new_user.set_password(user.password)
+    new_user.password = await run_password_hasher(password_hasher.hash(user.password))
 
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await save_user(db, new_user)
 
     token = new_user.generate_token()
     return {"token": token, "message": "Registration successful"}
 
 @router.post('/auth/login', response_model=UserTokenSchema)
-def login(user: UserLoginSchema, db: Session = Depends(get_db)):
+async def login(user: UserLoginSchema, request: Request, db: AsyncSession = Depends(get_async_db)):
+    await enforce_rate_limit(request, user.name)
     db_user = None
     if user.name:
-        db_user = db.query(UserModel).filter(UserModel.name == user.name).first()
-    
+        db_user = await find_user_by_name(db, user.name)
+
+    if not db_user:
+        raise HTTPException(status_code=401, detail=f"Invalid credintials")
 
-    if not db_user or not db_user.verify_password(user.password):
+    verified, new_hash = await run_password_hasher(password_hasher.verify(user.password, str(db_user.password)))
+    if not verified:
         raise HTTPException(status_code=401, detail=f"Invalid credintials")
+
+    # The stored hash predates the current bcrypt cost; upgrade it while we have the plain password
+    if new_hash:
+        db_user.password = new_hash
+        await save_user(db, db_user)
     
     token = db_user.generate_token()
     return {"token": token, "message": "Login successful"}
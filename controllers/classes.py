@@ -6,16 +6,23 @@ from models.user import UserModel , UserRole
 # Serializers
 from serializers.enrollment import EnrollmentSchema
 from serializers.class_serializer import ClassSchema,CreateClassSchema,UpdateClassSchema
+from serializers.page import Page
 # Dependencies
 from database import get_db
-from dependencies.get_current_user import get_current_user
+from dependencies.get_read_db import get_read_db
+from dependencies.get_current_user import get_current_user, get_current_principal, Principal
+from dependencies.pagination import PageParams, get_page_params, paginate
+from dependencies.conditional_get import conditional_get
+
+# ClassSchema embeds the doctor and the enrollments
+CLASS_TABLES = ("classes", "students_classes", "users")
 
 router = APIRouter() 
 
 # GET ALL ===================================================================================
-@router.get("/classes", response_model=list[ClassSchema])
-def get_classes(db: Session = Depends(get_db)):
-    return db.query(ClassModel).all()
+@router.get("/classes", response_model=Page[ClassSchema], dependencies=[Depends(conditional_get(*CLASS_TABLES, public=True))])
+def get_classes(page: PageParams = Depends(get_page_params), db: Session = Depends(get_read_db)):
+    return paginate(db.query(ClassModel), page, ClassModel.created_at, ClassModel.id)
 
 @router.get("/student-classes", response_model=list[EnrollmentSchema])
 def get_classes(db: Session = Depends(get_db), current_user: UserModel = Depends(get_current_user)):
@@ -23,7 +30,8 @@ def get_classes(db: Session = Depends(get_db), current_user: UserModel = Depends
 
 
 # GET ONE ===================================================================================
-@router.get("/classes/{class_id}", response_model=ClassSchema)
+@router.get("/classes/{class_id}", response_model=ClassSchema,
+            dependencies=[Depends(conditional_get(*CLASS_TABLES, db_dependency=get_db, public=True))])
 def get_single_class(class_id: int, db: Session = Depends(get_db)):
     cls = db.query(ClassModel).filter(ClassModel.id == class_id).first()
     if not cls:
@@ -38,7 +46,7 @@ def get_single_class(class_id: int, db: Session = Depends(get_db)):
 def create_class(
     data: CreateClassSchema,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     if current_user.role != UserRole.DOCTOR:
         raise HTTPException(status_code=403, detail="Only doctors can create classes")
@@ -58,7 +66,7 @@ def update_class(
     class_id: int,
     data: UpdateClassSchema,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     cls = db.query(ClassModel).filter(ClassModel.id == class_id).first()
 
@@ -78,7 +86,7 @@ def update_class(
 def delete_class(
     class_id: int,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     cls = db.query(ClassModel).filter(ClassModel.id == class_id).first()
 
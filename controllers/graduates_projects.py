@@ -1,21 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.orm import Session
 from database import get_db
+from dependencies.pagination import PageParams, get_page_params, paginate
 from models.graduate_project import GraduateProjectModel
 from serializers.graduate_project import ( GraduateProjectCreateSchema, GraduateProjectSchema, GraduateProjectUpdateSchema)
-from dependencies.get_current_user import get_current_user
+from serializers.page import Page
+from dependencies.get_read_db import get_read_db
+from dependencies.get_current_user import get_current_principal, Principal
+from dependencies.conditional_get import conditional_get
 
 router = APIRouter()
 
 # GET ALL ================================================================================================
-@router.get("/projects", response_model=list[GraduateProjectSchema])
-def get_projects(db: Session = Depends(get_db)):
-    projects = db.query(GraduateProjectModel).all()
-    return projects
+@router.get("/projects", response_model=Page[GraduateProjectSchema], dependencies=[Depends(conditional_get("graduate_projects", public=True))])
+def get_projects(page: PageParams = Depends(get_page_params), db: Session = Depends(get_read_db)):
+    return paginate(db.query(GraduateProjectModel), page, GraduateProjectModel.created_at, GraduateProjectModel.id)
 
 
 # GET ONE ================================================================================================
-@router.get("/projects/{project_id}", response_model=GraduateProjectSchema)
+@router.get("/projects/{project_id}", response_model=GraduateProjectSchema,
+            dependencies=[Depends(conditional_get("graduate_projects", db_dependency=get_db, public=True))])
 def get_single_project(project_id: int, db: Session = Depends(get_db)):
     project = db.query(GraduateProjectModel)\
         .filter(GraduateProjectModel.id == project_id)\
@@ -31,7 +35,7 @@ def get_single_project(project_id: int, db: Session = Depends(get_db)):
 def create_project(
     data: GraduateProjectCreateSchema,
     db: Session = Depends(get_db),
-    user=Depends(get_current_user)
+    user: Principal = Depends(get_current_principal)
 ):
     project = GraduateProjectModel(**data.dict(), user_id=user.id)
     db.add(project)
@@ -42,7 +46,7 @@ def create_project(
 
 # UPDATE ===============================================================================================
 @router.put("/projects/{project_id}", response_model=GraduateProjectSchema)
-def update_project( project_id: int, data: GraduateProjectUpdateSchema, db: Session = Depends(get_db), user=Depends(get_current_user)):
+def update_project( project_id: int, data: GraduateProjectUpdateSchema, db: Session = Depends(get_db), user: Principal = Depends(get_current_principal)):
     project = db.query(GraduateProjectModel)\
         .filter(GraduateProjectModel.id == project_id)\
         .first()
@@ -63,7 +67,7 @@ def update_project( project_id: int, data: GraduateProjectUpdateSchema, db: Sess
 
 # DELETE =======================================================================================================
 @router.delete("/projects/{project_id}")
-def delete_project(project_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
+def delete_project(project_id: int, db: Session = Depends(get_db), user: Principal = Depends(get_current_principal)):
     project = db.query(GraduateProjectModel)\
         .filter(GraduateProjectModel.id == project_id)\
         .first()
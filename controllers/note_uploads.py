@@ -0,0 +1,383 @@
+import hashlib
+import mimetypes
+import math
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import Optional, List, BinaryIO
+from pydantic import BaseModel
+from models.note import NoteModel, NoteBlobModel
+from models.note_blobs import add_blob_reference, dedup_report, register_blob
+from models.upload_session import UploadSessionModel
+from models.user import UserRole
+from serializers.note_serializer import NoteSchema, CreateNoteSchema
+from database import get_db
+from dependencies.get_current_user import get_current_principal, Principal
+from dependencies.get_storage import get_storage
+from storage.base import BlobStorage
+from controllers.notes import MAX_FILE_SIZE, get_file_type, new_file_key, serialize_note, validate_upload
+from config.environment import get_settings
+import uuid
+
+router = APIRouter()
+
+settings = get_settings()
+
+BLOCK_SIZE = settings.UPLOAD_BLOCK_SIZE_MB * 1024 * 1024
+SHA256_HEX = re.compile(r"[0-9a-fA-F]{64}")
+
+# Shared by all uploads in this worker; each upload keeps at most
+# UPLOAD_CONCURRENCY of its blocks in flight, so memory stays at a few blocks
+block_pool = ThreadPoolExecutor(max_workers=settings.UPLOAD_CONCURRENCY * 4, thread_name_prefix="block-upload")
+
+
+def stage_stream(storage: BlobStorage, file_key: str, stream: BinaryIO) -> tuple[int, int, str]:
+    """
+    Read `stream` block by block, staging blocks concurrently and hashing the
+    content on the way. Returns (block_count, size, sha256 hex digest)
+    """
+    in_flight = threading.BoundedSemaphore(settings.UPLOAD_CONCURRENCY)
+    futures = []
+    size = 0
+    content_hash = hashlib.sha256()
+    try:
+        while True:
+            block = stream.read(BLOCK_SIZE)
+            if not block:
+                break
+            size += len(block)
+            content_hash.update(block)
+            if size > MAX_FILE_SIZE:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large. Maximum size: {MAX_FILE_SIZE / (1024*1024)}MB"
+                )
+
+            in_flight.acquire()
+            future = block_pool.submit(storage.stage_block, file_key, len(futures), block)
+            future.add_done_callback(lambda _: in_flight.release())
+            futures.append(future)
+
+        # Surface the first failed block, if any
+        for future in futures:
+            future.result()
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        storage.discard_blocks(file_key)
+        raise
+
+    return len(futures), size, content_hash.hexdigest()
+
+
+def hash_blob(storage: BlobStorage, file_key: str) -> str:
+    content_hash = hashlib.sha256()
+    for chunk in storage.open_range(file_key):
+        content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+def store_staged_content(db: Session, storage: BlobStorage, file_key: str, block_count: int, file_size: int, content_hash: str, content_type: Optional[str]) -> str:
+    """
+    Keep one stored copy per distinct content. Duplicates take a reference to
+    the existing blob and their staged blocks are never committed. Returns the
+    key the note should point at. Reference counts change in the caller's
+    transaction.
+    """
+    existing_key = add_blob_reference(db, content_hash)
+    if existing_key:
+        storage.discard_blocks(file_key)
+        return existing_key
+    
+    storage.commit_blocks(file_key, block_count, content_type)
+    stored_key = register_blob(db, content_hash, file_key, file_size)
+    if stored_key != file_key:
+        # An identical upload finished first
+        storage.delete_many([file_key])
+    return stored_key
+
+
+def create_note_record(db: Session, uploader: Principal, file_key: str, file_name: str, file_size: int, data, content_hash: Optional[str] = None) -> NoteModel:
+    new_note = NoteModel(
+        title=data.title,
+        file_name=file_name,
+        file_key=file_key,
+        file_type=get_file_type(file_name),
+        file_size=file_size,
+        course_code=data.course_code,
+        course_name=data.course_name,
+        year=data.year,
+        doctor_name=data.doctor_name,
+        description=data.description,
+        uploader_id=uploader.id,
+        likes_count=0,
+        dislikes_count=0,
+        content_hash=content_hash
+    )
+    
+    db.add(new_note)
+    db.commit()
+    db.refresh(new_note)
+    return new_note
+
+
+# STREAMING UPLOAD =============================================================
+@router.post("/notes/upload", response_model=NoteSchema)
+def upload_note_file(
+    file: UploadFile = File(...),
+    title: str = Form(...),
+    course_code: str = Form(...),
+    year: int = Form(...),
+    doctor_name: str = Form(...),
+    course_name: Optional[str] = Form(None),
+    description: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+    storage: Optional[BlobStorage] = Depends(get_storage),
+    current_user: Principal = Depends(get_current_principal)
+):
+    # Check user role
+    if current_user.role not in [UserRole.STUDENT, UserRole.GRADUATE]:
+        raise HTTPException(
+            status_code=403,
+            detail="Only students and graduates can upload notes"
+        )
+
+    if not storage:
+        raise HTTPException(status_code=503, detail="Storage is not configured")
+    
+    validate_upload(file.filename, file.size or 0)
+    
+    file_key = new_file_key(current_user.id, file.filename)
+    block_count, size, content_hash = stage_stream(storage, file_key, file.file)
+    file_key = store_staged_content(
+        db, storage, file_key, block_count, size, content_hash, mimetypes.guess_type(file.filename)[0]
+    )
+    
+    metadata = CreateNoteSchema(
+        title=title,
+        course_code=course_code,
+        course_name=course_name,
+        year=year,
+        doctor_name=doctor_name,
+        description=description
+    )
+    new_note = create_note_record(db, current_user, file_key, file.filename, size, metadata, content_hash)
+    return serialize_note(new_note, storage=storage)
+
+
+# RESUMABLE UPLOAD SESSIONS ====================================================
+# 1. POST   /notes/upload-sessions                       -> upload_id, block_size, block_count
+# 2. PUT    /notes/upload-sessions/{upload_id}/blocks/{i}  raw bytes of block i, any order, retry freely
+# 3. GET    /notes/upload-sessions/{upload_id}             -> received_blocks, to resume after a drop
+# 4. POST   /notes/upload-sessions/{upload_id}/complete    note metadata -> the created note
+# Sending the file's SHA-256 up front lets a duplicate skip step 2 entirely
+# (the response says deduplicated=true).
+class CreateUploadSessionRequest(BaseModel):
+    file_name: str
+    file_size: int
+    content_hash: Optional[str] = None
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    file_key: str
+    file_name: str
+    file_size: int
+    block_size: int
+    block_count: int
+    received_blocks: List[int] = []
+    deduplicated: bool = False  # Content already stored: skip the blocks and call /complete
+
+    class Config:
+        from_attributes = True
+
+
+def block_count_for(upload: UploadSessionModel) -> int:
+    return math.ceil(upload.file_size / upload.block_size)
+
+def stored_size(db: Session, content_hash: Optional[str]) -> Optional[int]:
+    """Size of the stored blob with this content, None if there is none"""
+    if not content_hash:
+        return None
+    return db.query(NoteBlobModel.file_size).filter(NoteBlobModel.content_hash == content_hash).scalar()
+
+def is_stored(db: Session, content_hash: Optional[str]) -> bool:
+    return stored_size(db, content_hash) is not None
+
+def check_declared_size(db: Session, content_hash: Optional[str], file_size: int) -> Optional[int]:
+    """The stored size for a declared duplicate; a different declared size means the hash or the size is wrong"""
+    size = stored_size(db, content_hash)
+    if size is not None and size != file_size:
+        raise HTTPException(status_code=400, detail="file_size does not match the stored content for this content_hash")
+    return size
+
+def get_upload_session(db: Session, upload_id: str, current_user: Principal) -> UploadSessionModel:
+    upload = db.query(UploadSessionModel).filter(UploadSessionModel.upload_id == upload_id).first()
+    if not upload or upload.uploader_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return upload
+
+def upload_session_response(upload: UploadSessionModel, received_blocks=(), deduplicated: bool = False) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        upload_id=upload.upload_id,
+        file_key=upload.file_key,
+        file_name=upload.file_name,
+        file_size=upload.file_size,
+        block_size=upload.block_size,
+        block_count=block_count_for(upload),
+        received_blocks=sorted(received_blocks),
+        deduplicated=deduplicated
+    )
+
+
+@router.post("/notes/upload-sessions", response_model=UploadSessionResponse)
+def create_upload_session(
+    data: CreateUploadSessionRequest,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    # Check user role
+    if current_user.role not in [UserRole.STUDENT, UserRole.GRADUATE]:
+        raise HTTPException(
+            status_code=403,
+            detail="Only students and graduates can upload notes"
+        )
+    
+    if data.file_size <= 0:
+        raise HTTPException(status_code=400, detail="File is empty")
+    validate_upload(data.file_name, data.file_size)
+    if data.content_hash is not None and not SHA256_HEX.fullmatch(data.content_hash):
+        raise HTTPException(status_code=400, detail="content_hash must be a hex SHA-256 digest (64 characters)")
+    check_declared_size(db, data.content_hash and data.content_hash.lower(), data.file_size)
+    
+    upload = UploadSessionModel(
+        upload_id=uuid.uuid4().hex,
+        file_key=new_file_key(current_user.id, data.file_name),
+        file_name=data.file_name,
+        file_size=data.file_size,
+        block_size=BLOCK_SIZE,
+        content_hash=data.content_hash.lower() if data.content_hash else None,
+        uploader_id=current_user.id
+    )
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+    return upload_session_response(upload, deduplicated=is_stored(db, upload.content_hash))
+
+
+@router.get("/notes/upload-sessions/{upload_id}", response_model=UploadSessionResponse)
+def get_upload_session_status(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    storage: Optional[BlobStorage] = Depends(get_storage),
+    current_user: Principal = Depends(get_current_principal)
+):
+    if not storage:
+        raise HTTPException(status_code=503, detail="Storage is not configured")
+    
+    upload = get_upload_session(db, upload_id, current_user)
+    return upload_session_response(
+        upload, storage.list_staged_blocks(upload.file_key), deduplicated=is_stored(db, upload.content_hash)
+    )
+
+
+@router.put("/notes/upload-sessions/{upload_id}/blocks/{index}")
+async def put_upload_block(
+    upload_id: str,
+    index: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    storage: Optional[BlobStorage] = Depends(get_storage),
+    current_user: Principal = Depends(get_current_principal)
+):
+    if not storage:
+        raise HTTPException(status_code=503, detail="Storage is not configured")
+    
+    # Blocking work (DB, storage) stays off the event loop
+    upload = await run_in_threadpool(get_upload_session, db, upload_id, current_user)
+    
+    block_count = block_count_for(upload)
+    if not 0 <= index < block_count:
+        raise HTTPException(status_code=400, detail=f"Block index must be between 0 and {block_count - 1}")
+    expected = upload.block_size if index < block_count - 1 else upload.file_size - upload.block_size * index
+    
+    # Read at most one block; never buffer an oversized body
+    data = bytearray()
+    async for chunk in request.stream():
+        data += chunk
+        if len(data) > expected:
+            raise HTTPException(status_code=400, detail=f"Block {index} must be exactly {expected} bytes")
+    if len(data) != expected:
+        raise HTTPException(status_code=400, detail=f"Block {index} must be exactly {expected} bytes")
+    
+    await run_in_threadpool(storage.stage_block, upload.file_key, index, bytes(data))
+    return {"index": index, "size": len(data)}
+
+
+@router.post("/notes/upload-sessions/{upload_id}/complete", response_model=NoteSchema)
+def complete_upload_session(
+    upload_id: str,
+    data: CreateNoteSchema,
+    db: Session = Depends(get_db),
+    storage: Optional[BlobStorage] = Depends(get_storage),
+    current_user: Principal = Depends(get_current_principal)
+):
+    if not storage:
+        raise HTTPException(status_code=503, detail="Storage is not configured")
+    
+    upload = get_upload_session(db, upload_id, current_user)
+    
+    # Declared duplicate of stored content: nothing to upload, and the note gets the stored size
+    file_size = check_declared_size(db, upload.content_hash, upload.file_size) or upload.file_size
+    file_key = add_blob_reference(db, upload.content_hash) if upload.content_hash else None
+    content_hash = upload.content_hash
+    
+    if file_key:
+        storage.discard_blocks(upload.file_key)
+    else:
+        block_count = block_count_for(upload)
+        missing = sorted(set(range(block_count)) - storage.list_staged_blocks(upload.file_key))
+        if missing:
+            raise HTTPException(status_code=409, detail={"message": "Upload is incomplete", "missing_blocks": missing})
+        
+        # Blocks arrive in any order, so hash the assembled blob server-side
+        storage.commit_blocks(upload.file_key, block_count, mimetypes.guess_type(upload.file_name)[0])
+        content_hash = hash_blob(storage, upload.file_key)
+        file_key = add_blob_reference(db, content_hash)
+        if file_key:
+            storage.delete_many([upload.file_key])
+        else:
+            file_key = register_blob(db, content_hash, upload.file_key, upload.file_size)
+            if file_key != upload.file_key:
+                storage.delete_many([upload.file_key])
+    
+    db.delete(upload)
+    new_note = create_note_record(db, current_user, file_key, upload.file_name, file_size, data, content_hash)
+    return serialize_note(new_note, storage=storage)
+
+
+@router.delete("/notes/upload-sessions/{upload_id}")
+def abort_upload_session(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    storage: Optional[BlobStorage] = Depends(get_storage),
+    current_user: Principal = Depends(get_current_principal)
+):
+    upload = get_upload_session(db, upload_id, current_user)
+    if storage:
+        storage.discard_blocks(upload.file_key)
+    
+    db.delete(upload)
+    db.commit()
+    return {"message": "Upload session cancelled"}
+
+
+# DEDUPLICATION REPORT =========================================================
+@router.get("/notes/dedup-report")
+def get_dedup_report(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    return dedup_report(db)
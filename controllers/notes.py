@@ -1,47 +1,52 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from pydantic import BaseModel
-from models.note import NoteModel, NoteLikeModel
-from models.user import UserModel, UserRole
+from models.note import NoteModel, NoteLikeModel, NoteBlobModel
+from models.note_search import apply_note_search, snippet_html
+from models.note_blobs import release_blob
+from models.note_reactions import ReactionConflict, ReactionCounterBuffer, apply_reaction_counts, toggle_reaction
+from models.user import UserRole
 from serializers.note_serializer import (
     NoteSchema,
     CreateNoteSchema,
     UpdateNoteSchema,
     NoteLikeSchema
 )
-from database import get_db
-from dependencies.get_current_user import get_current_user
+from serializers.page import Page
+from serializers.orm_adapter import OrmListAdapter
+from database import SessionLocal, get_async_db, get_db
+from dependencies.get_read_db import get_async_read_db
+from dependencies.get_current_user import get_current_principal, Principal
+from dependencies.pagination import PageParams, get_page_params, paginate, paginate_async
+from dependencies.get_storage import get_storage
+from dependencies.conditional_get import async_conditional_get, conditional_get
+from storage.base import READ, WRITE, BlobStorage
+from storage.signed_urls import SIGNED_URL_TTL, get_signed_url, signed_url_epoch
 from config.environment import get_settings
-from azure.storage.blob import BlobServiceClient, BlobSasPermissions, generate_blob_sas
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+import re
+import uuid
 
 router = APIRouter()
 
 settings = get_settings()
-AZURE_STORAGE_ACCOUNT = settings.AZURE_STORAGE_ACCOUNT_NAME
-AZURE_STORAGE_ACCOUNT_KEY = settings.AZURE_STORAGE_ACCOUNT_KEY
-AZURE_CONTAINER_NAME = settings.AZURE_STORAGE_CONTAINER_NAME
-
-try:
-    azure_blob_client = BlobServiceClient(
-        account_url=f"https://{AZURE_STORAGE_ACCOUNT}.blob.core.windows.net",
-        account_name=AZURE_STORAGE_ACCOUNT,
-        account_key=AZURE_STORAGE_ACCOUNT_KEY
-    )
-    container_client = azure_blob_client.get_container_client(AZURE_CONTAINER_NAME)
-except Exception as e:
-    print(f"Warning: Could not initialize Azure client: {e}")
-    container_client = None
 
-def blob_exists_in_azure(file_key: str) -> bool:
+# Started and flushed by the app lifespan when REACTION_WRITE_BEHIND is on
+reaction_buffer = ReactionCounterBuffer(
+    SessionLocal,
+    interval=settings.REACTION_FLUSH_INTERVAL_MS / 1000,
+    max_pending=settings.REACTION_FLUSH_MAX_PENDING
+)
+
+def blob_exists_in_azure(storage: Optional[BlobStorage], file_key: str) -> bool:
     try:
-        if not container_client:
+        if not storage:
             return True
         
-        blob_client = container_client.get_blob_client(file_key)
-        blob_client.get_blob_properties()
-        return True
+        return storage.exists(file_key)
     except Exception as e:
         return False
 
@@ -61,11 +66,72 @@ class CreateNoteFromAzureRequest(BaseModel):
         from_attributes = True
 
 ALLOWED_EXTENSIONS = {'.pdf', '.docx', '.doc', '.png', '.jpg', '.jpeg', '.gif'}
-MAX_FILE_SIZE = 10 * 1024 * 1024
+MAX_FILE_SIZE = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+MAX_ORPHAN_SCAN = 5000  # Blobs listed per /notes/my-azure-files request before returning a cursor
 
 def allowed_file(filename: str) -> bool:
     return any(filename.lower().endswith(ext) for ext in ALLOWED_EXTENSIONS)
 
+def query_notes_with_like_status(db: Session, user_id: int):
+    """Notes paired with the caller's reaction, resolved with one outer join"""
+    return db.query(NoteModel, NoteLikeModel.is_like).outerjoin(
+        NoteLikeModel,
+        (NoteLikeModel.note_id == NoteModel.id) & (NoteLikeModel.user_id == user_id)
+    )
+
+def select_notes_with_like_status(user_id: int):
+    """query_notes_with_like_status() as a select() for AsyncSession"""
+    return select(NoteModel, NoteLikeModel.is_like).outerjoin(
+        NoteLikeModel,
+        (NoteLikeModel.note_id == NoteModel.id) & (NoteLikeModel.user_id == user_id)
+    )
+
+def note_extras(note: NoteModel, user_like_status: Optional[int] = None, search_rank: Optional[float] = None, search_snippet: Optional[str] = None, *, storage: Optional[BlobStorage] = None) -> dict:
+    return {
+        # Short-lived read URL; falls back to the blob key when storage can't sign
+        'download_url': get_signed_url(storage, note.file_key, READ) or note.file_key,
+        'user_like_status': user_like_status,
+        'search_rank': search_rank,
+        'search_snippet': snippet_html(search_snippet)
+    }
+
+note_adapter = OrmListAdapter(NoteSchema, NoteModel)
+
+def serialize_notes(rows: list, *, storage: Optional[BlobStorage] = None) -> list[NoteSchema]:
+    """NoteSchemas for (note, user_like_status[, search_rank, search_snippet]) rows, built in one pass"""
+    return note_adapter.validate((row[0] for row in rows), (note_extras(*row, storage=storage) for row in rows))
+
+def serialize_note(note: NoteModel, user_like_status: Optional[int] = None, *, storage: Optional[BlobStorage] = None) -> NoteSchema:
+    return note_adapter.validate_one(note, note_extras(note, user_like_status, storage=storage))
+
+def validate_upload(file_name: str, file_size: int) -> None:
+    # Validate file size
+    if file_size > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File too large. Maximum size: {MAX_FILE_SIZE / (1024*1024)}MB"
+        )
+    
+    # Validate file type
+    file_extension = '.' + file_name.split('.')[-1].lower() if '.' in file_name else ''
+    if file_extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+
+def new_file_key(user_id: int, file_name: str) -> str:
+    """A fresh blob key in the user's directory (notes/{user_id}/)"""
+    safe_name = re.sub(r"[^A-Za-z0-9._-]", "_", file_name.split('/')[-1])
+    return f"notes/{user_id}/{uuid.uuid4().hex}-{safe_name}"
+
+def validate_file_key(user_id: int, file_key: str) -> None:
+    """Only keys in the caller's own directory, as issued by new_file_key(), can be registered"""
+    prefix = f"notes/{user_id}/"
+    name = file_key[len(prefix):]
+    if not file_key.startswith(prefix) or not name or '/' in name or '\\' in name:
+        raise HTTPException(status_code=403, detail="file_key must be one of your own uploads")
+
 def get_file_type(filename: str) -> str:
     """Get file type from filename"""
     ext = filename.lower().split('.')[-1]
@@ -79,48 +145,35 @@ def get_file_type(filename: str) -> str:
 
 
 # GET ALL NOTES ================================================================
-@router.get("/notes", response_model=List[NoteSchema])
-def get_all_notes(
+@router.get("/notes", response_model=Page[NoteSchema],
+            dependencies=[Depends(async_conditional_get("notes", "note_likes", extra=signed_url_epoch))])
+async def get_all_notes(
     course_code: Optional[str] = None,
     year: Optional[int] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    page: PageParams = Depends(get_page_params),
+    db: AsyncSession = Depends(get_async_read_db),
+    storage: Optional[BlobStorage] = Depends(get_storage),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    query = db.query(NoteModel)
+    query = select_notes_with_like_status(current_user.id)
     
     # Apply filters
     if course_code:
-        query = query.filter(NoteModel.course_code.ilike(f"%{course_code}%"))
+        query = query.where(NoteModel.course_code.ilike(f"%{course_code}%"))
     if year:
-        query = query.filter(NoteModel.year == year)
+        query = query.where(NoteModel.year == year)
     if search:
-        query = query.filter(
-            (NoteModel.title.ilike(f"%{search}%")) |
-            (NoteModel.description.ilike(f"%{search}%")) |
-            (NoteModel.doctor_name.ilike(f"%{search}%"))
-        )
-    
-    notes = query.order_by(NoteModel.created_at.desc()).all()
+        query, rank = apply_note_search(query, search, db.bind.dialect.name)
+        if rank is not None:
+            # Most relevant first
+            return await paginate_async(db, query, page, rank, NoteModel.id, transform_all=lambda rows: serialize_notes(rows, storage=storage))
     
     # Add download URLs and user like status
-    result = []
-    for note in notes:
-        note_dict = NoteSchema.from_orm(note).dict()
-        
-        # Set download URL (Azure blob key)
-        note_dict['download_url'] = note.file_key
-        
-        # Get user's like status
-        user_like = db.query(NoteLikeModel).filter(
-            NoteLikeModel.note_id == note.id,
-            NoteLikeModel.user_id == current_user.id
-        ).first()
-        note_dict['user_like_status'] = user_like.is_like if user_like else None
-        
-        result.append(note_dict)
-    
-    return result
+    return await paginate_async(
+        db, query, page, NoteModel.created_at, NoteModel.id,
+        transform_all=lambda rows: serialize_notes(rows, storage=storage)
+    )
 
 
 # LIST AZURE FILES FOR USER ====================================================
@@ -135,6 +188,7 @@ class ListOrphanedFilesResponse(BaseModel):
     count: int
     message: str
     error: Optional[str] = None
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to keep scanning
 
     class Config:
         from_attributes = True
@@ -143,7 +197,7 @@ class ListOrphanedFilesResponse(BaseModel):
 @router.get("/notes/existing-file-keys")
 def get_existing_file_keys(
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     try:
         # Get all file_keys for current user
@@ -165,47 +219,55 @@ def get_existing_file_keys(
             "message": "Could not retrieve file keys"
         }
 
+def iter_orphaned_blobs(db: Session, storage: BlobStorage, prefix: str, page_size: int, continuation_token: Optional[str] = None):
+    """
+    Walk the blobs under `prefix` one listing page at a time, yielding
+    (orphans, blobs_scanned, next_token) per page. Each page is checked
+    against the notes table with a single indexed IN query on file_key.
+    """
+    for blobs, next_token in storage.list_prefix(prefix, page_size, continuation_token):
+        keys = [blob.key for blob in blobs]
+        known = {row[0] for row in db.query(NoteModel.file_key).filter(NoteModel.file_key.in_(keys))} if keys else set()
+        orphans = [blob for blob in blobs if blob.key not in known]
+        yield orphans, len(blobs), next_token
+
 @router.get("/notes/my-azure-files", response_model=ListOrphanedFilesResponse)
 def list_user_azure_files(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    storage: Optional[BlobStorage] = Depends(get_storage),
+    current_user: Principal = Depends(get_current_principal)
 ):
     try:
-        if not container_client:
+        if not storage:
             return ListOrphanedFilesResponse(files=[], count=0, message="Cannot access Azure storage")
         
-        # List all blobs in the container
-        blobs = container_client.list_blobs()
-        
-        # Filter blobs that are in user's directory (notes/{user_id}/)
-        # For now, just get files created by the current user
-        all_blobs = list(blobs)
-        print(f"DEBUG: Found {len(all_blobs)} total blobs in Azure container")
-        for blob in all_blobs:
-            print(f"DEBUG: Blob - {blob.name} (size: {blob.size})")
-        
-        # Get all existing file_keys in the database
-        existing_file_keys = db.query(NoteModel.file_key).all()
-        existing_keys_set = {row[0] for row in existing_file_keys}
-        print(f"DEBUG: Found {len(existing_keys_set)} notes in database")
-        for key in existing_keys_set:
-            print(f"DEBUG: DB key - {key}")
-        
-        # Find files that exist in Azure but not in database
+        # Only the user's own directory (notes/{user_id}/), one page per round trip.
+        # Stop at the first page with orphans, or after MAX_ORPHAN_SCAN blobs, and
+        # hand the continuation token back as the cursor
         orphaned_files = []
-        for blob in all_blobs:
-            if blob.name not in existing_keys_set:
-                orphaned_files.append(OrphanedFileResponse(
-                    file_key=blob.name,
-                    file_name=blob.name.split('/')[-1],
-                    created_at=blob.creation_time.isoformat() if blob.creation_time else None,
+        next_cursor = None
+        scanned = 0
+        for orphans, page_size, next_cursor in iter_orphaned_blobs(db, storage, f"notes/{current_user.id}/", limit, cursor):
+            orphaned_files = [
+                OrphanedFileResponse(
+                    file_key=blob.key,
+                    file_name=blob.key.split('/')[-1],
+                    created_at=blob.created_at.isoformat() if blob.created_at else None,
                     size=blob.size
-                ))
+                )
+                for blob in orphans
+            ]
+            scanned += page_size
+            if orphaned_files or scanned >= MAX_ORPHAN_SCAN:
+                break
         
         return ListOrphanedFilesResponse(
             files=orphaned_files,
             count=len(orphaned_files),
-            message=f"Found {len(orphaned_files)} files in Azure without database records"
+            message=f"Found {len(orphaned_files)} files in Azure without database records",
+            next_cursor=next_cursor
         )
     except Exception as e:
         return ListOrphanedFilesResponse(
@@ -217,37 +279,68 @@ def list_user_azure_files(
 
 
 # GET SINGLE NOTE ==============================================================
-@router.get("/notes/{note_id}", response_model=NoteSchema)
+@router.get("/notes/{note_id}", response_model=NoteSchema,
+            dependencies=[Depends(conditional_get("notes", "note_likes", db_dependency=get_db, extra=signed_url_epoch))])
 def get_single_note(
     note_id: int,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    storage: Optional[BlobStorage] = Depends(get_storage),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    note = db.query(NoteModel).filter(NoteModel.id == note_id).first()
-    if not note:
+    row = query_notes_with_like_status(db, current_user.id).filter(NoteModel.id == note_id).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Note not found")
     
-    note_dict = NoteSchema.from_orm(note).dict()
+    note, user_like_status = row
+    return serialize_note(note, user_like_status, storage=storage)
+
+
+# DIRECT UPLOAD URL ============================================================
+class UploadUrlRequest(BaseModel):
+    file_name: str
+    file_size: int
+
+class UploadUrlResponse(BaseModel):
+    file_key: str
+    upload_url: str
+    expires_at: datetime
+
+@router.post("/notes/upload-url", response_model=UploadUrlResponse)
+def create_upload_url(
+    data: UploadUrlRequest,
+    storage: Optional[BlobStorage] = Depends(get_storage),
+    current_user: Principal = Depends(get_current_principal)
+):
+    # Check user role
+    if current_user.role not in [UserRole.STUDENT, UserRole.GRADUATE]:
+        raise HTTPException(
+            status_code=403,
+            detail="Only students and graduates can upload notes"
+        )
     
-    # Set download URL (Azure blob key)
-    note_dict['download_url'] = note.file_key
+    validate_upload(data.file_name, data.file_size)
     
-    # Get user's like status
-    user_like = db.query(NoteLikeModel).filter(
-        NoteLikeModel.note_id == note.id,
-        NoteLikeModel.user_id == current_user.id
-    ).first()
-    note_dict['user_like_status'] = user_like.is_like if user_like else None
+    # The client PUTs the file straight to storage (x-ms-blob-type: BlockBlob on
+    # Azure), then registers it with POST /notes using the returned file_key
+    file_key = new_file_key(current_user.id, data.file_name)
+    upload_url = get_signed_url(storage, file_key, WRITE)
+    if not upload_url:
+        raise HTTPException(status_code=503, detail="Storage can not issue upload URLs")
     
-    return note_dict
+    return UploadUrlResponse(
+        file_key=file_key,
+        upload_url=upload_url,
+        expires_at=datetime.now(timezone.utc) + SIGNED_URL_TTL
+    )
 
 
 # UPLOAD NOTE ==================================================================
 @router.post("/notes", response_model=NoteSchema)
 async def upload_note(
     note_data: CreateNoteFromAzureRequest,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    storage: Optional[BlobStorage] = Depends(get_storage),
+    current_user: Principal = Depends(get_current_principal)
 ):
     
     # Check user role
@@ -257,20 +350,18 @@ async def upload_note(
             detail="Only students and graduates can upload notes"
         )
     
-    # Validate file size
-    if note_data.file_size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size: {MAX_FILE_SIZE / (1024*1024)}MB"
-        )
+    validate_upload(note_data.file_name, note_data.file_size)
+    validate_file_key(current_user.id, note_data.file_key)
     
-    # Validate file type
-    file_extension = '.' + note_data.file_name.split('.')[-1].lower() if '.' in note_data.file_name else ''
-    if file_extension not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
+    # A key another note or the shared blob store already points at would be
+    # deleted from under them when this note goes
+    key_in_use = await db.scalar(
+        select(NoteModel.id).where(NoteModel.file_key == note_data.file_key).union_all(
+            select(NoteBlobModel.id).where(NoteBlobModel.file_key == note_data.file_key)
+        ).limit(1)
+    )
+    if key_in_use is not None:
+        raise HTTPException(status_code=400, detail="This file already has a note record in the database")
     
     # Create note record in database
     new_note = NoteModel(
@@ -289,20 +380,12 @@ async def upload_note(
         dislikes_count=0
     )
     
-    print(f"DEBUG: Creating note - file_key: {note_data.file_key}, uploader_id: {current_user.id}")
-    
     db.add(new_note)
-    db.commit()
-    db.refresh(new_note)
-    
-    print(f"DEBUG: Note created with ID: {new_note.id}")
+    await db.commit()
+    await db.refresh(new_note)
     
     # Return response
-    note_dict = NoteSchema.from_orm(new_note).dict()
-    note_dict['download_url'] = note_data.file_key  # URL is the Azure blob key
-    note_dict['user_like_status'] = None
-    
-    return note_dict
+    return serialize_note(new_note, storage=storage)
 
 
 # UPDATE NOTE METADATA =========================================================
@@ -311,13 +394,17 @@ def update_note(
     note_id: int,
     data: UpdateNoteSchema,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    storage: Optional[BlobStorage] = Depends(get_storage),
+    current_user: Principal = Depends(get_current_principal)
 ):
     
-    note = db.query(NoteModel).filter(NoteModel.id == note_id).first()
-    if not note:
+    row = query_notes_with_like_status(db, current_user.id).filter(NoteModel.id == note_id).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Note not found")
     
+    # The caller's reaction is not touched by a metadata edit
+    note, user_like_status = row
+    
     # Only uploader can edit
     if note.uploader_id != current_user.id:
         raise HTTPException(status_code=403, detail="You can only edit your own notes")
@@ -340,17 +427,7 @@ def update_note(
     db.refresh(note)
     
     # Return with download URL
-    note_dict = NoteSchema.from_orm(note).dict()
-    note_dict['download_url'] = note.file_key
-    
-    # Get user's like status
-    user_like = db.query(NoteLikeModel).filter(
-        NoteLikeModel.note_id == note.id,
-        NoteLikeModel.user_id == current_user.id
-    ).first()
-    note_dict['user_like_status'] = user_like.is_like if user_like else None
-    
-    return note_dict
+    return serialize_note(note, user_like_status, storage=storage)
 
 
 # DELETE NOTE ==================================================================
@@ -358,7 +435,8 @@ def update_note(
 def delete_note(
     note_id: int,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    storage: Optional[BlobStorage] = Depends(get_storage),
+    current_user: Principal = Depends(get_current_principal)
 ):
     
     note = db.query(NoteModel).filter(NoteModel.id == note_id).first()
@@ -369,13 +447,22 @@ def delete_note(
     if note.uploader_id != current_user.id:
         raise HTTPException(status_code=403, detail="You can only delete your own notes")
     
-    # Return file_key so frontend can delete from Azure
     file_key = note.file_key
+    content_hash = note.content_hash
+    unused_key = release_blob(db, content_hash) if content_hash else None
     
     # Delete from database
     db.delete(note)
     db.commit()
     
+    if content_hash:
+        # Deduplicated blobs may be shared, so the server deletes them once the
+        # last note is gone and the frontend gets no key to delete
+        if unused_key and storage:
+            storage.delete_many([unused_key])
+        return {"message": "Note deleted successfully", "file_key": None}
+    
+    # Return file_key so frontend can delete from Azure
     return {"message": "Note deleted successfully", "file_key": file_key}
 
 
@@ -385,65 +472,32 @@ def like_note(
     note_id: int,
     is_like: int = Form(...),  # 1 for like, -1 for dislike
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     
-    note = db.query(NoteModel).filter(NoteModel.id == note_id).first()
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
-    
     # Validate is_like value
     if is_like not in [1, -1]:
         raise HTTPException(status_code=400, detail="is_like must be 1 or -1")
     
-    # Check if user already liked/disliked
-    existing_like = db.query(NoteLikeModel).filter(
-        NoteLikeModel.note_id == note_id,
-        NoteLikeModel.user_id == current_user.id
-    ).first()
-    
-    if existing_like:
-        # If same action, remove it (toggle off)
-        if existing_like.is_like == is_like:
-            # Update counts
-            if is_like == 1:
-                note.likes_count = max(0, note.likes_count - 1)
-            else:
-                note.dislikes_count = max(0, note.dislikes_count - 1)
-            
-            db.delete(existing_like)
-            db.commit()
-            return {"message": "Reaction removed", "likes": note.likes_count, "dislikes": note.dislikes_count}
-        else:
-            # Change from like to dislike or vice versa
-            if existing_like.is_like == 1:
-                note.likes_count = max(0, note.likes_count - 1)
-                note.dislikes_count += 1
-            else:
-                note.dislikes_count = max(0, note.dislikes_count - 1)
-                note.likes_count += 1
-            
-            existing_like.is_like = is_like
-            db.commit()
-            return {"message": "Reaction updated", "likes": note.likes_count, "dislikes": note.dislikes_count}
+    if not db.query(NoteModel.id).filter(NoteModel.id == note_id).first():
+        raise HTTPException(status_code=404, detail="Note not found")
+    
+    try:
+        message, likes_delta, dislikes_delta = toggle_reaction(db, note_id, current_user.id, is_like)
+    except ReactionConflict:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Reaction changed by another request, please retry")
+    
+    if settings.REACTION_WRITE_BEHIND:
+        # Reaction row now, counters in the next batched flush
+        db.commit()
+        likes, dislikes = reaction_buffer.add(db, note_id, likes_delta, dislikes_delta)
     else:
-        # Create new like/dislike
-        new_like = NoteLikeModel(
-            note_id=note_id,
-            user_id=current_user.id,
-            is_like=is_like
-        )
-        
-        # Update counts
-        if is_like == 1:
-            note.likes_count += 1
-        else:
-            note.dislikes_count += 1
-        
-        db.add(new_like)
+        # Update counts in the same transaction as the reaction row
+        likes, dislikes = apply_reaction_counts(db, note_id, likes_delta, dislikes_delta)
         db.commit()
-        
-        return {"message": "Reaction added", "likes": note.likes_count, "dislikes": note.dislikes_count}
+    
+    return {"message": message, "likes": likes, "dislikes": dislikes}
 
 
 # RECOVER ORPHANED AZURE FILE =================================================
@@ -464,7 +518,8 @@ def recover_azure_file(
     course_name: Optional[str] = Query(None),
     description: Optional[str] = Query(None),
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    storage: Optional[BlobStorage] = Depends(get_storage),
+    current_user: Principal = Depends(get_current_principal)
 ):
     
     # Check user role
@@ -474,11 +529,12 @@ def recover_azure_file(
             detail="Only students and graduates can upload notes"
         )
 
-    if not container_client:
+    if not storage:
         raise HTTPException(
             status_code=503,
             detail="Azure storage is not configured"
         )
+    validate_file_key(current_user.id, file_key)
     
     # Check if file already has a record
     existing_note = db.query(NoteModel).filter(NoteModel.file_key == file_key).first()
@@ -490,8 +546,7 @@ def recover_azure_file(
     
     # Check if file exists in Azure
     try:
-        blob_client = container_client.get_blob_client(file_key)
-        blob_properties = blob_client.get_blob_properties()
+        blob_properties = storage.stat(file_key)
     except Exception as e:
         raise HTTPException(
             status_code=404,
@@ -533,11 +588,7 @@ def recover_azure_file(
     db.refresh(new_note)
     
     # Return response
-    note_dict = NoteSchema.from_orm(new_note).dict()
-    note_dict['download_url'] = new_note.file_key
-    note_dict['user_like_status'] = None
-    
     return RecoverFileResponse(
         message="File recovered and note record created",
-        note=note_dict
+        note=serialize_note(new_note, storage=storage)
     )
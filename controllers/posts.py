@@ -1,33 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from models.user import  UserModel, UserRole
+from models.user import  UserRole
 from models.post import PostModel
 from serializers.post import PostCreateSchema, PostUpdateSchema, PostSchema
-from database import get_db
-from dependencies.get_current_user import get_current_user
+from serializers.page import Page
+from database import get_async_db, get_db
+from dependencies.get_current_user import get_current_principal, Principal
+from dependencies.pagination import PageParams, get_page_params, paginate_async
 
 router = APIRouter()
 
 
 # GET ALL ============================================================================
-@router.get("/posts", response_model=list[PostSchema])
-def get_all_posts(current_user: UserModel = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.get("/posts", response_model=Page[PostSchema])
+async def get_all_posts(page: PageParams = Depends(get_page_params), current_user: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_async_db)):
 
-    posts = db.query(PostModel).all()
-    return posts
+    return await paginate_async(db, select(PostModel), page, PostModel.created_at, PostModel.id)
 
 # GET ONE  ===========================================================================
 @router.get("/posts/{post_id}", response_model=PostSchema)
-def get_single_post(post_id: int, current_user: UserModel = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_single_post(post_id: int, current_user: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_async_db)):
   
-    post = db.query(PostModel).filter(PostModel.id == post_id).first()
+    post = await db.get(PostModel, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     return post
 
 # CREATE  =============================================================================
 @router.post("/posts", response_model=PostSchema)
-def create_post(post: PostCreateSchema, current_institute: UserModel = Depends(get_current_user), db: Session = Depends(get_db)):
+def create_post(post: PostCreateSchema, current_institute: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
 
     if current_institute.role != UserRole.INSTITUTION:
         raise HTTPException(status_code=403, detail="Only institutions can create posts")
@@ -45,7 +48,7 @@ def create_post(post: PostCreateSchema, current_institute: UserModel = Depends(g
 
 # UPDATE =============================================================================
 @router.put("/posts/{post_id}", response_model=PostSchema)
-def update_post(post_id: int, post_update: PostUpdateSchema, current_institute: UserModel = Depends(get_current_user), db: Session = Depends(get_db)):
+def update_post(post_id: int, post_update: PostUpdateSchema, current_institute: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
    
     post = db.query(PostModel).filter(PostModel.id == post_id, PostModel.institute_id == current_institute.id).first()
     if not post:
@@ -59,7 +62,7 @@ def update_post(post_id: int, post_update: PostUpdateSchema, current_institute:
 
 # DELETE ===============================================================================
 @router.delete("/posts/{post_id}")
-def delete_post(post_id: int, current_institute: UserModel = Depends(get_current_user), db: Session = Depends(get_db)):
+def delete_post(post_id: int, current_institute: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
   
     post = db.query(PostModel).filter(PostModel.id == post_id, PostModel.institute_id == current_institute.id).first()
     if not post:
@@ -5,7 +5,7 @@ from models.user import UserModel, UserRole
 from models.classes import ClassModel
 from serializers.student_class import (StudentClassSchema, CreateStudentClassSchema )
 from database import get_db
-from dependencies.get_current_user import get_current_user
+from dependencies.get_current_user import get_current_principal, Principal
 
 router = APIRouter()
 
@@ -15,7 +15,7 @@ router = APIRouter()
 def add_student(
     data: CreateStudentClassSchema,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
 
     if current_user.role != UserRole.DOCTOR:
@@ -62,7 +62,7 @@ def remove_student(
     class_id: int,
     student_id: int,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     cls = db.query(ClassModel).filter(ClassModel.id == class_id).first()
     if not cls:
@@ -1,17 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from typing import Optional
+from models.note import NoteModel
+from models.note_blobs import release_blob
 from models.user import UserModel
 from serializers.user import UserSchema
+from serializers.page import Page
 from database import get_db
-from dependencies.get_current_user import get_current_user
+from dependencies.pagination import PageParams, get_page_params, paginate
+from dependencies.get_read_db import get_read_db
+from dependencies.get_current_user import get_current_principal, invalidate_principal, Principal
+from dependencies.conditional_get import conditional_get
+from dependencies.get_storage import get_storage
+from storage.base import BlobStorage
 
 router = APIRouter()
 
 # GET ALL ============================================================================
-@router.get("/users", response_model=list[UserSchema])
-def get_users(db: Session = Depends(get_db)):
-    users = db.query(UserModel).all()
-    return users
+@router.get("/users", response_model=Page[UserSchema], dependencies=[Depends(conditional_get("users", public=True))])
+def get_users(page: PageParams = Depends(get_page_params), db: Session = Depends(get_read_db)):
+    return paginate(db.query(UserModel), page, UserModel.created_at, UserModel.id)
 
 # GET ONE ===========================================================================
 @router.get("/users/{user_id}", response_model=UserSchema)
@@ -24,7 +33,7 @@ def get_single_user(user_id: int, db: Session = Depends(get_db)):
 
 # UPDATE =============================================================================
 # @router.put("/users/{user_id}", response_model=UserSchema)
-# def update_user(user_id: int, user: UpdateUserSchema, db: Session = Depends(get_db), current_user: UserModel = Depends(get_current_user)):
+# def update_user(user_id: int, user: UpdateUserSchema, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_principal)):
 #     db_user = db.query(UserModel).filter(UserModel.id == user_id).first()
 #     if not db_user:
 #         raise HTTPException(status_code=404, detail="User not found")
@@ -41,7 +50,7 @@ def get_single_user(user_id: int, db: Session = Depends(get_db)):
 
 # DELETE ===============================================================================
 @router.delete("/users/{user_id}")
-def delete_user(user_id: int, db: Session = Depends(get_db), current_user: UserModel = Depends(get_current_user)):
+def delete_user(user_id: int, db: Session = Depends(get_db), storage: Optional[BlobStorage] = Depends(get_storage), current_user: Principal = Depends(get_current_principal)):
     db_user = db.query(UserModel).filter(UserModel.id == user_id).first()
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -49,6 +58,18 @@ def delete_user(user_id: int, db: Session = Depends(get_db), current_user: UserM
     if db_user.id != current_user.id:
         raise HTTPException(status_code=403, detail="Operation forbidden")
 
+    # Their notes go with them through the cascade, so drop the references those
+    # notes hold on deduplicated blobs first; sorted to lock blob rows in a fixed order
+    content_hashes = db.scalars(
+        select(NoteModel.content_hash)
+        .where(NoteModel.uploader_id == user_id, NoteModel.content_hash.isnot(None))
+        .order_by(NoteModel.content_hash)
+    ).all()
+    unused_keys = [key for key in (release_blob(db, content_hash) for content_hash in content_hashes) if key]
+
     db.delete(db_user)
     db.commit()
+    invalidate_principal(user_id)
+    if unused_keys and storage:
+        storage.delete_many(unused_keys)
     return {"message": f"User with ID {user_id} has been deleted"}
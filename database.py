@@ -1,9 +1,116 @@
-from sqlalchemy import create_engine
+import bisect
+import itertools
+import threading
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
-from config.environment import db_URI
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from config.environment import db_URI, get_settings
+from utils.ttl_cache import TTLCache
+
+settings = get_settings()
+
+# Upper bounds (ms) of the checkout wait histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    """How long requests wait to check a connection out of the pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+            self.count = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+            self.timeouts = 0
+
+    def observe(self, wait_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.buckets[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+            self.count += 1
+            self.total_ms += wait_ms
+            self.max_ms = max(self.max_ms, wait_ms)
+            self.timeouts += timed_out
+
+    def histogram(self) -> dict:
+        labels = [f"le_{bound}ms" for bound in WAIT_BUCKETS_MS] + ["inf"]
+        return dict(zip(labels, self.buckets))
+
+
+pool_metrics = PoolMetrics()
+
+
+class CheckoutTimer:
+    """Pool mixin that records every checkout in pool_metrics"""
+
+    def connect(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except PoolTimeout:
+            timed_out = True
+            raise
+        finally:
+            pool_metrics.observe((time.perf_counter() - start) * 1000, timed_out)
+
+
+class TimedQueuePool(CheckoutTimer, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(CheckoutTimer, AsyncAdaptedQueuePool):
+    pass
+
+
+# Async drivers for the same databases: asyncpg for Postgres, aiosqlite locally
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_url(url: str):
+    url = make_url(url.replace("postgres://", "postgresql://", 1))
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if not driver:
+        raise ValueError(f"No async driver configured for {url.get_backend_name()}")
+    # psycopg2-only query options such as sslmode are not understood by asyncpg
+    if driver == "asyncpg" and "sslmode" in url.query:
+        url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": url.query["sslmode"]})
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}")
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory SQLite lives in a single connection; leave its pool alone
+        return {}
+
+    options = {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url.get_backend_name() == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
 
 engine = create_engine(
-    db_URI
+    db_URI,
+    **engine_options(db_URI)
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -14,3 +121,207 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# The hot read paths and auth run on the event loop with their own pool;
+# everything else still uses the sync engine above
+async_engine = create_async_engine(
+    async_url(db_URI),
+    **engine_options(db_URI, is_async=True)
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# READ REPLICAS ================================================================
+# Seconds the replica is behind the primary; 0 when fully replayed or not a standby
+POSTGRES_REPLICA_LAG = text("""
+    SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END
+""")
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_engine(url, **engine_options(url))
+        self.async_engine = create_async_engine(async_url(url), **engine_options(url, is_async=True))
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.AsyncSessionLocal = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+        self.healthy = True
+        self.lag = 0.0
+        self.error = None
+        # Sessions currently handed out, for least_connections balancing
+        self.in_use = 0
+
+    def check(self, max_lag: float) -> None:
+        try:
+            with self.engine.connect() as conn:
+                if self.engine.dialect.name == "postgresql":
+                    self.lag = float(conn.execute(POSTGRES_REPLICA_LAG).scalar() or 0)
+                else:
+                    conn.execute(text("SELECT 1"))
+                    self.lag = 0.0
+            self.error = None
+            self.healthy = self.lag <= max_lag
+        except Exception as e:
+            self.error = str(e)
+            self.healthy = False
+
+
+class ReplicaRouter:
+    """
+    Picks a healthy read replica for a session, or None to use the primary.
+
+    A background thread re-checks every replica each `interval` seconds and
+    takes lagging or unreachable ones out of rotation until they recover.
+    Callers that just wrote are kept on the primary for `sticky_seconds`
+    (tracked per worker) so they read their own writes.
+    """
+
+    def __init__(self, urls: list[str], balancing: str, sticky_seconds: float, max_lag: float, interval: float):
+        self.replicas = [Replica(url) for url in urls]
+        self.balancing = balancing
+        self.max_lag = max_lag
+        self.interval = interval
+        self._recent_writers = TTLCache(maxsize=100_000, ttl=sticky_seconds)
+        self._round_robin = itertools.count()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def __bool__(self):
+        return bool(self.replicas)
+
+    def pick(self, caller=None):
+        if caller is not None and self._recent_writers.get(caller):
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        if self.balancing == "least_connections":
+            return min(healthy, key=lambda replica: replica.in_use)
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    def remember_write(self, caller) -> None:
+        if self.replicas:
+            self._recent_writers.set(caller, True)
+
+    def acquire(self, replica: Replica) -> None:
+        with self._lock:
+            replica.in_use += 1
+
+    def release(self, replica: Replica) -> None:
+        with self._lock:
+            replica.in_use -= 1
+
+    def check_health(self) -> None:
+        for replica in self.replicas:
+            replica.check(self.max_lag)
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            self.check_health()
+
+    def start(self):
+        if self._thread or not self.replicas:
+            return
+        self.check_health()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> list[dict]:
+        return [{
+            "replica": replica.name,
+            "healthy": replica.healthy,
+            "lag_seconds": round(replica.lag, 3),
+            "in_use": replica.in_use,
+            "error": replica.error,
+        } for replica in self.replicas]
+
+
+replicas = ReplicaRouter(
+    [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()],
+    balancing=settings.REPLICA_BALANCING,
+    sticky_seconds=settings.REPLICA_STICKY_SECONDS,
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    interval=settings.REPLICA_HEALTH_INTERVAL_SECONDS
+)
+
+
+def _queue_pool_stats(pool) -> dict:
+    stats = {"pool": pool.__class__.__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            # overflow() starts at -pool_size and counts up as connections are opened
+            overflow=max(pool.overflow(), 0),
+            max_overflow=settings.DB_MAX_OVERFLOW,
+        )
+    return stats
+
+
+def pool_stats() -> dict:
+    stats = _queue_pool_stats(engine.pool)
+    stats["async"] = _queue_pool_stats(async_engine.pool)
+    stats["replicas"] = replicas.stats()
+    # Checkout waits from both pools
+    stats["checkout_wait"] = {
+        "count": pool_metrics.count,
+        "avg_ms": round(pool_metrics.total_ms / pool_metrics.count, 3) if pool_metrics.count else 0,
+        "max_ms": round(pool_metrics.max_ms, 3),
+        "timeouts": pool_metrics.timeouts,
+        "histogram": pool_metrics.histogram(),
+    }
+    return stats
+
+
+def warm_up_pool(connections: int = settings.DB_POOL_MIN_CONNECTIONS) -> int:
+    """
+    Open `connections` connections up front and hand them back to the pool,
+    so the first requests after a deploy don't pay for the TCP/TLS/auth
+    handshakes. Returns how many were opened.
+    """
+    if not isinstance(engine.pool, QueuePool):
+        return 0
+    opened = []
+    try:
+        for _ in range(min(connections, settings.DB_POOL_SIZE)):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            opened.append(conn)
+    finally:
+        for conn in opened:
+            conn.close()
+    # Warm-up checkouts would skew the wait histogram
+    pool_metrics.reset()
+    return len(opened)
+
+
+async def warm_up_async_pool(connections: int = settings.DB_POOL_MIN_CONNECTIONS) -> int:
+    if not isinstance(async_engine.pool, QueuePool):
+        return 0
+    opened = []
+    try:
+        for _ in range(min(connections, settings.DB_POOL_SIZE)):
+            conn = await async_engine.connect()
+            opened.append(conn)
+            await conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            await conn.close()
+    pool_metrics.reset()
+    return len(opened)
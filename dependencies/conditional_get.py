@@ -0,0 +1,77 @@
+import hashlib
+from typing import Callable, Optional
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+from config.environment import get_settings
+from dependencies.get_current_user import Principal, get_current_principal
+from dependencies.get_read_db import get_async_read_db, get_read_db
+from models.table_version import get_versions, get_versions_async
+
+settings = get_settings()
+
+# Scope key under which public routes hand their tables and versions to utils/response_cache.py
+CACHEABLE = "response_cache"
+
+
+def make_etag(*parts) -> str:
+    return f'W/"{hashlib.sha256(repr(parts).encode()).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    strip = lambda tag: tag.strip().removeprefix("W/")
+    return strip(etag) in {strip(tag) for tag in if_none_match.split(",")}
+
+
+def check_not_modified(request: Request, response: Response, versions: Optional[tuple],
+                       user_id: Optional[int], extra: Optional[Callable] = None) -> None:
+    """
+    Answer 304 (by raising) when the client's ETag still matches, otherwise
+    set ETag and Cache-Control on the response the route is about to build.
+    The ETag covers the table versions, the caller (for private routes) and
+    the path and query string, so every page and filter has its own.
+    """
+    if versions is None:
+        return
+    etag = make_etag(versions, user_id, request.url.path, request.url.query, extra() if extra else None)
+    if user_id is None:
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.PUBLIC_CACHE_MAX_AGE_SECONDS}, must-revalidate"}
+    else:
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+
+def conditional_get(*tables: str, db_dependency=get_read_db, public: bool = False, extra: Optional[Callable] = None):
+    """
+    Route dependency for sync GET routes whose response only changes when
+    `tables` do: answers If-None-Match with a 304 before the route runs its
+    query. `db_dependency` must be the one the route uses, so both read the
+    same session (and the same replica). Public routes get a shared ETag and
+    a cacheable Cache-Control, and their 200s are stored by the response
+    cache; the rest are per caller.
+    """
+    if public:
+        def check(request: Request, response: Response, db: Session = Depends(db_dependency)):
+            versions = get_versions(db, tables)
+            check_not_modified(request, response, versions, None, extra)
+            if versions is not None and extra is None:
+                request.scope[CACHEABLE] = (tables, versions)
+    else:
+        def check(request: Request, response: Response, db: Session = Depends(db_dependency),
+                  current_user: Principal = Depends(get_current_principal)):
+            check_not_modified(request, response, get_versions(db, tables), current_user.id, extra)
+    return check
+
+
+def async_conditional_get(*tables: str, db_dependency=get_async_read_db, extra: Optional[Callable] = None):
+    """conditional_get() for async routes, which are all per caller"""
+    async def check(request: Request, response: Response, db=Depends(db_dependency),
+                    current_user: Principal = Depends(get_current_principal)):
+        check_not_modified(request, response, await get_versions_async(db, tables), current_user.id, extra)
+    return check
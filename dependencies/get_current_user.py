@@ -1,21 +1,72 @@
+import hashlib
+import time
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from models.user import UserModel
-from database import get_db
+from models.user import UserModel, UserRole
+from database import AsyncSessionLocal, get_db
 import jwt
 from jwt import DecodeError, ExpiredSignatureError
-from config.environment import secret
+from config.environment import get_settings, secret
+from utils.ttl_cache import TTLCache
 
 http_bearer = HTTPBearer()
 
-def get_current_user(db: Session = Depends(get_db), token: HTTPAuthorizationCredentials = Depends(http_bearer)):
+settings = get_settings()
+
+
+class Principal:
+    """
+    The authenticated caller as plain, immutable data. Safe to share across
+    requests and threads, unlike an ORM instance bound to one session.
+    """
+    __slots__ = ("id", "name", "email", "role", "major")
+
+    def __init__(self, id: int, name: str, email: str, role: UserRole, major: str = None):
+        object.__setattr__(self, "id", id)
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "email", email)
+        object.__setattr__(self, "role", role)
+        object.__setattr__(self, "major", major)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Principal is immutable")
+
+    def __repr__(self):
+        return f"Principal(id={self.id}, role={self.role.value})"
+
+
+# Per-worker, keyed by user id. Other workers only notice a deleted user once
+# their entry expires, so keep the TTL short
+principal_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+# Claims of tokens that already passed signature and expiry checks, keyed by
+# a digest of the raw token. Each entry expires with its token's exp
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=0)
+
+
+def invalidate_principal(user_id: int) -> None:
+    principal_cache.pop(user_id)
+
+
+def decode_token(token: HTTPAuthorizationCredentials) -> dict:
+    """
+    Verify the bearer token once and serve repeats from the token cache.
+    The returned claims are shared between requests; treat them as read-only.
+    """
+    key = hashlib.sha256(token.credentials.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token.credentials, secret, algorithms=["HS256"])
-        user = db.query(UserModel).filter(UserModel.id == payload.get("sub")).first()
-
-        if not user:
-            raise HTTPException(status_code=401,detail="Invalid username or password")
+        remaining = payload.get("exp", 0) - time.time()
+        if remaining > 0:
+            token_cache.set(key, payload, ttl=remaining)
+        return payload
 
     except DecodeError as e:
         raise HTTPException(status_code=403,detail=f'Could not decode token: {str(e)}')
@@ -23,4 +74,40 @@ def get_current_user(db: Session = Depends(get_db), token: HTTPAuthorizationCred
     except ExpiredSignatureError:
         raise HTTPException(status_code=403,detail='Token has expired')
 
+
+def get_current_user(db: Session = Depends(get_db), token: HTTPAuthorizationCredentials = Depends(http_bearer)):
+    payload = decode_token(token)
+    user = db.query(UserModel).filter(UserModel.id == payload.get("sub")).first()
+
+    if not user:
+        raise HTTPException(status_code=401,detail="Invalid username or password")
+
     return user
+
+
+async def get_current_principal(token: HTTPAuthorizationCredentials = Depends(http_bearer)) -> Principal:
+    """
+    For routes that only need the caller's id and role. Served from the
+    principal cache; only a miss touches the database, and only then is a
+    session opened.
+    """
+    payload = decode_token(token)
+    try:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=403, detail="Could not decode token: invalid subject")
+
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(select(
+                UserModel.id, UserModel.name, UserModel.email, UserModel.role, UserModel.major
+            ).where(UserModel.id == user_id))).first()
+
+        if not row:
+            raise HTTPException(status_code=401,detail="Invalid username or password")
+
+        principal = Principal(*row)
+        principal_cache.set(user_id, principal)
+
+    return principal
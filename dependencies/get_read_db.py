@@ -0,0 +1,58 @@
+import hashlib
+from fastapi import Request
+from database import AsyncSessionLocal, SessionLocal, replicas
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def caller_key(request: Request):
+    """Who is asking, for read-your-writes: a digest of the bearer token"""
+    authorization = request.headers.get("authorization")
+    return hashlib.sha256(authorization.encode()).digest() if authorization else None
+
+
+def remember_write(request: Request) -> None:
+    key = caller_key(request)
+    if key is not None:
+        replicas.remember_write(key)
+
+
+def pick_replica(request: Request):
+    if not replicas or request.method not in SAFE_METHODS:
+        return None
+    return replicas.pick(caller_key(request))
+
+
+def get_read_db(request: Request):
+    """get_db() for read-only routes: a replica session when one is usable, else the primary"""
+    replica = pick_replica(request)
+    if not replica:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+        return
+
+    replicas.acquire(replica)
+    db = replica.SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        replicas.release(replica)
+
+
+async def get_async_read_db(request: Request):
+    replica = pick_replica(request)
+    if not replica:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    replicas.acquire(replica)
+    try:
+        async with replica.AsyncSessionLocal() as db:
+            yield db
+    finally:
+        replicas.release(replica)
@@ -0,0 +1,29 @@
+from functools import lru_cache
+from typing import Optional
+from config.environment import get_settings
+from storage.base import BlobStorage
+
+
+@lru_cache
+def load_storage() -> Optional[BlobStorage]:
+    """
+    The configured blob store, built once per worker. None when it can't be
+    set up, so routes can report storage as unavailable instead of failing
+    at import time.
+    """
+    settings = get_settings()
+    try:
+        if settings.STORAGE_BACKEND == "local":
+            from storage.local_storage import LocalBlobStorage
+            return LocalBlobStorage(settings.LOCAL_STORAGE_PATH)
+
+        from storage.azure_storage import AzureBlobStorage
+        return AzureBlobStorage.from_settings(settings)
+    except Exception as e:
+        print(f"Warning: Could not initialize {settings.STORAGE_BACKEND} storage: {e}")
+        return None
+
+
+async def get_storage() -> Optional[BlobStorage]:
+    # Async so async routes don't hop to the threadpool for a cached object
+    return load_storage()
@@ -0,0 +1,105 @@
+import base64
+import json
+from datetime import datetime
+from typing import Callable, Optional
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import and_, or_
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class PageParams(BaseModel):
+    limit: int = DEFAULT_PAGE_SIZE
+    cursor: Optional[str] = None
+
+
+async def get_page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None)
+) -> PageParams:
+    return PageParams(limit=limit, cursor=cursor)
+
+
+# CURSOR ENCODING ==============================================================
+def encode_cursor(values: tuple) -> str:
+    encoded = [["dt", v.isoformat()] if isinstance(v, datetime) else ["v", v] for v in values]
+    raw = json.dumps(encoded, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _cursor_types(column) -> tuple:
+    """Python types a cursor may carry for `column`"""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        # Untyped expressions, i.e. the search rank functions
+        return (int, float)
+    return (int, float) if python_type is float else (python_type,)
+
+def decode_cursor(cursor: str, columns: tuple) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = tuple(datetime.fromisoformat(v) if tag == "dt" else v for tag, v in json.loads(raw))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if len(values) != len(columns):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Anything else would reach the database as a bad bind parameter and fail there with a 500
+    for value, column in zip(values, columns):
+        if isinstance(value, bool) or not isinstance(value, _cursor_types(column)):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+# KEYSET PAGINATION ============================================================
+def _sort_value(item, column):
+    """Read a sort key off an entity, or off a (entity, extra columns...) row"""
+    if isinstance(item, Row):
+        if column.key in item._fields:
+            return getattr(item, column.key)
+        item = item[0]
+    return getattr(item, column.key)
+
+def seek_after(columns: tuple, values: tuple):
+    """Rows strictly after `values` when sorting by `columns` descending"""
+    clause = columns[-1] < values[-1]
+    for column, value in zip(reversed(columns[:-1]), reversed(values[:-1])):
+        clause = or_(column < value, and_(column == value, clause))
+    return clause
+
+def _seek_page(query, page: PageParams, columns: tuple):
+    if page.cursor:
+        query = query.filter(seek_after(columns, decode_cursor(page.cursor, columns)))
+    return query.order_by(*[column.desc() for column in columns]).limit(page.limit + 1)
+
+def _build_page(rows: list, page: PageParams, columns: tuple, transform: Optional[Callable], transform_all: Optional[Callable]) -> dict:
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        next_cursor = encode_cursor(tuple(_sort_value(rows[-1], column) for column in columns))
+
+    if transform_all:
+        items = transform_all(rows)
+    else:
+        items = [transform(row) for row in rows] if transform else rows
+    return {"items": items, "next_cursor": next_cursor}
+
+def paginate(query, page: PageParams, *columns, transform: Optional[Callable] = None, transform_all: Optional[Callable] = None) -> dict:
+    """
+    Seek-based pagination, newest first. `columns` must end with a unique
+    column (normally the primary key) so every row has a distinct position.
+    `transform` maps each row; `transform_all` maps the page's rows at once.
+    """
+    return _build_page(_seek_page(query, page, columns).all(), page, columns, transform, transform_all)
+
+async def paginate_async(db: AsyncSession, statement, page: PageParams, *columns, transform: Optional[Callable] = None,
+                         transform_all: Optional[Callable] = None) -> dict:
+    """paginate() for a select() run on an AsyncSession"""
+    result = await db.execute(_seek_page(statement, page, columns))
+    # select(Model) yields entities, select(Model, extra...) yields rows like Query does
+    rows = result.scalars().all() if len(statement.column_descriptions) == 1 else result.all()
+    return _build_page(rows, page, columns, transform, transform_all)
@@ -1,16 +1,75 @@
 # HELP!
-from fastapi import FastAPI, Depends
-from controllers.auth import router as AuthRouter
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from controllers.auth import router as AuthRouter, password_hasher
 from controllers.classes import router as ClassesRouter
 from controllers.students_classes import router as Students_ClassesRouter
 from controllers.users import router as UsersRouter
 from controllers.graduates_projects import router as Graduate_ProjectRouter
 from controllers.announcements import router as AnnouncementsRouter
-from controllers.notes import router as NotesRouter
+from controllers.notes import router as NotesRouter, reaction_buffer
+from controllers.note_uploads import router as NoteUploadsRouter
 from controllers.posts import router as PostsRouter
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from database import async_engine, pool_stats, replicas, warm_up_async_pool, warm_up_pool
+from dependencies.get_read_db import SAFE_METHODS, remember_write
+from utils.query_stats import QueryStats, current_stats
+from utils.metrics import MetricsExporter, MetricsMiddleware, RequestMetrics
+from utils.body_limit import FORM_OVERHEAD_BYTES, BodySizeLimitMiddleware
+from utils.profiling import ProfilerMiddleware
+from utils.response_cache import ResponseCacheMiddleware, make_response_cache
+from config.environment import get_settings
 
-app = FastAPI()
+settings = get_settings()
+
+request_metrics = RequestMetrics()
+metrics_exporter = MetricsExporter(request_metrics, settings.METRICS_DIR, settings.METRICS_FLUSH_SECONDS)
+
+response_cache = None
+if settings.RESPONSE_CACHE_ENABLED:
+    response_cache = make_response_cache(settings.RESPONSE_CACHE_MAX_BYTES, settings.RESPONSE_CACHE_REDIS_URL,
+                                         settings.RESPONSE_CACHE_TTL_SECONDS)
+    request_metrics.collectors.append(response_cache.samples)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the minimum pool connections before the first request needs them
+    try:
+        await run_in_threadpool(warm_up_pool)
+        await warm_up_async_pool()
+    except Exception as e:
+        print(f"Warning: Could not warm up the database pool: {e}")
+    # Spin up the bcrypt workers and calibrate the cost before taking traffic
+    password_hasher.start()
+    if settings.REACTION_WRITE_BEHIND:
+        reaction_buffer.start()
+    # Health-check read replicas, if any are configured
+    replicas.start()
+    if settings.METRICS_ENABLED:
+        metrics_exporter.start()
+    yield
+    metrics_exporter.stop()
+    replicas.stop()
+    # Flush buffered like counters before the worker exits
+    reaction_buffer.stop()
+    password_hasher.stop()
+    await async_engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
+
+# Innermost, so CORS, query stats and metrics apply to cached responses too
+if response_cache is not None:
+    app.add_middleware(
+        ResponseCacheMiddleware,
+        cache=response_cache,
+        max_entry_bytes=settings.RESPONSE_CACHE_MAX_ENTRY_BYTES,
+        stale_seconds=settings.RESPONSE_CACHE_STALE_SECONDS
+    )
+
+# The largest upload plus its form fields; inside CORS so browsers can read the 413
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024 + FORM_OVERHEAD_BYTES)
 
 origins = ['*']
 
@@ -21,6 +80,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    response = await call_next(request)
+    # A successful write pins this caller's reads to the primary for a moment
+    if replicas and request.method not in SAFE_METHODS and response.status_code < 400:
+        remember_write(request)
+    return response
+
+@app.middleware("http")
+async def query_stats(request: Request, call_next):
+    if not settings.DB_QUERY_STATS:
+        return await call_next(request)
+    stats = QueryStats()
+    token = current_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        current_stats.reset(token)
+    response.headers["X-DB-Queries"] = str(stats.count)
+    response.headers["X-DB-Time"] = f"{stats.total_ms:.1f}ms"
+    for statement, count in stats.repeated(settings.DB_N_PLUS_ONE_THRESHOLD):
+        print(f"Warning: Likely N+1 on {request.method} {request.url.path}: {count}x {' '.join(statement.split())[:200]}")
+    return response
+
+# Not installed at all unless profiling is configured
+if settings.PROFILER_SECRET or settings.PROFILER_SAMPLE_RATE > 0:
+    app.add_middleware(
+        ProfilerMiddleware,
+        directory=settings.PROFILER_DIR,
+        secret=settings.PROFILER_SECRET,
+        sample_rate=settings.PROFILER_SAMPLE_RATE,
+        interval_ms=settings.PROFILER_INTERVAL_MS,
+        max_files=settings.PROFILER_MAX_FILES
+    )
+
+# Outermost, so the timings include every other middleware
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, metrics=request_metrics)
+
 # Register all routers
 app.include_router(AuthRouter, prefix='/api')
 app.include_router(ClassesRouter, prefix='/api')
@@ -28,9 +126,28 @@ app.include_router(Students_ClassesRouter, prefix='/api')
 app.include_router(UsersRouter, prefix="/api") 
 app.include_router(Graduate_ProjectRouter, prefix="/api") 
 app.include_router(AnnouncementsRouter, prefix="/api")
+app.include_router(NoteUploadsRouter, prefix="/api")
 app.include_router(NotesRouter, prefix="/api")
 app.include_router(PostsRouter, prefix="/api")
 
 @app.get('/')
 def home():
-    return {'msg': 'HELP!'}
\ No newline at end of file
+    return {'msg': 'HELP!'}
+
+@app.get('/health/db')
+def database_health():
+    return pool_stats()
+
+@app.get('/health/cache')
+def response_cache_health():
+    # This worker's counters; /metrics has them summed across workers
+    if response_cache is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return response_cache.stats()
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics():
+    # On the event loop, alongside the middleware that updates the counters
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(metrics_exporter.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,37 @@
+"""
+Bring the database schema up to date.
+
+    python migrate.py                 # apply every pending migration
+    python migrate.py --target 0003   # stop after 0003
+    python migrate.py status          # list applied and pending migrations
+
+Migrations live in migrations/versions as NNNN_description.py modules with
+an upgrade(conn) function. Modules that set `transactional = False` run in
+autocommit mode, which Postgres needs for CREATE INDEX CONCURRENTLY.
+"""
+import argparse
+from sqlalchemy import create_engine
+from config.environment import db_URI
+from migrations.runner import applied_versions, discover, migrate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", nargs="?", choices=["upgrade", "status"], default="upgrade")
+    parser.add_argument("--target", help="last version to apply")
+    parser.add_argument("--url", default=db_URI, help="database URL (defaults to DATABASE_URL)")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    if args.command == "status":
+        done = applied_versions(engine)
+        for migration in discover():
+            print(f"[{'x' if migration.version in done else ' '}] {migration.version} {migration.description}")
+        return
+
+    applied = migrate(engine, target=args.target)
+    print(f"✓ Applied {len(applied)} migration(s)" if applied else "✓ Schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+
+def has_table(conn: Connection, table: str) -> bool:
+    return inspect(conn).has_table(table)
+
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(col["name"] == column for col in inspect(conn).get_columns(table))
+
+
+def add_column(conn: Connection, table: str, column: str, ddl_type: str) -> None:
+    if not has_column(conn, table, column):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+def is_indexed(conn: Connection, table: str, columns: list[str], unique: bool = False) -> bool:
+    """Whether some index (or unique constraint) already covers exactly these columns"""
+    inspector = inspect(conn)
+    indexes = [(index["column_names"], index["unique"]) for index in inspector.get_indexes(table)]
+    indexes += [(constraint["column_names"], True) for constraint in inspector.get_unique_constraints(table)]
+    return any(list(cols) == list(columns) and (is_unique or not unique) for cols, is_unique in indexes)
+
+
+def create_index(conn: Connection, name: str, table: str, columns: list[str], unique: bool = False) -> None:
+    """
+    Build an index without blocking writes where the database allows it.
+
+    On Postgres this is CREATE INDEX CONCURRENTLY, so the calling migration
+    must set `transactional = False`. A concurrent build that failed earlier
+    leaves an INVALID index behind; that one is dropped and rebuilt rather
+    than skipped by IF NOT EXISTS.
+    """
+    unique_sql = "UNIQUE " if unique else ""
+    column_sql = ", ".join(columns)
+
+    if conn.dialect.name != "postgresql":
+        if is_indexed(conn, table, columns, unique):
+            return
+        conn.execute(text(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table} ({column_sql})"))
+        return
+
+    valid = conn.execute(text("""
+        SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = :name
+    """), {"name": name}).scalar()
+    if valid is False:
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    elif valid is None and is_indexed(conn, table, columns, unique):
+        return
+    conn.execute(text(f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({column_sql})"))
+
+
+def drop_index(conn: Connection, name: str) -> None:
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    else:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
@@ -0,0 +1,100 @@
+import importlib
+import pkgutil
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import ModuleType
+from sqlalchemy import Column, DateTime, MetaData, String, Table, func, select, text
+from sqlalchemy.engine import Engine
+
+VERSIONS_PACKAGE = "migrations.versions"
+
+# Arbitrary key for pg_advisory_lock so two deploys never migrate at once
+MIGRATION_LOCK_ID = 7_305_118
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", String, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+
+@dataclass
+class Migration:
+    version: str
+    description: str
+    module: ModuleType
+
+    @property
+    def transactional(self) -> bool:
+        # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+        return getattr(self.module, "transactional", True)
+
+
+def discover() -> list[Migration]:
+    """Every module in migrations/versions, ordered by its NNNN_ prefix"""
+    package = importlib.import_module(VERSIONS_PACKAGE)
+    migrations = []
+    for info in pkgutil.iter_modules(package.__path__):
+        version, _, _ = info.name.partition("_")
+        if not version.isdigit():
+            continue
+        module = importlib.import_module(f"{VERSIONS_PACKAGE}.{info.name}")
+        migrations.append(Migration(version, (module.__doc__ or info.name).strip().splitlines()[0], module))
+    migrations.sort(key=lambda migration: migration.version)
+
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions in {VERSIONS_PACKAGE}: {versions}")
+    return migrations
+
+
+def applied_versions(engine: Engine) -> set[str]:
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        return set(conn.scalars(select(schema_migrations.c.version)))
+
+
+@contextmanager
+def migration_lock(engine: Engine):
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+
+
+def pending(engine: Engine) -> list[Migration]:
+    done = applied_versions(engine)
+    return [migration for migration in discover() if migration.version not in done]
+
+
+def migrate(engine: Engine, target: str = None, log=print) -> list[Migration]:
+    """
+    Apply pending migrations in order, up to and including `target`.
+
+    Transactional migrations run and are recorded in one transaction.
+    Non-transactional ones (concurrent index builds) run in autocommit mode
+    and are recorded afterwards, so they must be safe to re-run after a
+    failure partway through.
+    """
+    applied = []
+    with migration_lock(engine):
+        for migration in pending(engine):
+            if target and migration.version > target:
+                break
+            log(f"Applying {migration.version}: {migration.description}")
+            if migration.transactional:
+                with engine.begin() as conn:
+                    migration.module.upgrade(conn)
+                    conn.execute(schema_migrations.insert().values(version=migration.version, description=migration.description))
+            else:
+                with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    migration.module.upgrade(conn)
+                    conn.execute(schema_migrations.insert().values(version=migration.version, description=migration.description))
+            applied.append(migration)
+    return applied
@@ -0,0 +1,16 @@
+"""Create any missing tables from the models
+
+A new database gets the whole current schema here, indexes and search DDL
+included, which makes every later migration a no-op. On a database created
+before migrations existed, only the tables it lacks are created and the
+later migrations bring the existing tables up to date.
+"""
+from sqlalchemy.engine import Connection
+from models.base import Base
+from models.classes import ClassModel  # noqa: F401  (registers the remaining mappers)
+from models.upload_session import UploadSessionModel  # noqa: F401
+from models.user import UserModel  # noqa: F401
+
+
+def upgrade(conn: Connection) -> None:
+    Base.metadata.create_all(bind=conn)
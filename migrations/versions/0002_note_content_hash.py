@@ -0,0 +1,19 @@
+"""Content-addressed note files: notes.content_hash, non-unique file_key
+
+Notes with identical content now share one blob, so the old UNIQUE on
+notes.file_key goes. SQLite can't drop an inline constraint without
+rebuilding the table, which 0007 does.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from migrations.ops import add_column, create_index
+
+transactional = False
+
+
+def upgrade(conn: Connection) -> None:
+    add_column(conn, "notes", "content_hash", "VARCHAR(64)")
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE notes DROP CONSTRAINT IF EXISTS notes_file_key_key"))
+    create_index(conn, "ix_notes_file_key", "notes", ["file_key"])
+    create_index(conn, "ix_notes_content_hash", "notes", ["content_hash"])
@@ -0,0 +1,15 @@
+"""Full-text search index for notes
+
+Postgres: generated search_vector column plus GIN and trigram indexes.
+SQLite: FTS5 table with sync triggers. Adding the stored generated column
+rewrites the notes table, so run this one off-peak.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from models.note import POSTGRES_SEARCH_DDL, SQLITE_SEARCH_DDL
+
+
+def upgrade(conn: Connection) -> None:
+    statements = {"postgresql": POSTGRES_SEARCH_DDL, "sqlite": SQLITE_SEARCH_DDL}.get(conn.dialect.name, [])
+    for statement in statements:
+        conn.execute(text(statement))
@@ -0,0 +1,29 @@
+"""One reaction per user per note: unique (note_id, user_id) on note_likes
+
+Duplicate reactions left by the old read-then-write toggle are removed
+first (the oldest row wins) and the note counters recounted. If a new
+duplicate slips in before the index is built, the build fails; just run
+the migration again.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from migrations.ops import create_index
+
+transactional = False
+
+
+def upgrade(conn: Connection) -> None:
+    # The clean-up is atomic; only the index build below runs outside a transaction
+    with conn.engine.begin() as tx:
+        removed = tx.execute(text("""
+            DELETE FROM note_likes WHERE id NOT IN (
+                SELECT MIN(id) FROM note_likes GROUP BY note_id, user_id
+            )
+        """)).rowcount
+        if removed:
+            tx.execute(text("""
+                UPDATE notes SET
+                    likes_count = (SELECT COUNT(*) FROM note_likes WHERE note_likes.note_id = notes.id AND is_like = 1),
+                    dislikes_count = (SELECT COUNT(*) FROM note_likes WHERE note_likes.note_id = notes.id AND is_like = -1)
+            """))
+    create_index(conn, "uq_note_likes_note_user", "note_likes", ["note_id", "user_id"], unique=True)
@@ -0,0 +1,20 @@
+"""Indexes for the foreign keys and sort orders the controllers filter on"""
+from sqlalchemy.engine import Connection
+from migrations.ops import create_index
+
+transactional = False
+
+HOT_PATH_INDEXES = [
+    ("ix_notes_uploader_id", "notes", ["uploader_id"]),
+    ("ix_notes_created_at_id", "notes", ["created_at", "id"]),
+    ("ix_announcements_class_id_event_date", "announcements", ["class_id", "event_date"]),
+    ("ix_students_classes_student_id_class_id", "students_classes", ["student_id", "class_id"]),
+    ("ix_classes_doctor_id", "classes", ["doctor_id"]),
+    ("ix_posts_institute_id", "posts", ["institute_id"]),
+    ("ix_graduate_projects_user_id", "graduate_projects", ["user_id"]),
+]
+
+
+def upgrade(conn: Connection) -> None:
+    for name, table, columns in HOT_PATH_INDEXES:
+        create_index(conn, name, table, columns)
@@ -0,0 +1,17 @@
+"""Generation counters per table for ETags"""
+import time
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+from models.base import Base
+from models.table_version import table_versions
+
+
+def upgrade(conn: Connection) -> None:
+    table_versions.create(bind=conn, checkfirst=True)
+    seeded = set(conn.scalars(select(table_versions.c.table_name)))
+    # Start from the clock rather than 0, so a recreated database never
+    # hands out validators that clients already hold
+    start = int(time.time() * 1000)
+    rows = [{"table_name": name, "version": start} for name in Base.metadata.tables if name not in seeded]
+    if rows:
+        conn.execute(table_versions.insert(), rows)
@@ -0,0 +1,51 @@
+"""Drop the old UNIQUE on notes.file_key from SQLite databases
+
+0002 dropped it on Postgres, but SQLite can't drop an inline constraint,
+so notes sharing a deduplicated blob failed with IntegrityError on
+databases created before then. SQLite's copy-and-rename procedure
+rebuilds the table from the current model instead; its indexes and the
+FTS5 sync triggers are recreated and the search index rebuilt. Databases
+without the constraint, and Postgres, are left alone.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateIndex, CreateTable
+from migrations.ops import is_indexed
+from models.note import SQLITE_SEARCH_DDL, NoteModel
+
+# Foreign keys can only be switched off outside a transaction
+transactional = False
+
+
+def upgrade(conn: Connection) -> None:
+    if conn.dialect.name != "sqlite" or not is_indexed(conn, "notes", ["file_key"], unique=True):
+        return
+
+    notes = NoteModel.__table__
+    existing = {column["name"] for column in inspect(conn).get_columns("notes")}
+    columns = ", ".join(column.name for column in notes.columns if column.name in existing)
+    create_sql = str(CreateTable(notes).compile(dialect=conn.dialect)).strip()
+
+    # PRAGMA foreign_keys is per connection and ignored inside a transaction, so the
+    # rebuild runs as an explicit transaction on this (autocommit) connection. With
+    # foreign keys on, dropping the old table would cascade into note_likes
+    foreign_keys = conn.exec_driver_sql("PRAGMA foreign_keys").scalar()
+    conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+    conn.exec_driver_sql("BEGIN")
+    try:
+        conn.exec_driver_sql("DROP TABLE IF EXISTS notes_new")
+        conn.exec_driver_sql(create_sql.replace("CREATE TABLE notes ", "CREATE TABLE notes_new ", 1))
+        conn.exec_driver_sql(f"INSERT INTO notes_new ({columns}) SELECT {columns} FROM notes")
+        # Takes the old indexes and the FTS triggers with it
+        conn.exec_driver_sql("DROP TABLE notes")
+        conn.exec_driver_sql("ALTER TABLE notes_new RENAME TO notes")
+        for index in notes.indexes:
+            conn.execute(CreateIndex(index))
+        for statement in SQLITE_SEARCH_DDL:
+            conn.execute(text(statement))
+        conn.exec_driver_sql("COMMIT")
+    except BaseException:
+        conn.exec_driver_sql("ROLLBACK")
+        raise
+    finally:
+        conn.exec_driver_sql(f"PRAGMA foreign_keys={'ON' if foreign_keys else 'OFF'}")
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Index, Integer, String, ForeignKey, DateTime, Text
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
 class AnnouncementModel(BaseModel):
     __tablename__ = "announcements"
+    __table_args__ = (
+        # A class's announcements, newest event first
+        Index("ix_announcements_class_id_event_date", "class_id", "event_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
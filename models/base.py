@@ -1,11 +1,19 @@
 from sqlalchemy import Column, DateTime, Integer, func
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
+# SQLite's CURRENT_TIMESTAMP has no fractional part; bind values in the same
+# format so keyset cursors on created_at compare equal to stored values
+Timestamp = DateTime().with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite"
+)
+
 class BaseModel(Base):
     __abstract__ = True 
 
     id = Column(Integer, primary_key=True, index=True)
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    created_at = Column(Timestamp, default=func.now())
+    updated_at = Column(Timestamp, default=func.now(), onupdate=func.now())
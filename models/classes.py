@@ -11,7 +11,7 @@ class ClassModel(BaseModel):
     id = Column(Integer, primary_key=True, index=True)
 
     name = Column(String, nullable=False)
-    doctor_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    doctor_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
 
     doctor = relationship("UserModel", back_populates="classes", passive_deletes=True)
     enrollments = relationship("StudentClassModel",back_populates="class_",cascade="all, delete-orphan",passive_deletes=True)
@@ -15,5 +15,5 @@ class GraduateProjectModel(BaseModel):
     contact_phone = Column(String, nullable=True)
     linkedin = Column(String, nullable=True)
 
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     user = relationship("UserModel", back_populates="projects")
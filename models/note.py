@@ -1,16 +1,20 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
+from sqlalchemy import DDL, Column, Index, Integer, String, ForeignKey, Text, UniqueConstraint, event
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
 class NoteModel(BaseModel):
     __tablename__ = "notes"
+    __table_args__ = (
+        # Keyset pagination order for GET /notes
+        Index("ix_notes_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
     # File information
     title = Column(String, nullable=False)
     file_name = Column(String, nullable=False)  # Original filename
-    file_key = Column(String, nullable=False, unique=True)  # S3 key/path
+    file_key = Column(String, nullable=False, index=True)  # Blob key/path; shared by notes with identical content
     file_type = Column(String, nullable=False)  # pdf, docx, image, etc.
     file_size = Column(Integer, nullable=True)  # in bytes
     
@@ -24,19 +28,40 @@ class NoteModel(BaseModel):
     description = Column(Text, nullable=True)
     
     # Uploader information
-    uploader_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    uploader_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # Likes/Dislikes count
     likes_count = Column(Integer, default=0)
     dislikes_count = Column(Integer, default=0)
     
+    # SHA-256 of the file content, set for files uploaded through the API
+    content_hash = Column(String(64), nullable=True, index=True)
+    
     # Relationships
     uploader = relationship("UserModel", back_populates="notes", passive_deletes=True)
     likes = relationship("NoteLikeModel", back_populates="note", cascade="all, delete-orphan", passive_deletes=True)
 
 
+class NoteBlobModel(BaseModel):
+    __tablename__ = "note_blobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # One stored blob per distinct file content
+    content_hash = Column(String(64), nullable=False, unique=True)
+    file_key = Column(String, nullable=False, unique=True)
+    file_size = Column(Integer, nullable=False)  # in bytes
+    
+    # Number of notes using this blob; the blob is deleted when it reaches 0
+    ref_count = Column(Integer, nullable=False, default=1)
+
+
 class NoteLikeModel(BaseModel):
     __tablename__ = "note_likes"
+    __table_args__ = (
+        # One reaction per user per note; the like toggle upserts against this
+        UniqueConstraint("note_id", "user_id", name="uq_note_likes_note_user"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
@@ -48,4 +73,58 @@ class NoteLikeModel(BaseModel):
     
     # Relationships
     note = relationship("NoteModel", back_populates="likes", passive_deletes=True)
-    user = relationship("UserModel", back_populates="note_likes", passive_deletes=True)
\ No newline at end of file
+    user = relationship("UserModel", back_populates="note_likes", passive_deletes=True)
+
+# FULL-TEXT SEARCH =============================================================
+# The search index lives outside the ORM mapping: a generated tsvector column
+# with GIN indexes on Postgres, and an external-content FTS5 table kept in sync
+# by triggers on SQLite. See models/note_search.py for the query side.
+FTS_COLUMNS = ("title", "course_code", "course_name", "doctor_name", "description")
+
+POSTGRES_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE notes ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(course_code, '') || ' ' || coalesce(doctor_name, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(course_name, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_notes_search_vector ON notes USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_notes_title_trgm ON notes USING GIN (title gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_notes_course_code_trgm ON notes USING GIN (course_code gin_trgm_ops)",
+]
+
+_fts_new = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+_fts_old = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+SQLITE_SEARCH_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+        {", ".join(FTS_COLUMNS)}, content='notes', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_fts_ai AFTER INSERT ON notes BEGIN
+        INSERT INTO notes_fts(rowid, {", ".join(FTS_COLUMNS)}) VALUES (new.id, {_fts_new});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_fts_ad AFTER DELETE ON notes BEGIN
+        INSERT INTO notes_fts(notes_fts, rowid, {", ".join(FTS_COLUMNS)}) VALUES ('delete', old.id, {_fts_old});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_fts_au AFTER UPDATE ON notes BEGIN
+        INSERT INTO notes_fts(notes_fts, rowid, {", ".join(FTS_COLUMNS)}) VALUES ('delete', old.id, {_fts_old});
+        INSERT INTO notes_fts(rowid, {", ".join(FTS_COLUMNS)}) VALUES (new.id, {_fts_new});
+    END
+    """,
+    "INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')",
+]
+
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(NoteModel.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(NoteModel.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(NoteModel.__table__, "before_drop", DDL("DROP TABLE IF EXISTS notes_fts").execute_if(dialect="sqlite"))
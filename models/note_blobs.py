@@ -0,0 +1,67 @@
+from typing import Optional
+from sqlalchemy import delete, func, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from .note import NoteModel, NoteBlobModel
+
+_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+
+def add_blob_reference(db: Session, content_hash: str) -> Optional[str]:
+    """If this content is already stored, take a reference to it and return its key"""
+    row = db.execute(
+        update(NoteBlobModel)
+        .where(NoteBlobModel.content_hash == content_hash)
+        .values(ref_count=NoteBlobModel.ref_count + 1)
+        .returning(NoteBlobModel.file_key)
+    ).first()
+    return row[0] if row else None
+
+
+def register_blob(db: Session, content_hash: str, file_key: str, file_size: int) -> str:
+    """
+    Record a freshly stored blob with one reference and return `file_key`.
+    If a concurrent upload registered the same content first, reference that
+    one instead and return its key; the caller should delete its own copy.
+    """
+    registered = db.execute(
+        _INSERTS[db.get_bind().dialect.name](NoteBlobModel)
+        .values(content_hash=content_hash, file_key=file_key, file_size=file_size, ref_count=1)
+        .on_conflict_do_nothing(index_elements=["content_hash"])
+    ).rowcount
+    if registered:
+        return file_key
+    return add_blob_reference(db, content_hash)
+
+
+def release_blob(db: Session, content_hash: str) -> Optional[str]:
+    """Drop one reference; returns the blob key once nothing uses it, so it can be deleted"""
+    row = db.execute(
+        update(NoteBlobModel)
+        .where(NoteBlobModel.content_hash == content_hash)
+        .values(ref_count=NoteBlobModel.ref_count - 1)
+        .returning(NoteBlobModel.file_key, NoteBlobModel.ref_count)
+    ).first()
+    if not row or row.ref_count > 0:
+        return None
+
+    db.execute(delete(NoteBlobModel).where(NoteBlobModel.content_hash == content_hash, NoteBlobModel.ref_count <= 0))
+    return row.file_key
+
+
+def dedup_report(db: Session) -> dict:
+    notes, logical_bytes = db.query(
+        func.count(NoteModel.id), func.coalesce(func.sum(NoteModel.file_size), 0)
+    ).filter(NoteModel.content_hash.isnot(None)).one()
+    blobs, stored_bytes = db.query(
+        func.count(NoteBlobModel.id), func.coalesce(func.sum(NoteBlobModel.file_size), 0)
+    ).one()
+    return {
+        "notes": notes,
+        "blobs": blobs,
+        "logical_bytes": logical_bytes,
+        "stored_bytes": stored_bytes,
+        "saved_bytes": logical_bytes - stored_bytes,
+        "dedup_ratio": logical_bytes / stored_bytes if stored_bytes else 1.0,
+    }
@@ -0,0 +1,172 @@
+import threading
+import traceback
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from .note import NoteModel, NoteLikeModel
+
+# A toggle only retries when another request changes the same reaction between
+# two of its statements, so a couple of attempts is plenty
+MAX_TOGGLE_ATTEMPTS = 3
+
+_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+
+class ReactionConflict(Exception):
+    pass
+
+
+def _deltas(is_like: int, step: int) -> tuple[int, int]:
+    return (step, 0) if is_like == 1 else (0, step)
+
+
+def toggle_reaction(db: Session, note_id: int, user_id: int, is_like: int) -> tuple[str, int, int]:
+    """
+    Apply one like/dislike click and return (message, likes_delta, dislikes_delta).
+
+    Every branch is a single conditional statement against the unique
+    (note_id, user_id) row, so a delta is only reported for a row change that
+    actually happened. Apply the deltas in the same transaction.
+    """
+    insert = _INSERTS[db.get_bind().dialect.name]
+    own_reaction = (NoteLikeModel.note_id == note_id) & (NoteLikeModel.user_id == user_id)
+
+    for _ in range(MAX_TOGGLE_ATTEMPTS):
+        added = db.execute(
+            insert(NoteLikeModel)
+            .values(note_id=note_id, user_id=user_id, is_like=is_like)
+            .on_conflict_do_nothing(index_elements=["note_id", "user_id"])
+        ).rowcount
+        if added:
+            return ("Reaction added", *_deltas(is_like, 1))
+
+        # Same action again toggles it off
+        removed = db.execute(
+            delete(NoteLikeModel).where(own_reaction, NoteLikeModel.is_like == is_like)
+        ).rowcount
+        if removed:
+            return ("Reaction removed", *_deltas(is_like, -1))
+
+        # Change from like to dislike or vice versa
+        switched = db.execute(
+            update(NoteLikeModel).where(own_reaction, NoteLikeModel.is_like == -is_like).values(is_like=is_like)
+        ).rowcount
+        if switched:
+            likes, dislikes = _deltas(is_like, 1)
+            old_likes, old_dislikes = _deltas(-is_like, -1)
+            return ("Reaction updated", likes + old_likes, dislikes + old_dislikes)
+
+    raise ReactionConflict()
+
+
+def apply_reaction_counts(db: Session, note_id: int, likes_delta: int, dislikes_delta: int) -> tuple[int, int]:
+    """Add the deltas in SQL so concurrent writers never overwrite each other; returns the new counts"""
+    return db.execute(
+        update(NoteModel)
+        .where(NoteModel.id == note_id)
+        .values(
+            likes_count=NoteModel.likes_count + likes_delta,
+            dislikes_count=NoteModel.dislikes_count + dislikes_delta
+        )
+        .returning(NoteModel.likes_count, NoteModel.dislikes_count)
+    ).one()
+
+
+# WRITE-BEHIND COUNTERS ========================================================
+class ReactionCounterBuffer:
+    """
+    Per-worker accumulator for likes/dislikes counter deltas.
+
+    Reaction rows are still written by the request; only the hot `notes` row
+    update is deferred. A background thread folds the pending deltas into one
+    batched UPDATE every `interval` seconds, sooner once `max_pending` clicks
+    are waiting, and once more on stop().
+    """
+
+    def __init__(self, session_factory, interval: float, max_pending: int):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending: dict[int, list[int]] = {}
+        self._pending_clicks = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def add(self, db: Session, note_id: int, likes_delta: int, dislikes_delta: int) -> tuple[int, int]:
+        """Queue the deltas and return the best-known counts for the note"""
+        with self._lock:
+            pending = self._pending.setdefault(note_id, [0, 0])
+            pending[0] += likes_delta
+            pending[1] += dislikes_delta
+            pending_likes, pending_dislikes = pending
+            self._pending_clicks += 1
+            if self._pending_clicks >= self.max_pending:
+                self._wake.set()
+
+        likes, dislikes = db.execute(
+            select(NoteModel.likes_count, NoteModel.dislikes_count).where(NoteModel.id == note_id)
+        ).one()
+        return likes + pending_likes, dislikes + pending_dislikes
+
+    def flush(self) -> int:
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            clicks, self._pending_clicks = self._pending_clicks, 0
+
+        # Sorted so concurrent flushes from other workers lock rows in the same order
+        rows = [
+            {"note_id": note_id, "likes_delta": likes, "dislikes_delta": dislikes}
+            for note_id, (likes, dislikes) in sorted(batch.items())
+            if likes or dislikes
+        ]
+        if not rows:
+            return 0
+
+        notes = NoteModel.__table__
+        try:
+            with self.session_factory() as db:
+                db.execute(
+                    update(notes)
+                    .where(notes.c.id == bindparam("note_id"))
+                    .values(
+                        likes_count=notes.c.likes_count + bindparam("likes_delta"),
+                        dislikes_count=notes.c.dislikes_count + bindparam("dislikes_delta")
+                    ),
+                    rows
+                )
+                db.commit()
+        except Exception:
+            # Keep the deltas for the next attempt rather than dropping clicks
+            traceback.print_exc()
+            with self._lock:
+                for row in rows:
+                    pending = self._pending.setdefault(row["note_id"], [0, 0])
+                    pending[0] += row["likes_delta"]
+                    pending[1] += row["dislikes_delta"]
+                self._pending_clicks += clicks
+            return 0
+        return len(rows)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        if self._thread:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="reaction-counter-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._stopping.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
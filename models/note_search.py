@@ -0,0 +1,67 @@
+import html
+import re
+from typing import Optional
+from sqlalchemy import column, func, literal_column, or_, table
+from .note import NoteModel
+
+# The database marks matches with private-use characters; snippet_html()
+# escapes the note text around them and only then turns them into <mark>
+SNIPPET_START = "\ue000"
+SNIPPET_STOP = "\ue001"
+
+_search_vector = literal_column("notes.search_vector")
+_notes_fts = literal_column("notes_fts")
+_notes_fts_table = table("notes_fts", column("rowid"))
+
+
+def _fts5_query(term: str) -> str:
+    """Quote every token so user input can't inject FTS5 syntax; prefix-match the last one"""
+    tokens = re.findall(r"\w+", term)
+    if not tokens:
+        return '""'
+    quoted = ['"' + token + '"' for token in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def snippet_html(snippet: Optional[str]) -> Optional[str]:
+    """A raw search snippet as safe HTML: the note text escaped, matches wrapped in <mark>"""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(SNIPPET_START, "<mark>").replace(SNIPPET_STOP, "</mark>")
+
+
+def apply_note_search(query, term: str, dialect: str):
+    """
+    Filter `query` (a Query or a select()) to notes matching `term` and add `search_rank` (higher is
+    better) and raw `search_snippet` columns (see snippet_html()). Returns (query, rank) so callers can
+    order or paginate on the rank expression, or (query, None) on databases
+    without a search index, where it falls back to substring matching.
+    """
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery("english", term)
+        rank = (func.ts_rank_cd(_search_vector, tsquery) + func.similarity(NoteModel.title, term)).label("search_rank")
+        snippet = func.ts_headline(
+            "english",
+            func.coalesce(NoteModel.description, NoteModel.title),
+            tsquery,
+            f'StartSel="{SNIPPET_START}", StopSel="{SNIPPET_STOP}", MaxFragments=2, MinWords=5, MaxWords=20'
+        ).label("search_snippet")
+        query = query.filter(or_(_search_vector.op("@@")(tsquery), NoteModel.title.op("%")(term)))
+        return query.add_columns(rank, snippet), rank
+
+    if dialect == "sqlite":
+        # bm25() is lower-is-better; weights follow FTS_COLUMNS order
+        rank = (-func.bm25(_notes_fts, 10.0, 5.0, 3.0, 5.0, 1.0)).label("search_rank")
+        snippet = func.snippet(_notes_fts, -1, SNIPPET_START, SNIPPET_STOP, "…", 16).label("search_snippet")
+        query = query.join(_notes_fts_table, _notes_fts_table.c.rowid == NoteModel.id).filter(
+            _notes_fts.op("MATCH")(_fts5_query(term))
+        )
+        return query.add_columns(rank, snippet), rank
+
+    query = query.filter(
+        (NoteModel.title.ilike(f"%{term}%")) |
+        (NoteModel.description.ilike(f"%{term}%")) |
+        (NoteModel.doctor_name.ilike(f"%{term}%"))
+    )
+    return query, None
@@ -9,7 +9,7 @@ class PostModel(BaseModel):
     title = Column(String, nullable=False)
     description = Column(Text, nullable=False)
     image_url = Column(String, nullable=True)
-    institute_id = Column(Integer, ForeignKey("users.id"))  
+    institute_id = Column(Integer, ForeignKey("users.id"), index=True)  
 
 
     institute = relationship("UserModel", back_populates="posts") 
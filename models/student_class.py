@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Index, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
 class StudentClassModel(BaseModel):
 
     __tablename__ = "students_classes"
+    __table_args__ = (
+        Index("ix_students_classes_student_id_class_id", "student_id", "class_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -0,0 +1,121 @@
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy import BigInteger, Column, String, event, select, update
+from sqlalchemy.orm import Session
+from .base import Base
+
+# Generation counters behind the ETags in dependencies/conditional_get.py.
+# A commit that writes to a table bumps its row right after the commit, in
+# its own autocommit statement. Bumping inside the writer's transaction would
+# hold the table's one counter row locked until commit, so every writer to
+# that table would queue behind it. Readers fetch the versions before the
+# data, so in the moment between the commit and the bump they label new data
+# with the old version. The bump then invalidates that label, and a page is
+# never labelled newer than its content. Replicas apply the bump after the data.
+CHANGED_TABLES = "changed_tables"
+COMMITTED_TABLES = "committed_tables"
+
+
+class TableVersionModel(Base):
+    __tablename__ = "table_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+
+table_versions = TableVersionModel.__table__
+
+
+@lru_cache(maxsize=None)
+def cascaded_tables(table_name: str) -> frozenset[str]:
+    """`table_name` plus every table its deletes reach through ON DELETE CASCADE"""
+    reached = {table_name}
+    pending = [table_name]
+    while pending:
+        parent = pending.pop()
+        for table in Base.metadata.tables.values():
+            for fk in table.foreign_keys:
+                if fk.column.table.name == parent and fk.ondelete == "CASCADE" and table.name not in reached:
+                    reached.add(table.name)
+                    pending.append(table.name)
+    return frozenset(reached)
+
+
+def mark_changed(db: Session, *tables: str) -> None:
+    db.info.setdefault(CHANGED_TABLES, set()).update(tables)
+
+
+def _versions_query(tables):
+    return select(table_versions.c.table_name, table_versions.c.version).where(table_versions.c.table_name.in_(tables))
+
+
+def _ordered(rows, tables) -> Optional[tuple]:
+    # A table without a counter row never changes version; give it no validator at all
+    versions = dict(rows)
+    return tuple(versions[table] for table in tables) if all(table in versions for table in tables) else None
+
+
+def get_versions(db: Session, tables) -> Optional[tuple]:
+    return _ordered(db.execute(_versions_query(tables)).all(), tables)
+
+
+async def get_versions_async(db, tables) -> Optional[tuple]:
+    return _ordered((await db.execute(_versions_query(tables))).all(), tables)
+
+
+# Registered on the Session class, so sync sessions, AsyncSession (which
+# wraps one) and the reaction flush thread are all covered
+@event.listens_for(Session, "after_flush")
+def _track_flushed_tables(db, flush_context):
+    for obj in db.new | db.dirty:
+        mark_changed(db, obj.__table__.name)
+    for obj in db.deleted:
+        mark_changed(db, *cascaded_tables(obj.__table__.name))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement_tables(state):
+    # Core and bulk writes run through session.execute(), e.g. the like toggle
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    name = state.statement.table.name
+    if name != TableVersionModel.__tablename__:
+        mark_changed(state.session, *(cascaded_tables(name) if state.is_delete else (name,)))
+
+
+def bump_versions(engine, tables) -> None:
+    """Advance the counters of `tables`, one autocommit statement each, so no row lock outlives its UPDATE"""
+    try:
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            for name in sorted(tables):
+                conn.execute(update(table_versions).where(table_versions.c.table_name == name)
+                             .values(version=table_versions.c.version + 1))
+    except Exception as e:
+        # The data is committed either way; until the next write these tables keep serving old ETags
+        print(f"Warning: Could not bump table versions for {', '.join(sorted(tables))}: {e}")
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_committed(db):
+    # Commit has flushed by now, so every write of the transaction is tracked
+    changed = db.info.pop(CHANGED_TABLES, None)
+    if changed:
+        db.info.setdefault(COMMITTED_TABLES, set()).update(changed)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _bump_versions(db, transaction):
+    # Fires once the session has handed its connection back, so the bump never waits on a
+    # pool slot its own session is holding. AsyncSession commits run in a greenlet, where
+    # the sync engine API works as well
+    if transaction.parent is not None:
+        return
+    committed = db.info.pop(COMMITTED_TABLES, None)
+    if committed:
+        bump_versions(db.get_bind().engine, committed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changes(db):
+    db.info.pop(CHANGED_TABLES, None)
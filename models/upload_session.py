@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from .base import BaseModel
+
+class UploadSessionModel(BaseModel):
+    __tablename__ = "upload_sessions"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Public handle for the session; the blob's staged blocks are the upload state
+    upload_id = Column(String, nullable=False, unique=True, index=True)
+    file_key = Column(String, nullable=False, unique=True)
+    file_name = Column(String, nullable=False)
+    file_size = Column(Integer, nullable=False)  # in bytes
+    block_size = Column(Integer, nullable=False)  # in bytes; every block but the last is exactly this size
+    content_hash = Column(String(64), nullable=True)  # SHA-256 declared by the client, lets duplicates skip the upload
+
+    uploader_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
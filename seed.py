@@ -7,6 +7,8 @@ from data.announcement_data import create_announcements
 from data.post_data import create_posts
 from models.base import Base
 from data.graduate_project_data import create_graduate_projects
+from migrations.runner import migrate, schema_migrations
+from models.table_version import TableVersionModel  # noqa: F401  (recreated too, and ORM writes bump it)
 
 
 engine = create_engine(db_URI)
@@ -15,7 +17,8 @@ SessionLocal = sessionmaker(bind=engine)
 try:
     print("Recreating database...")
     Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
+    schema_migrations.drop(bind=engine, checkfirst=True)
+    migrate(engine, log=lambda message: None)
 
     print("Seeding the database...")
     db = SessionLocal()
@@ -24,6 +24,10 @@ class NoteSchema(BaseModel):
     user_like_status: Optional[int] = None  # 1 for liked, -1 for disliked, None for no action
     download_url: Optional[str] = None  # Presigned URL for download
 
+    # Only set when listing with ?search=
+    search_rank: Optional[float] = None  # Higher is more relevant
+    search_snippet: Optional[str] = None  # Matched text with <mark> highlights
+
     class Config:
         from_attributes = True
 
@@ -0,0 +1,41 @@
+from typing import Iterable, List, Optional
+from pydantic import BaseModel, TypeAdapter
+
+
+class OrmListAdapter:
+    """
+    Builds response models for many ORM rows in one pydantic-core call.
+
+    Validating with from_attributes reads every field through SQLAlchemy's
+    instrumented attributes, which costs several times more than the
+    validation itself. A row whose columns are all loaded is validated from
+    its instance __dict__ instead; expired or partly loaded rows still go
+    through their attributes, so they load as usual. Each model is built
+    once, extras included, and FastAPI passes model instances through its
+    response validation untouched before dumping them straight to JSON bytes.
+    """
+
+    def __init__(self, schema: type[BaseModel], model):
+        self.schema = schema
+        self.adapter = TypeAdapter(List[schema])
+        # Schema fields the model stores in columns; the rest come from extras or defaults.
+        # Read off the table, so this works before the mappers are configured
+        self.columns = frozenset(schema.model_fields) & {column.key for column in model.__table__.columns}
+
+    def _values(self, obj, extra: Optional[dict]):
+        if self.columns <= obj.__dict__.keys():
+            return {**obj.__dict__, **extra} if extra else obj.__dict__
+        if not extra:
+            return obj
+        return {**{name: getattr(obj, name) for name in self.columns}, **extra}
+
+    def validate(self, objects: Iterable, extras: Optional[Iterable[dict]] = None) -> list:
+        """Models for `objects`, each updated with the matching dict from `extras`"""
+        if extras is None:
+            values = [self._values(obj, None) for obj in objects]
+        else:
+            values = [self._values(obj, extra) for obj, extra in zip(objects, extras)]
+        return self.adapter.validate_python(values, from_attributes=True)
+
+    def validate_one(self, obj, extra: Optional[dict] = None):
+        return self.validate([obj], [extra])[0]
@@ -8,7 +8,7 @@ class PostCreateSchema(BaseModel):
     image_url: Optional[str] = None
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 
 class PostUpdateSchema(BaseModel):
@@ -17,7 +17,7 @@ class PostUpdateSchema(BaseModel):
     image_url: Optional[str] = None
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 
 class PostSchema(BaseModel):
@@ -28,4 +28,4 @@ class PostSchema(BaseModel):
     institute_id: int
 
     class Config:
-        orm_mode = True
+        from_attributes = True
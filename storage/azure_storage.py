@@ -0,0 +1,163 @@
+import base64
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, Optional
+import requests
+from azure.core.exceptions import ResourceNotFoundError
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.blob import BlobBlock, BlobSasPermissions, BlobServiceClient, ContentSettings, generate_blob_sas
+from .base import DEFAULT_CHUNK_SIZE, READ, WRITE, BlobInfo, BlobNotFound, BlobStorage, ByteStream
+
+# Blob batch requests accept at most 256 sub-requests
+DELETE_BATCH_SIZE = 256
+
+# Backdate SAS start times to tolerate clock skew between us and Azure
+SAS_CLOCK_SKEW = timedelta(minutes=5)
+
+SAS_PERMISSIONS = {
+    READ: BlobSasPermissions(read=True),
+    WRITE: BlobSasPermissions(create=True, write=True),
+}
+
+
+def _block_id(index: int) -> str:
+    # Block ids must be base64 and all the same length within a blob
+    return base64.b64encode(f"{index:08d}".encode()).decode()
+
+
+def _block_index(block_id: str) -> int:
+    return int(base64.b64decode(block_id))
+
+
+def _blob_info(properties) -> BlobInfo:
+    content_settings = getattr(properties, "content_settings", None)
+    return BlobInfo(
+        key=properties.name,
+        size=properties.size,
+        created_at=properties.creation_time,
+        content_type=content_settings.content_type if content_settings else None
+    )
+
+
+class AzureBlobStorage(BlobStorage):
+
+    def __init__(self, service_client: BlobServiceClient, container_name: str):
+        self.service_client = service_client
+        self.container_client = service_client.get_container_client(container_name)
+
+    @classmethod
+    def from_settings(cls, settings) -> "AzureBlobStorage":
+        """
+        One pooled HTTP session per worker, shared by every blob call. Set
+        AZURE_STORAGE_CONNECTION_STRING=UseDevelopmentStorage=true (or point
+        AZURE_STORAGE_ENDPOINT at http://127.0.0.1:10000/devstoreaccount1) to
+        run against Azurite.
+        """
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=settings.AZURE_STORAGE_POOL_SIZE,
+            pool_maxsize=settings.AZURE_STORAGE_POOL_SIZE
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        transport = RequestsTransport(
+            session=session,
+            session_owner=False,
+            connection_timeout=settings.AZURE_STORAGE_CONNECT_TIMEOUT,
+            read_timeout=settings.AZURE_STORAGE_READ_TIMEOUT
+        )
+
+        if settings.AZURE_STORAGE_CONNECTION_STRING:
+            service_client = BlobServiceClient.from_connection_string(
+                settings.AZURE_STORAGE_CONNECTION_STRING, transport=transport
+            )
+        else:
+            account = settings.AZURE_STORAGE_ACCOUNT_NAME
+            service_client = BlobServiceClient(
+                account_url=settings.AZURE_STORAGE_ENDPOINT or f"https://{account}.blob.core.windows.net",
+                credential={"account_name": account, "account_key": settings.AZURE_STORAGE_ACCOUNT_KEY},
+                transport=transport
+            )
+        return cls(service_client, settings.AZURE_STORAGE_CONTAINER_NAME)
+
+    def exists(self, key: str) -> bool:
+        return self.container_client.get_blob_client(key).exists()
+
+    def stat(self, key: str) -> BlobInfo:
+        try:
+            return _blob_info(self.container_client.get_blob_client(key).get_blob_properties())
+        except ResourceNotFoundError:
+            raise BlobNotFound(key)
+
+    def list_prefix(self, prefix: str, page_size: int, continuation_token: Optional[str] = None) -> Iterator[tuple[list[BlobInfo], Optional[str]]]:
+        pages = self.container_client.list_blobs(name_starts_with=prefix, results_per_page=page_size).by_page(
+            continuation_token=continuation_token
+        )
+        for page in pages:
+            yield [_blob_info(blob) for blob in page], pages.continuation_token
+
+    def open_range(self, key: str, offset: int = 0, length: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            downloader = self.container_client.get_blob_client(key).download_blob(
+                offset=offset, length=length, max_chunk_get_size=chunk_size
+            )
+        except ResourceNotFoundError:
+            raise BlobNotFound(key)
+        return downloader.chunks()
+
+    def put_stream(self, key: str, stream: ByteStream, content_type: Optional[str] = None) -> BlobInfo:
+        blob_client = self.container_client.get_blob_client(key)
+        blob_client.upload_blob(
+            stream,
+            overwrite=True,
+            content_settings=ContentSettings(content_type=content_type) if content_type else None
+        )
+        return self.stat(key)
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        keys = list(keys)
+        deleted = 0
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            responses = self.container_client.delete_blobs(
+                *keys[start:start + DELETE_BATCH_SIZE], raise_on_any_failure=False
+            )
+            deleted += sum(1 for response in responses if response.status_code == 202)
+        return deleted
+
+    def signed_url(self, key: str, permission: str, expires_in: timedelta) -> Optional[str]:
+        account_key = getattr(self.service_client.credential, "account_key", None)
+        if not account_key:
+            return None
+
+        now = datetime.now(timezone.utc)
+        sas = generate_blob_sas(
+            account_name=self.service_client.account_name,
+            container_name=self.container_client.container_name,
+            blob_name=key,
+            account_key=account_key,
+            permission=SAS_PERMISSIONS[permission],
+            start=now - SAS_CLOCK_SKEW,
+            expiry=now + expires_in
+        )
+        return f"{self.container_client.get_blob_client(key).url}?{sas}"
+
+    def stage_block(self, key: str, index: int, data: bytes) -> None:
+        self.container_client.get_blob_client(key).stage_block(_block_id(index), data, length=len(data))
+
+    def list_staged_blocks(self, key: str) -> set[int]:
+        try:
+            _, uncommitted = self.container_client.get_blob_client(key).get_block_list("uncommitted")
+        except ResourceNotFoundError:
+            return set()
+        return {_block_index(block.id) for block in uncommitted}
+
+    def commit_blocks(self, key: str, block_count: int, content_type: Optional[str] = None) -> BlobInfo:
+        blob_client = self.container_client.get_blob_client(key)
+        blob_client.commit_block_list(
+            [BlobBlock(block_id=_block_id(index)) for index in range(block_count)],
+            content_settings=ContentSettings(content_type=content_type) if content_type else None
+        )
+        return self.stat(key)
+
+    def discard_blocks(self, key: str) -> None:
+        # Azure garbage-collects uncommitted blocks after a week
+        pass
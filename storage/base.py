@@ -0,0 +1,84 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import BinaryIO, Iterable, Iterator, Optional, Union
+
+# put_stream accepts a file-like object or any iterable of byte chunks
+ByteStream = Union[BinaryIO, Iterable[bytes]]
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Signed URL permissions
+READ = "read"
+WRITE = "write"
+
+
+@dataclass(frozen=True)
+class BlobInfo:
+    key: str
+    size: int
+    created_at: Optional[datetime] = None
+    content_type: Optional[str] = None
+
+
+class BlobNotFound(Exception):
+    pass
+
+
+class BlobStorage(ABC):
+    """Everything the API needs from a blob store. Keys are '/'-separated paths."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def stat(self, key: str) -> BlobInfo:
+        """Raises BlobNotFound"""
+
+    @abstractmethod
+    def list_prefix(self, prefix: str, page_size: int, continuation_token: Optional[str] = None) -> Iterator[tuple[list[BlobInfo], Optional[str]]]:
+        """
+        Yield (blobs, next_token) one listing page at a time, in key order.
+        Pass a page's next_token back in to resume after it; None means done.
+        """
+
+    @abstractmethod
+    def open_range(self, key: str, offset: int = 0, length: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Stream `length` bytes (or to the end) starting at `offset`. Raises BlobNotFound"""
+
+    @abstractmethod
+    def put_stream(self, key: str, stream: ByteStream, content_type: Optional[str] = None) -> BlobInfo:
+        """Write (or overwrite) a blob without holding the whole body in memory"""
+
+    @abstractmethod
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete the blobs that exist; returns how many were deleted"""
+
+    def signed_url(self, key: str, permission: str, expires_in: timedelta) -> Optional[str]:
+        """
+        A URL that lets a client READ or WRITE the blob directly until it
+        expires, or None if this backend can't mint one.
+        """
+        return None
+
+    # BLOCK UPLOADS ============================================================
+    # Large files are sent as numbered blocks that can be staged in parallel
+    # and in any order, then committed as one blob. Staged blocks survive
+    # across requests, which is what makes upload sessions resumable.
+
+    @abstractmethod
+    def stage_block(self, key: str, index: int, data: bytes) -> None:
+        ...
+
+    @abstractmethod
+    def list_staged_blocks(self, key: str) -> set[int]:
+        """Indexes of blocks staged for `key` but not committed yet"""
+
+    @abstractmethod
+    def commit_blocks(self, key: str, block_count: int, content_type: Optional[str] = None) -> BlobInfo:
+        """Assemble blocks 0..block_count-1 into the blob, replacing any existing one"""
+
+    @abstractmethod
+    def discard_blocks(self, key: str) -> None:
+        """Drop uncommitted blocks for an abandoned upload"""
@@ -0,0 +1,150 @@
+import bisect
+import mimetypes
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from functools import partial
+from typing import Iterable, Iterator, Optional
+from .base import DEFAULT_CHUNK_SIZE, BlobInfo, BlobNotFound, BlobStorage, ByteStream
+
+
+# Staged blocks live under this directory inside the root, outside the key space
+STAGING_DIR = ".staging"
+
+
+class LocalBlobStorage(BlobStorage):
+    """Blobs as plain files under `root`, for offline development, tests and benchmarks"""
+
+    def __init__(self, root: str):
+        self.root = os.path.realpath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _staging_path(self, key: str) -> str:
+        return os.path.join(self.root, STAGING_DIR, os.path.relpath(self._path(key), self.root))
+
+    def _path(self, key: str) -> str:
+        path = os.path.realpath(os.path.join(self.root, key))
+        if os.path.commonpath([path, self.root]) != self.root or path == self.root:
+            raise ValueError(f"Invalid blob key: {key}")
+        return path
+
+    def _key(self, path: str) -> str:
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def _info(self, key: str, path: str) -> BlobInfo:
+        stat = os.stat(path)
+        return BlobInfo(
+            key=key,
+            size=stat.st_size,
+            created_at=datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+            content_type=mimetypes.guess_type(key)[0]
+        )
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def stat(self, key: str) -> BlobInfo:
+        path = self._path(key)
+        if not os.path.isfile(path):
+            raise BlobNotFound(key)
+        return self._info(key, path)
+
+    def list_prefix(self, prefix: str, page_size: int, continuation_token: Optional[str] = None) -> Iterator[tuple[list[BlobInfo], Optional[str]]]:
+        # Only walk the directory the prefix points into
+        directory = os.path.join(self.root, os.path.dirname(prefix))
+        keys = []
+        for dirpath, dirnames, filenames in os.walk(directory):
+            # Skip staging directories and in-progress writes
+            dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            for filename in filenames:
+                if filename.startswith("."):
+                    continue
+                key = self._key(os.path.join(dirpath, filename))
+                if key.startswith(prefix):
+                    keys.append(key)
+        keys.sort()
+
+        # The continuation token is the last key of the previous page
+        start = bisect.bisect_right(keys, continuation_token) if continuation_token else 0
+        while start < len(keys):
+            page = keys[start:start + page_size]
+            start += len(page)
+            next_token = page[-1] if start < len(keys) else None
+            yield [self._info(key, self._path(key)) for key in page], next_token
+
+    def open_range(self, key: str, offset: int = 0, length: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        path = self._path(key)
+        if not os.path.isfile(path):
+            raise BlobNotFound(key)
+
+        def chunks():
+            remaining = length
+            with open(path, "rb") as file:
+                file.seek(offset)
+                while remaining is None or remaining > 0:
+                    chunk = file.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    if remaining is not None:
+                        remaining -= len(chunk)
+                    yield chunk
+        return chunks()
+
+    def put_stream(self, key: str, stream: ByteStream, content_type: Optional[str] = None) -> BlobInfo:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        if hasattr(stream, "read"):
+            stream = iter(partial(stream.read, DEFAULT_CHUNK_SIZE), b"")
+
+        # Write next to the target and rename so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                for chunk in stream:
+                    file.write(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return self._info(key, path)
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        deleted = 0
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+                deleted += 1
+            except FileNotFoundError:
+                pass
+        return deleted
+
+    def stage_block(self, key: str, index: int, data: bytes) -> None:
+        directory = self._staging_path(key)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".block-")
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, os.path.join(directory, f"{index:08d}"))
+
+    def list_staged_blocks(self, key: str) -> set[int]:
+        directory = self._staging_path(key)
+        if not os.path.isdir(directory):
+            return set()
+        return {int(name) for name in os.listdir(directory) if name.isdigit()}
+
+    def commit_blocks(self, key: str, block_count: int, content_type: Optional[str] = None) -> BlobInfo:
+        directory = self._staging_path(key)
+
+        def blocks():
+            for index in range(block_count):
+                with open(os.path.join(directory, f"{index:08d}"), "rb") as file:
+                    yield from iter(lambda: file.read(DEFAULT_CHUNK_SIZE), b"")
+
+        info = self.put_stream(key, blocks(), content_type)
+        self.discard_blocks(key)
+        return info
+
+    def discard_blocks(self, key: str) -> None:
+        shutil.rmtree(self._staging_path(key), ignore_errors=True)
@@ -0,0 +1,45 @@
+import time
+from datetime import timedelta
+from typing import Optional
+from config.environment import get_settings
+from utils.ttl_cache import TTLCache
+from .base import BlobStorage
+
+settings = get_settings()
+
+SIGNED_URL_TTL = timedelta(seconds=settings.SIGNED_URL_TTL_SECONDS)
+
+# Drop cached URLs this long before they expire so clients always get some
+# useful lifetime out of them
+SIGNED_URL_REFRESH_MARGIN = SIGNED_URL_TTL / 4
+
+_url_cache = TTLCache(
+    maxsize=settings.SIGNED_URL_CACHE_SIZE,
+    ttl=(SIGNED_URL_TTL - SIGNED_URL_REFRESH_MARGIN).total_seconds()
+)
+
+
+def get_signed_url(storage: Optional[BlobStorage], key: str, permission: str) -> Optional[str]:
+    """Mint (or reuse) a short-lived URL for `key`; None if the backend can't sign"""
+    if not storage:
+        return None
+
+    url = _url_cache.get((key, permission))
+    if url is None:
+        url = storage.signed_url(key, permission, SIGNED_URL_TTL)
+        if url:
+            _url_cache.set((key, permission), url)
+    return url
+
+
+def signed_url_epoch() -> int:
+    """
+    Changes every SIGNED_URL_REFRESH_MARGIN. URLs are handed out with at
+    least that much life left, so an ETag that includes this never keeps a
+    client on a response whose URLs have expired.
+    """
+    return int(time.time() // SIGNED_URL_REFRESH_MARGIN.total_seconds())
+
+
+def signed_url_cache_stats() -> dict:
+    return _url_cache.stats()
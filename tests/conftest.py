@@ -0,0 +1,46 @@
+import itertools
+import os
+import tempfile
+
+# The app reads its settings and builds its engines at import time
+_workdir = tempfile.mkdtemp(prefix="engineerhub-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'test.db')}"
+os.environ.setdefault("JWT_SECRET", "test-secret-test-secret-test-secret")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["LOCAL_STORAGE_PATH"] = os.path.join(_workdir, "storage")
+os.environ["METRICS_ENABLED"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+from database import SessionLocal, engine
+from migrations.runner import migrate
+from models.user import UserModel, UserRole
+
+_names = itertools.count()
+
+
+@pytest.fixture(scope="session")
+def client():
+    migrate(engine, log=lambda message: None)
+    import main
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    """make_user(role) -> (user, auth headers) for a fresh user"""
+    def make(role=UserRole.STUDENT):
+        n = next(_names)
+        user = UserModel(name=f"user{n}", email=f"user{n}@example.com", password="x", role=role, uni_id=20_000_000 + n)
+        db.add(user)
+        db.commit()
+        return user, {"Authorization": f"Bearer {user.generate_token()}"}
+    return make
@@ -0,0 +1,43 @@
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from utils.body_limit import BodySizeLimitMiddleware
+
+parsed = []
+
+app = FastAPI()
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=1000)
+
+
+@app.post("/upload")
+def upload(file: UploadFile = File(...)):
+    parsed.append(file.filename)
+    return {"size": len(file.file.read())}
+
+
+client = TestClient(app)
+
+
+def test_small_bodies_pass():
+    response = client.post("/upload", files={"file": ("a.pdf", b"x" * 100)})
+    assert response.status_code == 200
+    assert response.json() == {"size": 100}
+
+
+def test_declared_length_over_the_limit_is_refused_before_parsing():
+    parsed.clear()
+    response = client.post("/upload", files={"file": ("a.pdf", b"x" * 5000)})
+    assert response.status_code == 413
+    assert parsed == []
+
+
+def test_undeclared_length_is_cut_off_while_reading():
+    parsed.clear()
+
+    def chunks():
+        yield b"--boundary\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.pdf\"\r\n\r\n"
+        for _ in range(10):
+            yield b"x" * 500
+
+    response = client.post("/upload", content=chunks(), headers={"Content-Type": "multipart/form-data; boundary=boundary"})
+    assert response.status_code == 413
+    assert parsed == []
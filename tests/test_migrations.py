@@ -0,0 +1,52 @@
+from sqlalchemy import create_engine, inspect, text
+from migrations.runner import migrate
+from migrations.ops import is_indexed
+
+# notes and note_likes as create_all made them before migrations existed
+LEGACY_SCHEMA = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, name VARCHAR, email VARCHAR, password VARCHAR, role VARCHAR)",
+    """CREATE TABLE notes (
+        id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, file_name VARCHAR NOT NULL, file_key VARCHAR NOT NULL,
+        file_type VARCHAR NOT NULL, file_size INTEGER, course_code VARCHAR NOT NULL, course_name VARCHAR,
+        year INTEGER NOT NULL, doctor_name VARCHAR NOT NULL, description TEXT,
+        uploader_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+        likes_count INTEGER, dislikes_count INTEGER, created_at DATETIME, updated_at DATETIME,
+        UNIQUE (file_key)
+    )""",
+    """CREATE TABLE note_likes (
+        id INTEGER PRIMARY KEY, note_id INTEGER NOT NULL REFERENCES notes (id) ON DELETE CASCADE,
+        user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE, is_like INTEGER NOT NULL,
+        created_at DATETIME, updated_at DATETIME
+    )""",
+    "INSERT INTO users (id, name, email, password, role) VALUES (1, 'old', 'old@example.com', 'x', 'STUDENT')",
+    """INSERT INTO notes (id, title, file_name, file_key, file_type, course_code, year, doctor_name, description,
+        uploader_id, likes_count, dislikes_count) VALUES
+        (7, 'Fourier series', 'f.pdf', 'notes/1/f.pdf', 'pdf', 'ENG201', 2024, 'Dr Old', 'Signals', 1, 1, 0)""",
+    "INSERT INTO note_likes (note_id, user_id, is_like) VALUES (7, 1, 1)",
+]
+
+
+def test_legacy_sqlite_notes_lose_the_unique_file_key(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+
+    migrate(engine, log=lambda message: None)
+
+    with engine.begin() as conn:
+        assert not is_indexed(conn, "notes", ["file_key"], unique=True)
+        assert {"ix_notes_file_key", "ix_notes_content_hash", "ix_notes_created_at_id"} <= \
+            {index["name"] for index in inspect(conn).get_indexes("notes")}
+        # A second note on the same (deduplicated) blob
+        conn.execute(text("""INSERT INTO notes (title, file_name, file_key, file_type, course_code, year, doctor_name,
+            uploader_id, content_hash) VALUES ('Copy', 'f.pdf', 'notes/1/f.pdf', 'pdf', 'ENG201', 2024, 'Dr Old', 1, :hash)"""),
+            {"hash": "a" * 64})
+        # Rows, reactions and the search index all survive the rebuild
+        assert conn.execute(text("SELECT title, likes_count FROM notes WHERE id = 7")).one() == ("Fourier series", 1)
+        assert conn.execute(text("SELECT COUNT(*) FROM note_likes WHERE note_id = 7")).scalar() == 1
+        matches = conn.execute(text("SELECT rowid FROM notes_fts WHERE notes_fts MATCH 'fourier OR copy' ORDER BY rowid")).scalars().all()
+        assert len(matches) == 2 and matches[0] == 7
+
+    # Already rebuilt, so running it again changes nothing
+    assert migrate(engine, log=lambda message: None) == []
@@ -0,0 +1,54 @@
+import pytest
+from models.note import NoteLikeModel, NoteModel
+from utils.query_stats import assert_max_queries, capture_queries
+
+# Principal (cached after the first request), table versions for the ETag, one page of notes with the caller's reactions
+NOTES_QUERY_BUDGET = 3
+
+
+def add_notes(db, uploader, count, liked_by=None):
+    notes = [NoteModel(title=f"Note {i}", file_name=f"n{i}.pdf", file_key=f"notes/{uploader.id}/{i}.pdf",
+                       file_type="pdf", course_code="ENG101", year=2025, doctor_name="Dr Test",
+                       uploader_id=uploader.id, likes_count=0, dislikes_count=0) for i in range(count)]
+    db.add_all(notes)
+    db.flush()
+    if liked_by is not None:
+        db.add_all(NoteLikeModel(note_id=note.id, user_id=liked_by.id, is_like=1 if i % 2 else -1)
+                   for i, note in enumerate(notes))
+    db.commit()
+    return notes
+
+
+def test_note_list_query_count_does_not_grow_with_notes(client, db, make_user):
+    uploader, _ = make_user()
+    reader, headers = make_user()
+    client.get("/api/notes", headers=headers)
+
+    counts = []
+    for batch in (3, 40):
+        add_notes(db, uploader, batch, liked_by=reader)
+        with assert_max_queries(NOTES_QUERY_BUDGET, n_plus_one_threshold=2) as stats:
+            response = client.get("/api/notes", params={"limit": 50}, headers=headers)
+        assert response.status_code == 200
+        counts.append(stats.count)
+    assert counts[0] == counts[1]
+
+    items = response.json()["items"]
+    assert len(items) == 43
+    assert {item["user_like_status"] for item in items} == {1, -1}
+
+
+@pytest.mark.parametrize("method", ["get", "put"])
+def test_single_note_reads_reaction_in_the_same_query(client, db, make_user, method):
+    uploader, headers = make_user()
+    [note] = add_notes(db, uploader, 1, liked_by=uploader)
+    client.get(f"/api/notes/{note.id}", headers=headers)
+
+    with capture_queries() as stats:
+        if method == "get":
+            response = client.get(f"/api/notes/{note.id}", headers=headers)
+        else:
+            response = client.put(f"/api/notes/{note.id}", json={"title": "Renamed"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["user_like_status"] == -1
+    assert not [statement for statement in stats.statements if "note_likes" in statement and "JOIN" not in statement.upper()]
@@ -0,0 +1,71 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from sqlalchemy import func, select
+from database import SessionLocal
+from models.note import NoteLikeModel, NoteModel
+from models.note_reactions import ReactionConflict, ReactionCounterBuffer, apply_reaction_counts, toggle_reaction
+from tests.test_note_queries import add_notes
+
+THREADS = 8
+CLICKS = 400
+
+
+def click(note_id, user_id, buffer):
+    with SessionLocal() as db:
+        try:
+            _, likes_delta, dislikes_delta = toggle_reaction(db, note_id, user_id, random.choice([1, -1]))
+        except ReactionConflict:
+            db.rollback()
+            return
+        if buffer:
+            db.commit()
+            buffer.add(db, note_id, likes_delta, dislikes_delta)
+        else:
+            apply_reaction_counts(db, note_id, likes_delta, dislikes_delta)
+            db.commit()
+
+
+@pytest.mark.parametrize("write_behind", [False, True], ids=["direct", "write-behind"])
+def test_concurrent_reactions_keep_counters_exact(client, db, make_user, write_behind):
+    uploader, _ = make_user()
+    note_id = add_notes(db, uploader, 1)[0].id
+    # Few users, so the same reaction row is often toggled by two clicks at once
+    user_ids = [make_user()[0].id for _ in range(5)]
+
+    buffer = ReactionCounterBuffer(SessionLocal, interval=0.01, max_pending=25) if write_behind else None
+    if buffer:
+        buffer.start()
+    with ThreadPoolExecutor(THREADS) as pool:
+        for future in [pool.submit(click, note_id, random.choice(user_ids), buffer) for _ in range(CLICKS)]:
+            future.result()
+    if buffer:
+        buffer.stop()
+
+    db.expire_all()
+    likes, dislikes = db.execute(
+        select(NoteModel.likes_count, NoteModel.dislikes_count).where(NoteModel.id == note_id)
+    ).one()
+    reactions = dict(db.execute(
+        select(NoteLikeModel.is_like, func.count()).where(NoteLikeModel.note_id == note_id).group_by(NoteLikeModel.is_like)
+    ).all())
+    assert (likes, dislikes) == (reactions.get(1, 0), reactions.get(-1, 0))
+
+
+def test_failed_flush_keeps_pending_clicks(client, db, make_user):
+    uploader, _ = make_user()
+    note_id = add_notes(db, uploader, 1)[0].id
+
+    def broken_session():
+        raise RuntimeError("database unavailable")
+
+    buffer = ReactionCounterBuffer(broken_session, interval=60, max_pending=3)
+    buffer.add(db, note_id, 1, 0)
+    buffer.add(db, note_id, 0, 1)
+    assert buffer.flush() == 0
+    assert buffer._pending == {note_id: [1, 1]}
+    assert buffer._pending_clicks == 2
+
+    # The re-queued clicks still count toward an early flush
+    buffer.add(db, note_id, 1, 0)
+    assert buffer._wake.is_set()
@@ -0,0 +1,23 @@
+from models.note import NoteModel
+from models.note_search import SNIPPET_START, SNIPPET_STOP, snippet_html
+
+
+def test_snippet_html_escapes_note_text():
+    assert snippet_html(f"<b>{SNIPPET_START}fourier{SNIPPET_STOP}</b> & co") == "&lt;b&gt;<mark>fourier</mark>&lt;/b&gt; &amp; co"
+    assert snippet_html(None) is None
+
+
+def test_search_snippet_is_escaped(client, db, make_user):
+    uploader, headers = make_user()
+    db.add(NoteModel(title="Signals", file_name="s.pdf", file_key=f"notes/{uploader.id}/s.pdf", file_type="pdf",
+                     course_code="ENG201", year=2025, doctor_name="Dr Test", uploader_id=uploader.id,
+                     description='<script>alert(1)</script> fourier <img src=x onerror="alert(2)">',
+                     likes_count=0, dislikes_count=0))
+    db.commit()
+
+    response = client.get("/api/notes", params={"search": "fourier"}, headers=headers)
+    assert response.status_code == 200
+    snippet = response.json()["items"][0]["search_snippet"]
+    assert "<mark>fourier</mark>" in snippet
+    assert "<script>" not in snippet and "<img" not in snippet
+    assert "&lt;script&gt;" in snippet
@@ -0,0 +1,24 @@
+from controllers.notes import note_extras, query_notes_with_like_status, router, serialize_notes
+from models.note import NoteModel
+from serializers.note_serializer import NoteSchema
+from tests.test_note_queries import add_notes
+
+
+def test_response_model_passes_serialized_notes_through(db, make_user):
+    uploader, _ = make_user()
+    reader, _ = make_user()
+    ids = [note.id for note in add_notes(db, uploader, 3, liked_by=reader)]
+    db.expire_all()
+    rows = query_notes_with_like_status(db, reader.id).filter(NoteModel.id.in_(ids)).order_by(NoteModel.id).all()
+
+    items = serialize_notes(rows)
+    field = next(route for route in router.routes if route.path == "/notes" and "GET" in route.methods).response_field
+    value, errors = field.validate({"items": items, "next_cursor": None}, {}, loc=("response",))
+    assert not errors
+    # FastAPI's response validation keeps the models serialize_notes built rather than building them again
+    assert all(validated is item for validated, item in zip(value.items, items))
+
+    # ...and they hold what the model_validate + extras path would give
+    for item, (note, user_like_status) in zip(items, rows):
+        expected = NoteSchema.model_validate({**NoteSchema.model_validate(note).model_dump(), **note_extras(note, user_like_status)})
+        assert item == expected
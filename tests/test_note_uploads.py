@@ -0,0 +1,95 @@
+import io
+import pytest
+from dependencies.get_storage import load_storage
+from models.note import NoteBlobModel
+from tests.test_note_queries import add_notes
+
+
+def note_body(file_key):
+    return {"title": "Circuits", "file_name": "circuits.pdf", "file_key": file_key, "file_type": "pdf",
+            "file_size": 1000, "course_code": "ENG101", "year": 2025, "doctor_name": "Dr Test"}
+
+
+def test_notes_only_register_the_callers_own_keys(client, make_user):
+    owner, owner_headers = make_user()
+    _, headers = make_user()
+    for file_key in (f"notes/{owner.id}/a.pdf", "blobs/a.pdf", "notes/a.pdf", f"notes/{owner.id}/../a.pdf"):
+        response = client.post("/api/notes", json=note_body(file_key), headers=headers)
+        assert response.status_code == 403, file_key
+
+    response = client.post("/api/notes", json=note_body(f"notes/{owner.id}/a.pdf"), headers=owner_headers)
+    assert response.status_code == 200
+    # Once registered, the key can't back a second note
+    response = client.post("/api/notes", json=note_body(f"notes/{owner.id}/a.pdf"), headers=owner_headers)
+    assert response.status_code == 400
+
+
+def test_notes_cannot_claim_a_shared_blob(client, db, make_user):
+    owner, headers = make_user()
+    db.add(NoteBlobModel(content_hash="0" * 64, file_key=f"notes/{owner.id}/shared.pdf", file_size=1000, ref_count=2))
+    db.commit()
+    response = client.post("/api/notes", json=note_body(f"notes/{owner.id}/shared.pdf"), headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("content_hash", ["a" * 65, "a" * 63, "g" * 64])
+def test_upload_session_rejects_malformed_hash(client, make_user, content_hash):
+    _, headers = make_user()
+    response = client.post("/api/notes/upload-sessions", headers=headers,
+                           json={"file_name": "circuits.pdf", "file_size": 1000, "content_hash": content_hash})
+    assert response.status_code == 400
+
+
+def test_upload_session_accepts_sha256(client, make_user):
+    _, headers = make_user()
+    response = client.post("/api/notes/upload-sessions", headers=headers,
+                           json={"file_name": "circuits.pdf", "file_size": 1000, "content_hash": "A" * 64})
+    assert response.status_code == 200
+
+
+def test_deleting_a_user_releases_their_blobs(client, db, make_user):
+    user, headers = make_user()
+    other, _ = make_user()
+    storage = load_storage()
+    own_key, shared_key = f"notes/{user.id}/own.pdf", f"notes/{other.id}/shared.pdf"
+    for key in (own_key, shared_key):
+        storage.put_stream(key, io.BytesIO(b"%PDF"))
+    own_hash, shared_hash = "1" * 63 + str(user.id % 10), "2" * 63 + str(user.id % 10)
+    db.add_all([NoteBlobModel(content_hash=own_hash, file_key=own_key, file_size=4, ref_count=2),
+                NoteBlobModel(content_hash=shared_hash, file_key=shared_key, file_size=4, ref_count=2)])
+    # Two of the user's notes share one blob; the other blob is also used by someone else's note
+    for note, content_hash in zip(add_notes(db, user, 3), (own_hash, own_hash, shared_hash)):
+        note.content_hash = content_hash
+    add_notes(db, other, 1)[0].content_hash = shared_hash
+    db.commit()
+
+    assert client.delete(f"/api/users/{user.id}", headers=headers).status_code == 200
+
+    db.expire_all()
+    assert db.get(NoteBlobModel, db.query(NoteBlobModel.id).filter_by(content_hash=shared_hash).scalar()).ref_count == 1
+    assert db.query(NoteBlobModel).filter_by(content_hash=own_hash).first() is None
+    assert not storage.exists(own_key)
+    assert storage.exists(shared_key)
+
+
+def test_declared_duplicates_take_the_stored_size(client, db, make_user):
+    uploader, headers = make_user()
+    content_hash = "3" * 63 + str(uploader.id % 10)
+    session = {"file_name": "circuits.pdf", "file_size": 999, "content_hash": content_hash}
+    metadata = {"title": "Circuits", "course_code": "ENG101", "year": 2025, "doctor_name": "Dr Test"}
+    # Declared before the content was stored, so only /complete can catch the mismatch
+    upload_id = client.post("/api/notes/upload-sessions", headers=headers, json=session).json()["upload_id"]
+    db.add(NoteBlobModel(content_hash=content_hash, file_key=f"notes/{uploader.id}/stored.pdf", file_size=1000, ref_count=1))
+    db.commit()
+
+    assert client.post("/api/notes/upload-sessions", headers=headers, json=session).status_code == 400
+    response = client.post(f"/api/notes/upload-sessions/{upload_id}/complete", headers=headers, json=metadata)
+    assert response.status_code == 400
+
+    upload_id = client.post("/api/notes/upload-sessions", headers=headers,
+                            json={**session, "file_size": 1000}).json()["upload_id"]
+    response = client.post(f"/api/notes/upload-sessions/{upload_id}/complete", headers=headers, json=metadata)
+    assert response.status_code == 200
+    assert response.json()["file_size"] == 1000
+    db.expire_all()
+    assert db.query(NoteBlobModel.ref_count).filter_by(content_hash=content_hash).scalar() == 2
@@ -0,0 +1,45 @@
+import base64
+import json
+import pytest
+
+
+def raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    raw_cursor([["v", {"a": 1}], ["v", 1]]),
+    raw_cursor([["v", "2025-01-01"], ["v", 1]]),
+    raw_cursor([["dt", "2025-01-01T00:00:00"], ["v", "1"]]),
+    raw_cursor([["dt", "2025-01-01T00:00:00"], ["v", True]]),
+    raw_cursor([["dt", "2025-01-01T00:00:00"], ["v", [1]]]),
+    raw_cursor([["dt", "2025-01-01T00:00:00"]]),
+    raw_cursor([["dt", "not a date"], ["v", 1]]),
+    "not-base64!",
+])
+def test_malformed_cursor_is_a_400(client, cursor):
+    response = client.get("/api/users", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_users_pages_follow_the_cursor(client, make_user):
+    for _ in range(3):
+        make_user()
+    first = client.get("/api/users", params={"limit": 2}).json()
+    second = client.get("/api/users", params={"limit": 2, "cursor": first["next_cursor"]})
+    assert second.status_code == 200
+    assert not {user["id"] for user in first["items"]} & {user["id"] for user in second.json()["items"]}
+
+
+def test_search_rank_cursor_is_accepted(client, db, make_user):
+    from tests.test_note_queries import add_notes
+    user, headers = make_user()
+    for note in add_notes(db, user, 3):
+        note.title = "fourier transform"
+    db.commit()
+    first = client.get("/api/notes", params={"limit": 1, "search": "fourier"}, headers=headers).json()
+    assert first["next_cursor"]
+    second = client.get("/api/notes", params={"limit": 1, "search": "fourier", "cursor": first["next_cursor"]}, headers=headers)
+    assert second.status_code == 200
+    assert second.json()["items"][0]["id"] != first["items"][0]["id"]
@@ -0,0 +1,8 @@
+from config.environment import get_settings
+from utils.password_hashing import calibrate_rounds
+
+
+def test_calibration_never_goes_below_the_configured_cost():
+    assert get_settings().PASSWORD_HASH_MIN_ROUNDS >= 12
+    # A target no machine can hash that fast in
+    assert calibrate_rounds(0.001, 12) == 12
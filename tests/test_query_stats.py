@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import select, text
+from models.user import UserModel
+from utils.query_stats import assert_max_queries
+
+
+def test_within_budget_passes(db):
+    with assert_max_queries(2, n_plus_one_threshold=2) as stats:
+        db.execute(text("SELECT 1"))
+        db.execute(text("SELECT 2"))
+    assert stats.count == 2
+
+
+def test_over_budget_fails(db):
+    with pytest.raises(AssertionError, match="3 queries, budget is 2"):
+        with assert_max_queries(2):
+            for n in range(3):
+                db.execute(text(f"SELECT {n}"))
+
+
+def test_repeated_statement_is_reported_as_n_plus_one(db, make_user):
+    user_ids = [make_user()[0].id for _ in range(3)]
+    with pytest.raises(AssertionError, match=r"3 identical queries \(likely N\+1\)") as failure:
+        with assert_max_queries(10, n_plus_one_threshold=3):
+            for user_id in user_ids:
+                db.execute(select(UserModel.name).where(UserModel.id == user_id)).one()
+    # Lists what ran, so the failing test shows where the loop is
+    assert "3x SELECT" in str(failure.value)
+
+
+def test_counts_queries_from_the_app_thread(client, make_user):
+    _, headers = make_user()
+    with assert_max_queries(10) as stats:
+        assert client.get("/api/notes", headers=headers).status_code == 200
+    assert stats.count > 0
@@ -0,0 +1,33 @@
+import asyncio
+from utils.rate_limit import RedisTokenBucketLimiter
+
+
+class UnreachableRedis:
+    """Stands in for a redis.asyncio client whose server has gone away"""
+
+    def register_script(self, script):
+        async def run(keys, args):
+            raise ConnectionError("Connection refused")
+        return run
+
+
+def test_redis_errors_fall_back_to_local_buckets():
+    limiter = RedisTokenBucketLimiter(UnreachableRedis(), rate=1 / 60, burst=2)
+
+    async def attempts():
+        return [await limiter.acquire_async("10.0.0.1") for _ in range(3)]
+
+    waits = asyncio.run(attempts())
+    assert waits[:2] == [0, 0]
+    assert waits[2] > 0
+    assert limiter.errors == 3
+
+
+def test_login_is_throttled_not_failed_when_redis_is_down(client, monkeypatch):
+    from controllers import auth
+    monkeypatch.setattr(auth, "ip_limiter", RedisTokenBucketLimiter(UnreachableRedis(), rate=1 / 60, burst=1))
+    body = {"name": "nobody-here", "password": "wrong"}
+    assert client.post("/api/auth/login", json=body).status_code == 401
+    response = client.post("/api/auth/login", json=body)
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
@@ -0,0 +1,17 @@
+def test_cached_responses_get_cors_headers_once(client, make_user):
+    make_user()
+    headers = {"Origin": "https://example.com"}
+    first = client.get("/api/users", params={"limit": 7}, headers=headers)
+    hit = client.get("/api/users", params={"limit": 7}, headers=headers)
+    assert hit.headers.get("x-cache") == "hit"
+    assert hit.content == first.content
+    # CORS adds its headers to the replay exactly as it did to the original (whether it
+    # adds Vary: Origin depends on the Starlette version)
+    assert hit.headers["access-control-allow-origin"] == first.headers["access-control-allow-origin"] == "*"
+    assert hit.headers.get_list("vary") == first.headers.get_list("vary")
+    assert len(set(hit.headers.get_list("vary"))) == len(hit.headers.get_list("vary"))
+
+    # Without an Origin the replayed entry carries no CORS headers of its own
+    plain = client.get("/api/users", params={"limit": 7})
+    assert plain.headers.get("x-cache") == "hit"
+    assert "access-control-allow-origin" not in plain.headers
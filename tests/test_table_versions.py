@@ -0,0 +1,80 @@
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import event
+from database import SessionLocal, engine
+from models.note_reactions import ReactionConflict, apply_reaction_counts, toggle_reaction
+from models.table_version import get_versions
+from tests.test_note_queries import add_notes
+
+THREADS = 8
+CLICKS = 200
+
+
+def test_writers_do_not_lock_table_versions(db, make_user):
+    uploader, _ = make_user()
+    note_id = add_notes(db, uploader, 1)[0].id
+    user_ids = [make_user()[0].id for _ in range(20)]
+    before = get_versions(db, ("note_likes", "notes"))
+    db.rollback()
+
+    # Per connection: tables other than table_versions written in its current transaction
+    open_writes = {}
+    bumps_inside_writers = []
+    lock = threading.Lock()
+
+    def on_begin(conn):
+        with lock:
+            open_writes[id(conn)] = set()
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        words = statement.split()
+        if words[0] not in ("INSERT", "UPDATE", "DELETE"):
+            return
+        with lock:
+            writes = open_writes.setdefault(id(conn), set())
+            if "table_versions" in statement:
+                if writes or conn.get_execution_options().get("isolation_level") != "AUTOCOMMIT":
+                    bumps_inside_writers.append(statement)
+            else:
+                writes.add(statement)
+
+    committed = []
+
+    def click(user_id):
+        with SessionLocal() as session:
+            try:
+                _, likes_delta, dislikes_delta = toggle_reaction(session, note_id, user_id, random.choice([1, -1]))
+            except ReactionConflict:
+                session.rollback()
+                return
+            apply_reaction_counts(session, note_id, likes_delta, dislikes_delta)
+            session.commit()
+            committed.append(user_id)
+
+    event.listen(engine, "begin", on_begin)
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        with ThreadPoolExecutor(THREADS) as pool:
+            for future in [pool.submit(click, random.choice(user_ids)) for _ in range(CLICKS)]:
+                future.result()
+    finally:
+        event.remove(engine, "begin", on_begin)
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+    # No click held a counter row for the length of its own transaction
+    assert bumps_inside_writers == []
+    # ...and no bump was lost: each committed click advanced both tables once
+    after = get_versions(db, ("note_likes", "notes"))
+    assert [new - old for old, new in zip(before, after)] == [len(committed)] * 2
+
+
+def test_async_commits_bump_versions(client, db, make_user):
+    uploader, headers = make_user()
+    before = get_versions(db, ("notes",))
+    db.rollback()
+    response = client.post("/api/notes", headers=headers, json={
+        "title": "Circuits", "file_name": "c.pdf", "file_key": f"notes/{uploader.id}/c.pdf", "file_type": "pdf",
+        "file_size": 1000, "course_code": "ENG101", "year": 2025, "doctor_name": "Dr Test"})
+    assert response.status_code == 200
+    assert get_versions(db, ("notes",)) == (before[0] + 1,)
@@ -0,0 +1,54 @@
+from typing import Optional
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+
+# Room for the multipart boundaries and text fields sent alongside a file
+FORM_OVERHEAD_BYTES = 1024 * 1024
+
+TOO_LARGE = "Request body too large"
+
+
+class BodySizeLimitMiddleware:
+    """
+    Refuses request bodies over `max_bytes` before any route parses them.
+
+    FastAPI reads a multipart form in full (spooling the files to disk)
+    before dependencies or the route run, so a size check there comes too
+    late. A declared Content-Length over the limit is answered with 413
+    straight away; a body sent without one is cut off once it passes the
+    limit, as it is read.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        length = _content_length(scope)
+        if length is not None and length > self.max_bytes:
+            response = JSONResponse({"detail": TOO_LARGE}, status_code=413, headers={"Connection": "close"})
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing, so this becomes a 413
+                    raise HTTPException(status_code=413, detail=TOO_LARGE)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def _content_length(scope) -> Optional[int]:
+    for name, value in scope["headers"]:
+        if name == b"content-length":
+            return int(value) if value.isdigit() else None
+    return None
@@ -0,0 +1,214 @@
+import asyncio
+import bisect
+import glob
+import json
+import os
+import time
+from collections import defaultdict
+from anyio.to_thread import current_default_thread_limiter
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+FAMILIES = {
+    "http_requests_total": ("counter", "Requests served, by route template and status"),
+    "http_request_duration_seconds": ("histogram", "Request latency, by route template"),
+    "http_requests_in_flight": ("gauge", "Requests currently being served"),
+    "threadpool_threads_in_use": ("gauge", "Threads busy running sync routes and dependencies"),
+    "threadpool_threads": ("gauge", "Size of the threadpool for sync routes and dependencies"),
+    "response_cache_requests_total": ("counter", "Lookups of cacheable GET routes, by result (hit, stale, miss)"),
+    "response_cache_evictions_total": ("counter", "Entries evicted from the in-process response cache"),
+    "response_cache_bytes": ("gauge", "Bytes held by the in-process response cache"),
+    "response_cache_entries": ("gauge", "Entries held by the in-process response cache"),
+}
+# Dropped once their worker exits; its counters and histograms still count
+GAUGES = {name for name, (kind, _) in FAMILIES.items() if kind == "gauge"}
+
+# Requests that matched no route share one series instead of one per raw path
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope) -> str:
+    """
+    The matched route's path with its include_router prefix, e.g.
+    /api/notes/{note_id}. Newer FastAPI versions put the included route itself
+    in scope["route"], without the prefix; the prefix is then the leading
+    segments of the raw path that the route's own path does not account for.
+    """
+    template = getattr(scope.get("route"), "path", None)
+    if template is None:
+        return UNMATCHED_ROUTE
+    parts = scope["path"].split("/")
+    extra = len(parts) - len(template.split("/"))
+    return "/".join(parts[:extra + 1]) + template if extra > 0 else template
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+
+class RequestMetrics:
+    """
+    Per-worker request counters. Only touched from the event loop thread
+    (the middleware and the flush task), so recording takes no locks.
+    """
+
+    def __init__(self):
+        self.requests: defaultdict[tuple, int] = defaultdict(int)
+        # (method, route) -> per-bucket counts, then +Inf, then the sum
+        self.latency: dict[tuple, list] = {}
+        self.in_flight = 0
+        # Other components' samples() methods, reported alongside these
+        self.collectors = []
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        self.requests[method, route, status] += 1
+        series = self.latency.get((method, route))
+        if series is None:
+            series = self.latency[method, route] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+        series[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        series[-1] += seconds
+
+    def samples(self) -> dict[str, float]:
+        """This worker's series as {"name{labels}": value}, the shape every worker shares"""
+        samples = {}
+        for (method, route, status), count in self.requests.items():
+            samples[f"http_requests_total{{{_labels(method=method, route=route, status=status)}}}"] = count
+        for (method, route), series in self.latency.items():
+            labels = _labels(method=method, route=route)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), series):
+                cumulative += count
+                samples[f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}}'] = cumulative
+            samples[f"http_request_duration_seconds_count{{{labels}}}"] = cumulative
+            samples[f"http_request_duration_seconds_sum{{{labels}}}"] = series[-1]
+        samples["http_requests_in_flight"] = self.in_flight
+        limiter = current_default_thread_limiter()
+        samples["threadpool_threads_in_use"] = limiter.borrowed_tokens
+        samples["threadpool_threads"] = limiter.total_tokens
+        for collect in self.collectors:
+            samples.update(collect())
+        return samples
+
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware (cheaper than @app.middleware) that times each
+    request until its last body chunk, labelled by the matched route
+    template, so /api/notes/{note_id} is one series.
+    """
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        async def send_and_record_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_and_record_status)
+        finally:
+            metrics.in_flight -= 1
+            metrics.observe(scope["method"], route_template(scope), status, time.perf_counter() - start)
+
+
+class MetricsExporter:
+    """
+    Prometheus text output for every worker. Each worker writes its
+    samples to `directory` (every `interval` seconds and on each scrape)
+    and /metrics sums all the files. Without a directory only this worker
+    is reported. Clear the directory on deploy, like PROMETHEUS_MULTIPROC_DIR.
+    """
+
+    def __init__(self, metrics: RequestMetrics, directory: str, interval: float):
+        self.metrics = metrics
+        self.directory = directory
+        self.interval = interval
+        self._task = None
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics-{pid}.json")
+
+    def flush(self) -> None:
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(os.getpid())
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(self.metrics.samples(), f)
+        os.replace(f"{path}.tmp", path)
+
+    async def _flush_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Warning: Could not write metrics to {self.directory}: {e}")
+
+    def start(self) -> None:
+        if self.directory and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._flush_forever())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            # The final counters outlive the worker; its gauges are dropped below
+            self.flush()
+
+    def collect(self) -> dict[str, float]:
+        if not self.directory:
+            return self.metrics.samples()
+        self.flush()
+        totals = defaultdict(float)
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            pid = int(os.path.basename(path)[len("metrics-"):-len(".json")])
+            try:
+                with open(path) as f:
+                    samples = json.load(f)
+            except (OSError, ValueError):
+                continue
+            alive = _is_alive(pid)
+            for key, value in samples.items():
+                if alive or key.partition("{")[0] not in GAUGES:
+                    totals[key] += value
+        return totals
+
+    def render(self) -> str:
+        families = defaultdict(list)
+        for key, value in self.collect().items():
+            name = key.partition("{")[0]
+            for suffix in ("_bucket", "_count", "_sum"):
+                if name.endswith(suffix) and name[:-len(suffix)] in FAMILIES:
+                    name = name[:-len(suffix)]
+            families[name].append(f"{key} {_format(value)}")
+        lines = []
+        for name, (kind, help_text) in FAMILIES.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"] + families.get(name, [])
+        return "\n".join(lines) + "\n"
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
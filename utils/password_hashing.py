@@ -0,0 +1,127 @@
+import asyncio
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+from passlib.context import CryptContext
+
+# bcrypt refuses anything below 4 and caps at 31
+BCRYPT_MIN_ROUNDS = 4
+BCRYPT_MAX_ROUNDS = 31
+
+
+class PasswordHasherBusy(Exception):
+    """Every worker is busy and the admission queue is full."""
+
+
+def make_context(rounds: int) -> CryptContext:
+    # min_rounds makes verify_and_update() hand back a new hash for anything
+    # weaker than the current cost, without downgrading stronger hashes
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int) -> int:
+    """
+    Pick the bcrypt cost whose hash takes closest to `target_ms` on this
+    machine. Each extra round doubles the work, so one timing is enough.
+    """
+    probe = max(min_rounds, 8)
+    start = time.perf_counter()
+    make_context(probe).hash("calibration")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    rounds = probe + round(math.log2(max(target_ms, 1) / max(elapsed_ms, 0.01)))
+    return min(max(rounds, min_rounds, BCRYPT_MIN_ROUNDS), BCRYPT_MAX_ROUNDS)
+
+
+# Worker process side ---------------------------------------------------------
+_context: Optional[CryptContext] = None
+
+
+def _init_worker(rounds: int) -> None:
+    global _context
+    _context = make_context(rounds)
+
+
+def _hash(password: str) -> str:
+    return _context.hash(password)
+
+
+def _verify(password: str, hashed: str) -> tuple[bool, Optional[str]]:
+    return _context.verify_and_update(password, hashed)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool so a burst of logins can't tie up
+    the request threadpool or the event loop.
+
+    At most `workers + max_queue` operations are admitted at once; beyond that
+    hash() and verify() raise PasswordHasherBusy straight away instead of
+    queueing without bound. The pool is created and the cost calibrated on
+    start(), or lazily on first use.
+    """
+
+    def __init__(self, workers: int, max_queue: int, target_ms: float, min_rounds: int, rounds: Optional[int] = None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.target_ms = target_ms
+        self.min_rounds = min_rounds
+        self.rounds = rounds
+        self._pool = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                return
+            if self.rounds is None:
+                self.rounds = calibrate_rounds(self.target_ms, self.min_rounds)
+            # spawn rather than fork: the app process already runs threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.rounds,)
+            )
+
+    def stop(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _submit(self, fn, *args) -> Future:
+        if self._pool is None:
+            self.start()
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                raise PasswordHasherBusy()
+            self._in_flight += 1
+        try:
+            future = self._pool.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(_hash, password))
+
+    async def verify(self, password: str, hashed: str) -> tuple[bool, Optional[str]]:
+        """
+        Returns (matches, new_hash). new_hash is set when the stored hash was
+        made with an outdated cost and should replace it.
+        """
+        return await asyncio.wrap_future(self._submit(_verify, password, hashed))
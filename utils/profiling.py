@@ -0,0 +1,174 @@
+import hashlib
+import hmac
+import os
+import random
+import re
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from utils.metrics import route_template
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_SUFFIX = ".collapsed"
+
+# Leaf frames of a thread with nothing to do: the event loop waiting in
+# select() and threadpool workers waiting for a job
+IDLE_FRAMES = {("selectors.py", "select"), ("queue.py", "get")}
+
+# Threads anyio runs sync routes and dependencies on
+WORKER_THREAD_PREFIX = "AnyIO worker thread"
+
+# Shortened out of frame labels: site-packages first, it lives under the stdlib
+PATH_PREFIXES = [sysconfig.get_paths()["purelib"], sysconfig.get_paths()["stdlib"], os.getcwd()]
+
+
+def sign_profile_request(secret: str, ttl_seconds: int = 300) -> str:
+    """Value for the X-Profile header, valid for `ttl_seconds`"""
+    expires = str(int(time.time()) + ttl_seconds)
+    return f"{expires}.{hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()}"
+
+
+def verify_profile_request(secret: str, value: str) -> bool:
+    expires, _, signature = value.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples the event loop thread and the threadpool workers each
+    `interval` seconds and counts their stacks in collapsed form
+    ("root;caller;callee"), which flamegraph.pl and speedscope read
+    directly. Including the workers is what catches sync routes and
+    dependencies, but it also means requests served concurrently by this
+    worker show up in the profile.
+    """
+
+    def __init__(self, interval: float, loop_thread: int):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.interval = interval
+        self.loop_thread = loop_thread
+        self.stacks: Counter[str] = Counter()
+        self._done = threading.Event()
+        self._path = None
+        self._on_written = None
+        self._labels: dict = {}
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            for prefix in PATH_PREFIXES:
+                if filename.startswith(prefix + os.sep):
+                    filename = filename[len(prefix) + 1:]
+                    break
+            label = self._labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+        return label
+
+    def _collapse(self, frame):
+        leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+        caller = frame.f_back and (os.path.basename(frame.f_back.f_code.co_filename), frame.f_back.f_code.co_name)
+        if leaf in IDLE_FRAMES or caller in IDLE_FRAMES:
+            return None
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval):
+            threads = {thread.ident: thread.name for thread in threading.enumerate()
+                       if thread.ident == self.loop_thread or thread.name.startswith(WORKER_THREAD_PREFIX)}
+            for ident, frame in sys._current_frames().items():
+                if ident not in threads:
+                    continue
+                stack = self._collapse(frame)
+                if stack is not None:
+                    self.stacks[f"{threads[ident]};{stack}"] += 1
+        # Written from this thread so the event loop never waits on the disk
+        if self._path:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            with open(self._path, "w") as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+            if self._on_written:
+                self._on_written()
+
+    def finish(self, path: str, on_written=None) -> None:
+        self._path = path
+        self._on_written = on_written
+        self._done.set()
+
+
+class ProfilerMiddleware:
+    """
+    Samples a request's stacks when it carries a valid signed X-Profile
+    header (see sign_profile_request) or is picked at `sample_rate`. Each
+    profile lands in `directory` as <timestamp>_<METHOD>_<route>.collapsed,
+    named in the X-Profile-Id response header; only the newest `max_files`
+    are kept. One request per worker is profiled at a time. main.py only
+    installs this when a secret or a sample rate is configured.
+    """
+
+    def __init__(self, app, directory: str, secret: str, sample_rate: float, interval_ms: int, max_files: int):
+        self.app = app
+        self.directory = directory
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.max_files = max_files
+        self._busy = False
+
+    def _wanted(self, scope) -> bool:
+        if self.secret:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return verify_profile_request(self.secret, value.decode("latin-1"))
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _file_name(self, scope, started: datetime) -> str:
+        route = re.sub(r"[^A-Za-z0-9]+", "_", route_template(scope)).strip("_") or "root"
+        return f"{started:%Y%m%dT%H%M%S.%f}_{scope['method']}_{route}{PROFILE_SUFFIX}"
+
+    def _rotate(self) -> None:
+        profiles = sorted(name for name in os.listdir(self.directory) if name.endswith(PROFILE_SUFFIX))
+        for name in profiles[:-self.max_files]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                # Another worker sharing the directory got there first
+                pass
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._busy or not self._wanted(scope):
+            return await self.app(scope, receive, send)
+
+        self._busy = True
+        started = datetime.now(timezone.utc)
+        file_name = None
+        sampler = StackSampler(self.interval, threading.get_ident())
+        sampler.start()
+
+        async def send_with_profile_id(message):
+            nonlocal file_name
+            if message["type"] == "http.response.start":
+                file_name = self._file_name(scope, started)
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", file_name.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.finish(os.path.join(self.directory, file_name or self._file_name(scope, started)), self._rotate)
+            self._busy = False
+
+
+if __name__ == "__main__":
+    # python -m utils.profiling  ->  curl -H "X-Profile: <output>" ...
+    from config.environment import get_settings
+    print(sign_profile_request(get_settings().PROFILER_SECRET))
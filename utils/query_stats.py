@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryStats:
+    """Statements run and time spent in the database during one request (or test block)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Identical statements run `threshold` or more times: most likely an N+1"""
+        with self._lock:
+            return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+# Stats of the request being served; set by the query_stats middleware in main.py
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_stats", default=None)
+
+# Open assert_max_queries() blocks. TestClient runs the app on another thread,
+# so these collect every statement instead of relying on the context var
+_captures: list[QueryStats] = []
+_captures_lock = threading.Lock()
+
+
+# Registered on the Engine class so the primary, the async engine and
+# every replica are counted without wiring each one up
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_stats_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_stats_start", None)
+    if start is None:
+        return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    stats = current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+    if _captures:
+        with _captures_lock:
+            for capture in _captures:
+                if capture is not stats:
+                    capture.record(statement, elapsed_ms)
+
+
+@contextmanager
+def capture_queries():
+    """Collect every statement run inside the block, on any thread"""
+    stats = QueryStats()
+    with _captures_lock:
+        _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        with _captures_lock:
+            _captures.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(limit: int, n_plus_one_threshold: Optional[int] = None):
+    """
+    Fail when the block runs more than `limit` statements, or repeats one
+    statement `n_plus_one_threshold` times. Gives each route a query budget:
+
+        with assert_max_queries(3, n_plus_one_threshold=2):
+            client.get("/api/notes", headers=auth)
+    """
+    with capture_queries() as stats:
+        yield stats
+
+    repeated = stats.repeated(n_plus_one_threshold) if n_plus_one_threshold else []
+    if stats.count > limit or repeated:
+        lines = [f"{count}x {statement}" for statement, count in stats.statements.most_common()]
+        problem = f"{stats.count} queries, budget is {limit}" if stats.count > limit else \
+            f"{repeated[0][1]} identical queries (likely N+1)"
+        raise AssertionError(f"{problem}:\n" + "\n".join(lines))
@@ -0,0 +1,126 @@
+import math
+import threading
+import time
+
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets kept in this worker's memory.
+
+    Each bucket is just [tokens, last_seen] and is refilled lazily when its
+    key is next seen, so idle keys cost nothing. A bucket that has had time
+    to refill completely is indistinguishable from a new one, and the
+    periodic sweep drops those.
+    """
+
+    def __init__(self, rate: float, burst: int, sweep_interval: float = 60):
+        self.rate = rate
+        self.burst = burst
+        self.sweep_interval = sweep_interval
+        self._buckets: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def acquire(self, key: str) -> float:
+        """Take one token. Returns 0 if allowed, else seconds until a token is available."""
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = [self.burst - 1, now]
+                return 0
+
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return 0
+            bucket[0] = tokens
+            return (1 - tokens) / self.rate
+
+    async def acquire_async(self, key: str) -> float:
+        # Never waits on anything, so it runs right on the event loop
+        return self.acquire(key)
+
+    def _sweep(self, now: float) -> None:
+        full_after = self.burst / self.rate
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if now - bucket[1] < full_after}
+        self._next_sweep = now + self.sweep_interval
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+# Same algorithm as TokenBucketLimiter, run atomically inside Redis so every
+# worker shares the buckets. Redis' own clock is used to avoid worker skew
+REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+if tokens == nil then
+    tokens = burst
+else
+    tokens = math.min(burst, tokens + (now - tonumber(bucket[2])) * rate)
+end
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisTokenBucketLimiter:
+    """
+    Token buckets shared by all workers through Redis (a redis.asyncio
+    client). Idle buckets expire on their own. A Redis error falls back to
+    this worker's own buckets for that call instead of failing the request.
+    """
+
+    def __init__(self, client, rate: float, burst: int, prefix: str = "ratelimit:"):
+        self.rate = rate
+        self.burst = burst
+        self.prefix = prefix
+        self.errors = 0
+        self.fallback = TokenBucketLimiter(rate, burst)
+        self._script = client.register_script(REDIS_TOKEN_BUCKET)
+
+    async def acquire_async(self, key: str) -> float:
+        try:
+            return float(await self._script(keys=[self.prefix + key], args=[self.rate, self.burst]))
+        except Exception:
+            self.errors += 1
+            return self.fallback.acquire(key)
+
+
+def make_limiter(rate_per_minute: float, burst: int, redis_url: str = "", prefix: str = "ratelimit:"):
+    """
+    Build a limiter backed by Redis when `redis_url` is set and the client is
+    installed, otherwise an in-process one. Either way, await
+    acquire_async() from async routes. Per-worker limits are still better
+    than none, so a Redis problem falls back rather than failing.
+    """
+    rate = rate_per_minute / 60
+    if redis_url:
+        try:
+            import redis
+            import redis.asyncio
+            redis.Redis.from_url(redis_url, socket_timeout=0.5).ping()
+            return RedisTokenBucketLimiter(redis.asyncio.Redis.from_url(redis_url, socket_timeout=0.5), rate, burst, prefix)
+        except Exception as e:
+            print(f"Warning: Redis rate limiting unavailable, using per-worker limits: {e}")
+    return TokenBucketLimiter(rate, burst)
+
+
+def retry_after_header(wait: float) -> dict:
+    return {"Retry-After": str(max(1, math.ceil(wait)))}
@@ -0,0 +1,332 @@
+import asyncio
+import contextvars
+import json
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional
+from starlette.requests import Request
+from starlette.routing import compile_path
+from dependencies.conditional_get import CACHEABLE, etag_matches
+from dependencies.get_read_db import get_async_read_db
+from models.table_version import get_versions_async
+from utils.metrics import route_template
+
+# Added by outer middleware or specific to one response, never stored.
+# CORS headers (and the Vary: Origin that goes with them) depend on the
+# caller, so CORSMiddleware adds them again to every replayed entry
+UNCACHED_HEADERS = {b"content-length", b"set-cookie", b"vary", b"x-db-queries", b"x-db-time", b"x-profile-id"}
+UNCACHED_HEADER_PREFIXES = (b"access-control-",)
+
+# Bytes a stored response costs beyond its body, roughly
+ENTRY_OVERHEAD = 512
+
+
+class CachedResponse:
+    __slots__ = ("tables", "versions", "status", "headers", "body", "size")
+
+    def __init__(self, tables: tuple, versions: tuple, status: int, headers: list, body: bytes):
+        self.tables = tables
+        self.versions = versions
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.size = len(body) + sum(len(name) + len(value) for name, value in headers) + ENTRY_OVERHEAD
+
+    def etag(self) -> Optional[str]:
+        for name, value in self.headers:
+            if name == b"etag":
+                return value.decode("latin-1")
+        return None
+
+    def encode(self) -> bytes:
+        meta = {"tables": self.tables, "versions": self.versions, "status": self.status,
+                "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in self.headers]}
+        return json.dumps(meta).encode() + b"\n" + self.body
+
+    @classmethod
+    def decode(cls, data: bytes) -> "CachedResponse":
+        meta, _, body = data.partition(b"\n")
+        meta = json.loads(meta)
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in meta["headers"]]
+        return cls(tuple(meta["tables"]), tuple(meta["versions"]), meta["status"], headers, body)
+
+
+class ResponseCacheStats:
+    """Lookup counters, kept per worker whichever backend holds the entries"""
+
+    backend = ""
+
+    def __init__(self):
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+        }
+
+    def samples(self) -> dict[str, float]:
+        """Series for utils/metrics.py"""
+        return {
+            'response_cache_requests_total{result="hit"}': self.hits,
+            'response_cache_requests_total{result="stale"}': self.stale_hits,
+            'response_cache_requests_total{result="miss"}': self.misses,
+        }
+
+
+class LocalResponseCache(ResponseCacheStats):
+    """
+    Per-worker LRU bounded by the bytes it holds rather than by entries, so
+    a few large pages can't push the worker over its memory budget. Only
+    used from the event loop thread, so it takes no locks.
+    """
+
+    backend = "local"
+
+    def __init__(self, max_bytes: int):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CachedResponse) -> None:
+        await self.delete(key)
+        self._entries[key] = entry
+        self.bytes += entry.size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def stats(self) -> dict:
+        return {**super().stats(), "entries": len(self), "bytes": self.bytes, "max_bytes": self.max_bytes,
+                "evictions": self.evictions}
+
+    def samples(self) -> dict[str, float]:
+        return {**super().samples(), "response_cache_evictions_total": self.evictions,
+                "response_cache_bytes": self.bytes, "response_cache_entries": len(self)}
+
+
+class RedisResponseCache(ResponseCacheStats):
+    """
+    Entries shared by every worker through Redis, so a page rendered by one
+    worker is a hit on all of them. Entries expire after `ttl` seconds and
+    Redis' own maxmemory policy bounds the total. A Redis error counts as a
+    miss rather than failing the request.
+    """
+
+    backend = "redis"
+
+    def __init__(self, client, ttl: int, prefix: str = "response:"):
+        super().__init__()
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.errors = 0
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        try:
+            data = await self.client.get(self.prefix + key)
+            return CachedResponse.decode(data) if data is not None else None
+        except Exception:
+            self.errors += 1
+            return None
+
+    async def set(self, key: str, entry: CachedResponse) -> None:
+        try:
+            await self.client.set(self.prefix + key, entry.encode(), ex=self.ttl)
+        except Exception:
+            self.errors += 1
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.client.delete(self.prefix + key)
+        except Exception:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        return {**super().stats(), "errors": self.errors}
+
+
+def make_response_cache(max_bytes: int, redis_url: str = "", ttl: int = 3600):
+    """
+    Redis-backed when `redis_url` is set and the client is installed,
+    otherwise per worker. Entries are checked against the table versions
+    either way, so no worker serves a page another one invalidated.
+    """
+    if redis_url:
+        try:
+            import redis
+            import redis.asyncio
+            redis.Redis.from_url(redis_url, socket_timeout=0.5).ping()
+            return RedisResponseCache(redis.asyncio.Redis.from_url(redis_url, socket_timeout=0.5), ttl)
+        except Exception as e:
+            print(f"Warning: Redis response cache unavailable, using a per-worker cache: {e}")
+    return LocalResponseCache(max_bytes)
+
+
+class ResponseCacheMiddleware:
+    """
+    Serves the encoded bytes of public GET routes (the ones using
+    conditional_get(public=True)) without running them again.
+
+    Each stored response carries the table versions its route read. A
+    lookup reads the current versions (one primary-key query) and serves
+    the entry only if they still match, so any commit touching one of
+    those tables invalidates it on every worker, whichever handler made
+    it. The versions are read before the route's data, so an entry is
+    never labelled newer than its content.
+
+    An entry whose tables have moved on is still served to anonymous
+    callers while one background request refreshes it, for at most
+    `stale_seconds`. Authenticated callers always get the fresh page,
+    since they may be the ones who just wrote.
+    """
+
+    def __init__(self, app, cache, max_entry_bytes: int, stale_seconds: float):
+        self.app = app
+        self.cache = cache
+        self.max_entry_bytes = max_entry_bytes
+        self.stale_seconds = stale_seconds
+        # Route templates seen to be cacheable; other paths skip the lookup
+        self._routes: dict[str, object] = {}
+        self._refreshing: dict[str, float] = {}
+        self._tasks = set()
+
+    def _cacheable_path(self, path: str) -> bool:
+        return any(regex.match(path) for regex in self._routes.values())
+
+    async def _current_versions(self, scope, tables) -> Optional[tuple]:
+        # The same session choice as the routes: a replica unless this caller just wrote
+        async with asynccontextmanager(get_async_read_db)(Request(scope)) as db:
+            return await get_versions_async(db, tables)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+        key = _key(scope)
+        if not self._cacheable_path(scope["path"]):
+            await self._call_and_store(scope, receive, send, key)
+            return
+
+        entry = await self.cache.get(key)
+        if entry is not None:
+            if await self._current_versions(scope, entry.tables) == entry.versions:
+                self.cache.hits += 1
+                return await self._replay(scope, entry, send, b"hit")
+            if self._serve_stale(scope, key):
+                self.cache.stale_hits += 1
+                return await self._replay(scope, entry, send, b"stale")
+        self.cache.misses += 1
+        await self._call_and_store(scope, receive, send, key)
+
+    def _serve_stale(self, scope, key: str) -> bool:
+        if self.stale_seconds <= 0 or _header(scope, b"authorization") is not None:
+            return False
+        started = self._refreshing.get(key)
+        if started is None:
+            self._refreshing[key] = time.monotonic()
+            # Its own context, so its queries don't count toward this request's stats
+            task = asyncio.get_running_loop().create_task(self._refresh(scope, key), context=contextvars.Context())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return True
+        # A refresh that has taken this long is no excuse to keep serving old data
+        return time.monotonic() - started < self.stale_seconds
+
+    async def _refresh(self, scope, key: str) -> None:
+        headers = [(name, value) for name, value in scope["headers"] if name != b"if-none-match"]
+        refresh_scope = {**scope, "headers": headers, "state": {}}
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def discard(message):
+            pass
+
+        try:
+            if not await self._call_and_store(refresh_scope, receive, discard, key):
+                # Gone or failing now; stop answering with the old page
+                await self.cache.delete(key)
+        except Exception as e:
+            print(f"Warning: Could not refresh the cached response for {key}: {e}")
+            await self.cache.delete(key)
+        finally:
+            self._refreshing.pop(key, None)
+
+    async def _replay(self, scope, entry: CachedResponse, send, result: bytes) -> None:
+        etag = entry.etag()
+        if etag and etag_matches(_header(scope, b"if-none-match"), etag):
+            headers = [(name, value) for name, value in entry.headers if name in (b"etag", b"cache-control", b"vary")]
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        headers = entry.headers + [(b"content-length", str(len(entry.body)).encode()), (b"x-cache", result)]
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": entry.body})
+
+    async def _call_and_store(self, scope, receive, send, key: str) -> bool:
+        start = None
+        chunks = []
+        size = 0
+
+        async def send_and_capture(message):
+            nonlocal start, size
+            if message["type"] == "http.response.start":
+                # The route's dependencies have run by now; only keep bodies worth storing
+                if CACHEABLE in scope and message["status"] == 200:
+                    # A copy: outer middleware (CORS) edits the headers of the message it is sent in place
+                    start = {**message, "headers": list(message.get("headers", []))}
+            elif start is not None and size <= self.max_entry_bytes:
+                size += len(message.get("body", b""))
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, receive, send_and_capture)
+
+        if start is None or size > self.max_entry_bytes:
+            return False
+        headers = [(name.lower(), value) for name, value in start.get("headers", [])]
+        if any(name == b"set-cookie" for name, _ in headers):
+            return False
+        route = route_template(scope)
+        if route not in self._routes:
+            self._routes[route] = compile_path(route)[0]
+        tables, versions = scope[CACHEABLE]
+        stored_headers = [(name, value) for name, value in headers
+                          if name not in UNCACHED_HEADERS and not name.startswith(UNCACHED_HEADER_PREFIXES)]
+        await self.cache.set(key, CachedResponse(tables, versions, 200, stored_headers, b"".join(chunks)))
+        return True
+
+
+def _key(scope) -> str:
+    return f"{scope['path']}?{scope['query_string'].decode('latin-1')}"
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None